@@ -22,3 +22,41 @@ api.interceptors.request.use(
 );
 
 export default api;
+
+// Resumable upload for large photos (see server/services/uploads.py).
+// Sends the file in chunks; after a network error it asks the server how
+// much arrived and continues from there. Resolves to the upload id, which is
+// then finalized with the item fields: POST /items/uploads/<id>/finalize.
+export const uploadInChunks = async (file, { maxRetries = 5 } = {}) => {
+  const { data: session } = await api.post("/items/uploads", {
+    filename: file.name,
+    content_type: file.type,
+    size: file.size,
+  });
+  let offset = session.offset;
+  let failures = 0;
+
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + session.chunk_size);
+    try {
+      const { data } = await api.put(`/items/uploads/${session.upload_id}`, chunk, {
+        headers: {
+          "Content-Type": "application/octet-stream",
+          "Upload-Offset": String(offset),
+        },
+      });
+      offset = data.offset;
+      failures = 0;
+    } catch (error) {
+      if (error.response?.status === 409 && error.response.data?.offset !== undefined) {
+        offset = error.response.data.offset; // Server already has more (or less) than we thought
+        continue;
+      }
+      if (error.response || ++failures > maxRetries) throw error;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+      const { data } = await api.get(`/items/uploads/${session.upload_id}`);
+      offset = data.offset;
+    }
+  }
+  return session.upload_id;
+};
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useParams, Link } from "react-router-dom";
 import Layout from "../components/Layout";
 import {
@@ -32,6 +32,10 @@ const ItemDetail = () => {
   const [showClaimModal, setShowClaimModal] = useState(false);
   const [claimMessage, setClaimMessage] = useState("");
   const [submittingClaim, setSubmittingClaim] = useState(false);
+  const claimKey = useRef(null); // Idempotency-Key, reused when a timed-out claim is re-sent
+  useEffect(() => {
+    claimKey.current = null;
+  }, [claimMessage]);
   const [isDrafting, setIsDrafting] = useState(false);
 
   // Accept Modal State
@@ -104,7 +108,12 @@ const ItemDetail = () => {
   const submitClaim = async () => {
     setSubmittingClaim(true);
     try {
-      await api.post("/claims/", { item_id: id, message: claimMessage });
+      claimKey.current = claimKey.current || crypto.randomUUID();
+      await api.post(
+        "/claims/",
+        { item_id: id, message: claimMessage },
+        { headers: { "Idempotency-Key": claimKey.current } }
+      );
       setShowClaimModal(false);
       fetchClaims();
       alert("✅ Claim request sent successfully! The owner will be notified.");
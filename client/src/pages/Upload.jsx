@@ -1,11 +1,46 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import Layout from "../components/Layout";
 import { Upload as UploadIcon, X, MapPin, Clock, Type } from "lucide-react";
 import Button from "../components/Button";
 import { useNavigate } from "react-router-dom";
-import api from "../api";
+import api, { uploadInChunks } from "../api";
 import { useAuth } from "../context/AuthContext";
 
+// Photos above this go through the resumable chunked upload
+const CHUNKED_UPLOAD_THRESHOLD = 2 * 1024 * 1024;
+
+// Same policy as the server (MAX_IMAGE_SIDE / JPEG_QUALITY in routes/items.py):
+// a photo resized and encoded here is stored as sent, without a re-encode.
+const MAX_IMAGE_SIDE = 1024;
+const JPEG_QUALITY = 0.7;
+
+const resizeForUpload = async (original) => {
+  try {
+    const bitmap = await createImageBitmap(original, { imageOrientation: "from-image" });
+    const scale = Math.min(1, MAX_IMAGE_SIDE / Math.max(bitmap.width, bitmap.height));
+    const canvas = document.createElement("canvas");
+    canvas.width = Math.round(bitmap.width * scale);
+    canvas.height = Math.round(bitmap.height * scale);
+    const ctx = canvas.getContext("2d");
+    ctx.fillStyle = "#fff"; // Transparent PNGs get a white background, not black
+    ctx.fillRect(0, 0, canvas.width, canvas.height);
+    ctx.imageSmoothingQuality = "high";
+    ctx.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+
+    const blob = await new Promise((resolve) =>
+      canvas.toBlob(resolve, "image/jpeg", JPEG_QUALITY)
+    );
+    if (!blob) return original;
+    const name = original.name.replace(/\.[^.]*$/, "") + ".jpg";
+    return new File([blob], name, { type: "image/jpeg" });
+  } catch (error) {
+    // Formats the browser can't decode (e.g. HEIC): the server converts them
+    console.warn("Pre-resize failed, uploading the original", error);
+    return original;
+  }
+};
+
 const Upload = () => {
   const navigate = useNavigate();
   const [dragActive, setDragActive] = useState(false);
@@ -33,6 +68,15 @@ const Upload = () => {
 
   // Tag State
   const [tags, setTags] = useState([]);
+
+  // One Idempotency-Key per submission: re-submitting after a timeout gets the
+  // first attempt's result instead of a duplicate item. New key once anything changes.
+  const submitKey = useRef(null);
+  // Resized once per picked file, so a re-submit sends identical bytes (same Idempotency-Key)
+  const resized = useRef(null);
+  useEffect(() => {
+    submitKey.current = null;
+  }, [file, formData, tags]);
   const [manualTag, setManualTag] = useState("");
 
   const PRESET_TAGS = [
@@ -114,8 +158,12 @@ const Upload = () => {
     }
 
     setLoading(true);
+    if (resized.current?.source !== file) {
+      resized.current = { source: file, image: await resizeForUpload(file) };
+    }
+    const image = resized.current.image;
     const data = new FormData();
-    data.append("image", file);
+    data.append("image", image);
     data.append("type", formData.type);
     data.append(
       "description",
@@ -137,9 +185,19 @@ const Upload = () => {
     data.append("manual_tags", JSON.stringify(tags));
 
     try {
-      await api.post("/items/", data, {
-        headers: { "Content-Type": "multipart/form-data" },
-      });
+      submitKey.current = submitKey.current || crypto.randomUUID();
+      const headers = {
+        "Content-Type": "multipart/form-data",
+        "Idempotency-Key": submitKey.current,
+      };
+      if (image.size > CHUNKED_UPLOAD_THRESHOLD) {
+        // Big photo: resumable chunks, then the item fields without the image
+        const uploadId = await uploadInChunks(image);
+        data.delete("image");
+        await api.post(`/items/uploads/${uploadId}/finalize`, data, { headers });
+      } else {
+        await api.post("/items/", data, { headers });
+      }
       // Redirect to home
       navigate("/");
     } catch (error) {
@@ -1,22 +1,10 @@
 import os
-import json
 import base64
-from openai import OpenAI
+import asyncio
+import logging
+from ai_models.llm_gateway import RateLimitError, get_gateway
 
-# Configure OpenAI
-# We'll initialize client lazily to ensure environment variables are loaded
-client = None
-
-def get_client():
-    global client
-    if not client:
-        api_key = os.getenv('OPENAI_API_KEY')
-        if api_key:
-            client = OpenAI(api_key=api_key)
-            print(f"DEBUG: Initialized OpenAI Client with key ending in ...{api_key[-4:]}")
-        else:
-            print("ERROR: No OPENAI_API_KEY found in environment.")
-    return client
+log = logging.getLogger(__name__)
 
 
 def encode_image(image_input):
@@ -27,6 +15,13 @@ def encode_image(image_input):
     if not image_input:
         return ""
     
+    # Payload stored in the ItemImage table (/api/items/images/<id>)
+    if image_input.startswith("/api/items/images/"):
+        from models import ItemImage
+        image_id = ItemImage.id_from_url(image_input)
+        image = ItemImage.query.get(image_id) if image_id else None
+        return base64.b64encode(image.data).decode('utf-8') if image else ""
+
     # If it's already a data URI or base64 string
     if image_input.startswith("data:"):
         return image_input.split(",")[1]
@@ -39,24 +34,29 @@ def encode_image(image_input):
             return base64.b64encode(image_file.read()).decode('utf-8')
     return ""
 
-def analyze_image(image_path_or_data, user_description=""):
+def image_for_model(image_input):
     """
-    Analyzes an image using OpenAI GPT-4o-mini to extract details.
-    Accepts: File path OR Base64 Data URI
+    Image reference the vision model can read: remote http(s) URLs (Cloudinary)
+    are passed through untouched, anything else is inlined as a data URI.
     """
-    cli = get_client()
-    if not cli:
-        print("❌ AI Service Error: Client could not be initialized.")
-        return _fallback_result(user_description, "OpenAI Client not initialized")
+    if image_input and image_input.startswith(("http://", "https://")):
+        return image_input
+    base64_image = encode_image(image_input)
+    return f"data:image/jpeg;base64,{base64_image}" if base64_image else ""
 
-    try:
-        # Check if it's base64 data URI
-        
-        print(f"DEBUG: Starting analysis. Input length: {len(image_path_or_data)}")
-        
-        base64_image = encode_image(image_path_or_data)
-        
-        prompt = """
+
+def item_image_ref(item):
+    """Best image source for an item row: DB/Cloudinary reference, else local file."""
+    if getattr(item, 'image_data', None):
+        return item.image_data
+    if getattr(item, 'image_url', None):
+        return _get_full_path(item.image_url)
+    return ""
+
+
+ANALYSIS_MODEL = "gpt-4o-mini"
+ANALYSIS_MAX_TOKENS = 300
+ANALYSIS_PROMPT = """
         Analyze this image of a lost/found item. 
         Return ONLY a raw JSON object (no markdown formatting) with the following fields:
         - category: (e.g., Electronics, Clothing, Bottle, Keys)
@@ -66,35 +66,75 @@ def analyze_image(image_path_or_data, user_description=""):
         - distinctive_features: (Array of strings listing unique scratches, stickers, or identifiers)
         """
 
-        response = cli.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
-                        },
-                    ],
-                }
+
+def analysis_messages(image_ref):
+    """Chat messages for the tagging prompt (shared by live and batch analysis)."""
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": ANALYSIS_PROMPT},
+                {"type": "image_url", "image_url": {"url": image_ref}},
             ],
-            max_tokens=300,
-            response_format={ "type": "json_object" }
+        }
+    ]
+
+
+def analyze_image(image_path_or_data, user_description=""):
+    """
+    Analyzes an image using OpenAI GPT-4o-mini to extract details.
+    Accepts: File path, Base64 Data URI, /api/items/images/<id> or Cloudinary URL
+    """
+    llm = get_gateway()
+    config_error = llm.check("openai")
+    if config_error:
+        log.error("AI service unavailable: %s", config_error)
+        return _fallback_result(user_description, "OpenAI Client not initialized")
+
+    try:
+        log.debug("Starting analysis", extra={"input_length": len(image_path_or_data)})
+
+        image_ref = image_for_model(image_path_or_data)
+        
+        result = llm.chat_json(
+            messages=analysis_messages(image_ref),
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            model=ANALYSIS_MODEL,
+            purpose="analyze",
         )
 
-        content = response.choices[0].message.content
-        print(f"DEBUG: Analysis success: {content}")
-        return json.loads(content)
+        log.debug("Analysis success", extra={"analysis": result})
+        return result
 
-    except Exception as e:
-        print(f"❌ OPENAI ANALYSIS FAILED: {e}")
+    except RateLimitError:
         # Re-raise rate limit errors so frontend knows to tell user to wait
-        if "429" in str(e):
-            raise e
+        raise
+    except Exception as e:
+        log.error("OpenAI analysis failed: %s", e)
+        return _fallback_result(user_description, str(e))
+
+async def analyze_image_async(image_ref, user_description=""):
+    """
+    analyze_image for the async handlers. `image_ref` must already be a URL or
+    data URI (image_for_model may hit the DB, so resolve it off the event loop).
+    """
+    llm = get_gateway()
+    config_error = llm.check("openai")
+    if config_error:
+        log.error("AI service unavailable: %s", config_error)
+        return _fallback_result(user_description, "OpenAI Client not initialized")
+
+    try:
+        return await llm.chat_json_async(
+            messages=analysis_messages(image_ref),
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            model=ANALYSIS_MODEL,
+            purpose="analyze",
+        )
+    except RateLimitError:
+        raise
+    except Exception as e:
+        log.error("OpenAI analysis failed: %s", e)
         return _fallback_result(user_description, str(e))
 
 def _fallback_result(user_description, error_msg=""):
@@ -106,118 +146,142 @@ def _fallback_result(user_description, error_msg=""):
         "distinctive_features": []
     }
 
+# Limit comparisons to save tokens and avoid Rate Limits (3 RPM on free tier)
+# We will only compare top 2 candidates
+VISION_MAX_CANDIDATES = 2
+VISION_PAUSE_SECONDS = 1  # Between comparisons, to respect nice-tier limits
+
+
+def image_refs(source_item, candidates):
+    """Model-readable image refs for a vision comparison (may query ItemImage)."""
+    source_ref = image_for_model(item_image_ref(source_item))
+    return source_ref, [image_for_model(item_image_ref(c)) for c in candidates[:VISION_MAX_CANDIDATES]]
+
+
+def comparison_messages(source_item, candidate, source_ref, cand_ref):
+    prompt = f"""
+    Compare these two items.
+    Item 1: {source_item.description}
+    Item 2: {candidate.description}
+
+    Are they the SAME physical object?
+    Return JSON: {{ "is_match": boolean, "confidence": 0-100, "reasoning": "string" }}
+    """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": source_ref}},
+                {"type": "image_url", "image_url": {"url": cand_ref}},
+            ],
+        }
+    ]
+
+
+def _vision_match(candidate, result):
+    """Match entry for a comparison result, or None if it isn't a confident match."""
+    log.debug("Comparison result", extra={"candidate_id": candidate.id, "result": result})
+    if not (result.get('is_match') and result.get('confidence', 0) > 60):
+        return None
+    return {
+        "id": candidate.id,
+        "confidence": result['confidence'],
+        "reasoning": result['reasoning'],
+        "item": {
+            "id": candidate.id,
+            "description": candidate.description,
+            "location": candidate.location,
+            "image_url": candidate.image_url,
+            "category": candidate.category,
+            "color": candidate.color
+        }
+    }
+
+
 def find_matches_with_images(source_item, candidates):
     """
     Compares source item's image against candidate images for visual similarity using GPT-4o-mini.
     Supports file paths and DB-stored base64.
     """
-    cli = get_client()
-    if not cli or not candidates:
+    llm = get_gateway()
+    if not candidates or llm.check("openai"):
         return []
 
     try:
         matches = []
-        
+
         # Get source image (prefer image_data from DB over file path)
-        if getattr(source_item, 'image_data', None):
-            source_base64 = encode_image(source_item.image_data)
-        elif source_item.image_url:
-            source_path = _get_full_path(source_item.image_url)
-            source_base64 = encode_image(source_path)
-        else:
+        source_ref, cand_refs = image_refs(source_item, candidates)
+        if not source_ref:
             return [] # No image source
-            
-        if not source_base64:
-            return []
 
-        # Limit comparisons to save tokens and avoid Rate Limits (3 RPM on free tier)
-        # We will only compare top 2 candidates
         import time
-        
-        for candidate in candidates[:2]:
+
+        for candidate, cand_ref in zip(candidates, cand_refs):
             try:
-                print(f"DEBUG: Comparing against Item {candidate.id}")
-                
-                # Get candidate image (prefer DB data)
-                cand_base64 = ""
-                if getattr(candidate, 'image_data', None):
-                    cand_base64 = encode_image(candidate.image_data)
-                elif candidate.image_url:
-                    cand_path = _get_full_path(candidate.image_url)
-                    cand_base64 = encode_image(cand_path)
-                    
-                if not cand_base64:
+                log.debug("Comparing against item %s", candidate.id)
+                if not cand_ref:
                     continue
-                
-                prompt = f"""
-                Compare these two items.
-                Item 1: {source_item.description}
-                Item 2: {candidate.description}
-                
-                Are they the SAME physical object? 
-                Return JSON: {{ "is_match": boolean, "confidence": 0-100, "reasoning": "string" }}
-                """
-                
+
                 try:
-                    response = cli.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": [
-                                    {"type": "text", "text": prompt},
-                                    {
-                                        "type": "image_url",
-                                        "image_url": {"url": f"data:image/jpeg;base64,{source_base64}"}
-                                    },
-                                    {
-                                        "type": "image_url",
-                                        "image_url": {"url": f"data:image/jpeg;base64,{cand_base64}"}
-                                    },
-                                ],
-                            }
-                        ],
+                    result = llm.chat_json(
+                        messages=comparison_messages(source_item, candidate, source_ref, cand_ref),
                         max_tokens=300,
-                        response_format={ "type": "json_object" }
+                        max_attempts=1,  # Rate limited -> stop comparing, don't retry
+                        purpose="compare",
                     )
-                    
-                    result = json.loads(response.choices[0].message.content)
-                    print(f"DEBUG: Comparison Result for {candidate.id}: {result}")
-                    
-                    if result.get('is_match') and result.get('confidence', 0) > 60:
-                        matches.append({
-                            "id": candidate.id,
-                            "confidence": result['confidence'],
-                            "reasoning": result['reasoning'],
-                            "item": {
-                                "id": candidate.id,
-                                "description": candidate.description,
-                                "location": candidate.location,
-                                "image_url": candidate.image_url,
-                                "category": candidate.category,
-                                "color": candidate.color
-                            }
-                        })
-                except Exception as api_e:
-                     if "429" in str(api_e):
-                         print("⚠️ OpenAI Rate Limit Hit. Skipping remaining matches.")
-                         break
-                     raise api_e
-
-                # Sleep to respect nice-tier limits
-                time.sleep(1)
-                
+                    match = _vision_match(candidate, result)
+                    if match:
+                        matches.append(match)
+                except RateLimitError:
+                    log.warning("OpenAI rate limit hit, skipping remaining matches")
+                    break
+
+                time.sleep(VISION_PAUSE_SECONDS)
+
             except Exception as inner_e:
-                print(f"Error comparing with item {candidate.id}: {inner_e}")
+                log.warning("Error comparing with item %s: %s", candidate.id, inner_e)
                 continue
-        
+
         matches.sort(key=lambda x: x['confidence'], reverse=True)
         return matches
 
     except Exception as e:
-        print(f"Error in find_matches_with_images: {e}")
+        log.exception("Error in find_matches_with_images: %s", e)
+        return []
+
+async def find_matches_with_images_async(source_item, candidates, source_ref, cand_refs):
+    """find_matches_with_images for the async handlers; refs come from image_refs()."""
+    llm = get_gateway()
+    if not candidates or not source_ref or llm.check("openai"):
         return []
 
+    matches = []
+    for candidate, cand_ref in zip(candidates, cand_refs):
+        if not cand_ref:
+            continue
+        try:
+            result = await llm.chat_json_async(
+                messages=comparison_messages(source_item, candidate, source_ref, cand_ref),
+                max_tokens=300,
+                max_attempts=1,
+                purpose="compare",
+            )
+            match = _vision_match(candidate, result)
+            if match:
+                matches.append(match)
+        except RateLimitError:
+            log.warning("OpenAI rate limit hit, skipping remaining matches")
+            break
+        except Exception as e:
+            log.warning("Error comparing with item %s: %s", candidate.id, e)
+            continue
+        await asyncio.sleep(VISION_PAUSE_SECONDS)
+
+    matches.sort(key=lambda x: x['confidence'], reverse=True)
+    return matches
+
 def _get_full_path(relative_path):
     if not relative_path: return ""
     if relative_path.startswith('/'):
@@ -228,38 +292,56 @@ def _get_full_path(relative_path):
         return os.path.join('/tmp', 'uploads', os.path.basename(relative_path))
     return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads', os.path.basename(relative_path))
 
+VERIFY_FALLBACK = {"question": "Can you describe a unique feature of this item?", "expected_answer_type": "text"}
+VERIFY_ERROR_FALLBACK = {"question": "Please describe any unique markings on this item.", "expected_answer_type": "text"}
+
+
+def verification_messages(item_description, distinctive_features):
+    features_str = ", ".join(distinctive_features) if distinctive_features else "No specific features listed"
+
+    prompt = f"""
+    I have found an item described as: "{item_description}".
+    It has these distinctive features: {features_str}.
+
+    Generate a "Verification Question" that the true owner should be able to answer, but a stranger wouldn't know from just seeing a generic photo.
+    Focus on specific details like brands, scratches, wallpapers (if phone), or contents (if wallet).
+
+    Return JSON: {{ "question": "string", "expected_answer_type": "text" }}
+    """
+    return [{"role": "user", "content": prompt}]
+
+
 def generate_verification_question(item_description, distinctive_features):
     """
     Generates a security question to verify ownership of a Found item.
     Uses GPT-4o-mini to create a question based on hidden details.
     """
-    cli = get_client()
-    if not cli:
-        return {"question": "Can you describe a unique feature of this item?", "expected_answer_type": "text"}
+    llm = get_gateway()
+    if llm.check("openai"):
+        return dict(VERIFY_FALLBACK)
 
     try:
-        features_str = ", ".join(distinctive_features) if distinctive_features else "No specific features listed"
-        
-        prompt = f"""
-        I have found an item described as: "{item_description}".
-        It has these distinctive features: {features_str}.
-        
-        Generate a "Verification Question" that the true owner should be able to answer, but a stranger wouldn't know from just seeing a generic photo.
-        Focus on specific details like brands, scratches, wallpapers (if phone), or contents (if wallet).
-        
-        Return JSON: {{ "question": "string", "expected_answer_type": "text" }}
-        """
+        return llm.chat_json(
+            messages=verification_messages(item_description, distinctive_features),
+            max_tokens=100,
+            purpose="verify",
+        )
+    except Exception as e:
+        log.warning("Error generating verification question: %s", e)
+        return dict(VERIFY_ERROR_FALLBACK)
 
-        response = cli.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
+
+async def generate_verification_question_async(item_description, distinctive_features):
+    llm = get_gateway()
+    if llm.check("openai"):
+        return dict(VERIFY_FALLBACK)
+
+    try:
+        return await llm.chat_json_async(
+            messages=verification_messages(item_description, distinctive_features),
             max_tokens=100,
-            response_format={ "type": "json_object" }
+            purpose="verify",
         )
-        
-        return json.loads(response.choices[0].message.content)
     except Exception as e:
-        print(f"Error generating verification question: {e}")
-        return {"question": "Please describe any unique markings on this item.", "expected_answer_type": "text"}
+        log.warning("Error generating verification question: %s", e)
+        return dict(VERIFY_ERROR_FALLBACK)
@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import time
+import uuid
+
+from models import db, Item
+from ai_models.ai_service import (
+    ANALYSIS_MAX_TOKENS,
+    ANALYSIS_MODEL,
+    analysis_messages,
+    image_for_model,
+    item_image_ref,
+)
+from ai_models.llm_gateway import FakeProvider, get_gateway
+from ai_models.retagging import apply_tags, is_fallback, needs_retag, tag_values
+
+log = logging.getLogger(__name__)
+
+# --- Batch Analysis (OpenAI Batch API) ---
+# For backfills that don't need an answer right away: pending items are
+# written as one JSONL request file, submitted as a batch (cheaper, separate
+# rate limits, up to 24h turnaround), polled, and the results applied to Item
+# rows in bulk. Submitted batches are tracked in a small JSON state file so
+# `submit` and `poll` can run as separate invocations.
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+CLOSED_STATUSES = TERMINAL_STATUSES | {"applied"}
+
+
+class OpenAIBatchBackend:
+    """Talks to the real Files + Batches API through the gateway's pooled client."""
+
+    def __init__(self, client=None):
+        self.client = client or get_gateway().openai.client()
+
+    def submit(self, jsonl):
+        batch_file = self.client.files.create(
+            file=("campusfind_batch.jsonl", jsonl.encode("utf-8")), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        """(status, output_file_id)"""
+        batch = self.client.batches.retrieve(batch_id)
+        return batch.status, batch.output_file_id
+
+    def download(self, file_id):
+        return self.client.files.content(file_id).text
+
+
+class LocalBatchBackend:
+    """
+    Local stand-in for the Batch API. Batches "complete" after
+    `turnaround` seconds and answer with the fake provider's canned analysis.
+    State lives on disk so submit/poll can run in different processes.
+    """
+
+    def __init__(self, root=None, turnaround=2.0):
+        self.root = root or os.path.join("/tmp", "campusfind_batches")
+        self.turnaround = turnaround
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def submit(self, jsonl):
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        with open(self._path(f"{batch_id}.input.jsonl"), "w") as f:
+            f.write(jsonl)
+        with open(self._path(f"{batch_id}.meta.json"), "w") as f:
+            json.dump({"created_at": time.time()}, f)
+        return batch_id
+
+    def status(self, batch_id):
+        with open(self._path(f"{batch_id}.meta.json")) as f:
+            meta = json.load(f)
+        if time.time() - meta["created_at"] < self.turnaround:
+            return "in_progress", None
+
+        output_path = self._path(f"{batch_id}.output.jsonl")
+        if not os.path.exists(output_path):
+            canned = FakeProvider.CANNED["analyze"]
+            with open(self._path(f"{batch_id}.input.jsonl")) as src, open(output_path, "w") as out:
+                for line in src:
+                    request = json.loads(line)
+                    out.write(
+                        json.dumps(
+                            {
+                                "custom_id": request["custom_id"],
+                                "response": {
+                                    "status_code": 200,
+                                    "body": {
+                                        "choices": [
+                                            {"message": {"content": json.dumps(canned)}}
+                                        ]
+                                    },
+                                },
+                                "error": None,
+                            }
+                        )
+                        + "\n"
+                    )
+        return "completed", f"{batch_id}.output.jsonl"
+
+    def download(self, file_id):
+        with open(self._path(file_id)) as f:
+            return f.read()
+
+
+def default_backend():
+    if os.getenv("LLM_PROVIDER", "").lower() == "fake":
+        return LocalBatchBackend()
+    return OpenAIBatchBackend()
+
+
+# --- State file ---
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"batches": []}
+
+
+def save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- Submit / Poll ---
+
+
+def build_request_line(item_id, image_ref):
+    return json.dumps(
+        {
+            "custom_id": f"item-{item_id}",
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": ANALYSIS_MODEL,
+                "messages": analysis_messages(image_ref),
+                "max_tokens": ANALYSIS_MAX_TOKENS,
+                "response_format": {"type": "json_object"},
+            },
+        }
+    )
+
+
+def submit_pending(backend, state_path, max_items=1000):
+    """
+    Queue every item with missing/fallback tags that isn't already in an
+    open batch. Returns the new batch id, or None if there was nothing to do.
+    """
+    state = load_state(state_path)
+    in_flight = {
+        item_id
+        for batch in state["batches"]
+        if batch["status"] not in CLOSED_STATUSES
+        for item_id in batch["item_ids"]
+    }
+
+    rows = (
+        db.session.query(Item.id, Item.image_data, Item.image_url)
+        .filter(needs_retag())
+        .order_by(Item.id)
+        .all()
+    )
+    lines, item_ids = [], []
+    for row in rows:
+        if row.id in in_flight:
+            continue
+        image_ref = image_for_model(item_image_ref(row))
+        if not image_ref:
+            continue  # no readable image
+        lines.append(build_request_line(row.id, image_ref))
+        item_ids.append(row.id)
+        if len(item_ids) >= max_items:
+            break
+
+    if not item_ids:
+        return None
+
+    batch_id = backend.submit("\n".join(lines) + "\n")
+    state["batches"].append(
+        {
+            "id": batch_id,
+            "item_ids": item_ids,
+            "status": "submitted",
+            "submitted_at": time.time(),
+        }
+    )
+    save_state(state_path, state)
+    log.info("Submitted batch %s with %d item(s)", batch_id, len(item_ids))
+    return batch_id
+
+
+def parse_results(output_jsonl):
+    """{item_id: tag values} for every successful, non-fallback result line."""
+    updates = {}
+    for line in output_jsonl.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            item_id = int(record["custom_id"].split("-", 1)[1])
+            content = response["body"]["choices"][0]["message"]["content"]
+            analysis = json.loads(content)
+        except (KeyError, IndexError, ValueError, TypeError):
+            continue
+        if not is_fallback(analysis):
+            updates[item_id] = tag_values(analysis)
+    return updates
+
+
+def poll(backend, state_path, wait=False, interval=30):
+    """
+    Check open batches and apply finished ones. With wait=True keeps polling
+    until nothing is open. Returns the number of items updated.
+    """
+    updated = 0
+    while True:
+        state = load_state(state_path)
+        open_batches = [b for b in state["batches"] if b["status"] not in CLOSED_STATUSES]
+
+        for batch in open_batches:
+            status, output_file_id = backend.status(batch["id"])
+            batch["status"] = status
+            if status == "completed" and output_file_id:
+                updates = parse_results(backend.download(output_file_id))
+                apply_tags(updates)
+                batch["status"] = "applied"
+                batch["applied"] = len(updates)
+                updated += len(updates)
+                log.info(
+                    "Batch %s: applied %d/%d", batch["id"], len(updates), len(batch["item_ids"])
+                )
+            elif status in TERMINAL_STATUSES:
+                log.warning("Batch %s ended with status '%s'", batch["id"], status)
+        save_state(state_path, state)
+
+        still_open = [b for b in state["batches"] if b["status"] not in CLOSED_STATUSES]
+        if not wait or not still_open:
+            return updated
+        time.sleep(interval)
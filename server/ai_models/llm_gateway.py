@@ -0,0 +1,494 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from services import metrics
+
+log = logging.getLogger(__name__)
+
+# --- LLM Gateway ---
+# Single entry point for every model call (OpenAI vision/JSON, Gemini text).
+# - one pooled HTTP client per provider, created once per process
+# - a deadline per call that covers all retries
+# - jittered exponential backoff on rate limits / 5xx / timeouts
+# - typed errors instead of string-matching "429" in exception messages
+# - latency/outcome metrics per provider and purpose (services/metrics.py)
+# - `*_async` twins of every call for the ASGI handlers (asgi.py), backed by
+#   the providers' async clients so a call never holds a thread
+# LLM_PROVIDER=fake swaps every provider for an offline stand-in.
+
+
+class LLMError(Exception):
+    """Base class for gateway errors."""
+
+
+class LLMConfigError(LLMError):
+    """Provider not configured (missing API key, SDK init failed)."""
+
+
+class RateLimitError(LLMError):
+    """Provider answered 429 / quota exhausted."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """The call (or the overall deadline) timed out."""
+
+
+class ProviderUnavailableError(LLMError):
+    """5xx or connection failure; usually worth retrying."""
+
+
+RETRYABLE = (RateLimitError, LLMTimeoutError, ProviderUnavailableError)
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff for the given 0-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_delay(error, attempt, give_up_at, max_attempts, base_delay):
+    """Seconds to wait before retry number `attempt`, or None to give up."""
+    if attempt >= max_attempts:
+        return None
+    delay = backoff_delay(attempt - 1, base=base_delay)
+    if isinstance(error, RateLimitError) and error.retry_after:
+        delay = max(delay, error.retry_after)
+    if time.monotonic() + delay >= give_up_at:
+        return None
+    return delay
+
+
+def call_with_retries(call, deadline, max_attempts=3, base_delay=0.5):
+    """
+    Run call(timeout) until it succeeds, a non-retryable error is raised, the
+    attempts run out or the deadline (seconds from now) would be exceeded.
+    """
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"Deadline of {deadline}s exceeded")
+        try:
+            return call(remaining)
+        except RETRYABLE as e:
+            attempt += 1
+            delay = _retry_delay(e, attempt, give_up_at, max_attempts, base_delay)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+async def call_with_retries_async(call, deadline, max_attempts=3, base_delay=0.5):
+    """call_with_retries for a coroutine function call(timeout)."""
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"Deadline of {deadline}s exceeded")
+        try:
+            return await call(remaining)
+        except RETRYABLE as e:
+            attempt += 1
+            delay = _retry_delay(e, attempt, give_up_at, max_attempts, base_delay)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+
+# --- Providers ---
+
+
+class OpenAIProvider:
+    name = "openai"
+
+    def __init__(self):
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _api_key(self):
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise LLMConfigError("No OPENAI_API_KEY found in environment.")
+        return api_key
+
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    api_key = self._api_key()
+                    import httpx
+                    from openai import OpenAI
+
+                    # Retries are ours (deadline-aware); keep connections warm
+                    self._client = OpenAI(
+                        api_key=api_key,
+                        max_retries=0,
+                        timeout=httpx.Timeout(30.0, connect=5.0),
+                        http_client=httpx.Client(
+                            limits=httpx.Limits(
+                                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+                                max_keepalive_connections=10,
+                            )
+                        ),
+                    )
+                    log.debug("Initialized OpenAI client with key ending in ...%s", api_key[-4:])
+        return self._client
+
+    def async_client(self):
+        """AsyncOpenAI twin of client(); lives on the serving process' event loop."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    api_key = self._api_key()
+                    import httpx
+                    from openai import AsyncOpenAI
+
+                    self._async_client = AsyncOpenAI(
+                        api_key=api_key,
+                        max_retries=0,
+                        timeout=httpx.Timeout(30.0, connect=5.0),
+                        http_client=httpx.AsyncClient(
+                            limits=httpx.Limits(
+                                max_connections=int(
+                                    os.getenv("OPENAI_ASYNC_MAX_CONNECTIONS", "200")
+                                ),
+                                max_keepalive_connections=50,
+                            )
+                        ),
+                    )
+        return self._async_client
+
+    def _request(self, model, messages, max_tokens):
+        return dict(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+
+    def chat_json(self, model, messages, max_tokens, timeout, purpose=None):
+        import openai
+
+        try:
+            response = self.client().with_options(timeout=timeout).chat.completions.create(
+                **self._request(model, messages, max_tokens)
+            )
+        except openai.APIError as e:
+            raise _openai_error(e) from e
+        return json.loads(response.choices[0].message.content)
+
+    async def chat_json_async(self, model, messages, max_tokens, timeout, purpose=None):
+        import openai
+
+        try:
+            response = await self.async_client().with_options(
+                timeout=timeout
+            ).chat.completions.create(**self._request(model, messages, max_tokens))
+        except openai.APIError as e:
+            raise _openai_error(e) from e
+        return json.loads(response.choices[0].message.content)
+
+
+def _openai_error(e):
+    """Map an openai.APIError onto the gateway's error types."""
+    import openai
+
+    if isinstance(e, openai.RateLimitError):
+        return RateLimitError(str(e), _retry_after(e))
+    if isinstance(e, openai.APITimeoutError):
+        return LLMTimeoutError(str(e))
+    if isinstance(e, (openai.APIConnectionError, openai.InternalServerError)):
+        return ProviderUnavailableError(str(e))
+    return LLMError(str(e))
+
+
+def _retry_after(error):
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self):
+        self._configured_key = None
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, model_name):
+        """Configure the SDK once and reuse one GenerativeModel per name."""
+        # Try common names for the key
+        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise LLMConfigError("Server configuration error: Missing API Key")
+
+        handle = self._models.get(model_name)
+        if handle is not None and self._configured_key == api_key:
+            return handle
+
+        import google.generativeai as genai
+
+        with self._lock:
+            try:
+                if self._configured_key != api_key:
+                    genai.configure(api_key=api_key)
+                    self._configured_key = api_key
+                    self._models.clear()
+                if model_name not in self._models:
+                    self._models[model_name] = genai.GenerativeModel(model_name)
+            except Exception as e:
+                raise LLMConfigError(f"Configuration failed: {str(e)}") from e
+            return self._models[model_name]
+
+    def generate_text(self, model, prompt, timeout, purpose=None):
+        from google.api_core import exceptions as gexc
+
+        try:
+            response = self.model(model).generate_content(
+                prompt, request_options={"timeout": timeout}
+            )
+        except gexc.GoogleAPIError as e:
+            raise _gemini_error(e) from e
+        return (response.text or "").strip()
+
+    async def generate_text_async(self, model, prompt, timeout, purpose=None):
+        from google.api_core import exceptions as gexc
+
+        try:
+            response = await self.model(model).generate_content_async(
+                prompt, request_options={"timeout": timeout}
+            )
+        except gexc.GoogleAPIError as e:
+            raise _gemini_error(e) from e
+        return (response.text or "").strip()
+
+
+def _gemini_error(e):
+    """Map a google.api_core error onto the gateway's error types."""
+    from google.api_core import exceptions as gexc
+
+    if isinstance(e, gexc.ResourceExhausted):
+        return RateLimitError(str(e))
+    if isinstance(e, gexc.DeadlineExceeded):
+        return LLMTimeoutError(str(e))
+    if isinstance(e, (gexc.ServiceUnavailable, gexc.InternalServerError)):
+        return ProviderUnavailableError(str(e))
+    return LLMError(str(e))
+
+
+class FakeProvider:
+    """
+    Offline stand-in for both providers (LLM_PROVIDER=fake).
+    FAKE_LLM_LATENCY_MS adds latency per call, FAKE_LLM_RATE_LIMIT_RATE makes
+    that fraction of calls raise RateLimitError.
+    """
+
+    name = "fake"
+
+    CANNED = {
+        "analyze": {
+            "category": "Bottle",
+            "color": "Blue",
+            "brand": "Milton",
+            "description": "A blue steel water bottle with a dented lid.",
+            "distinctive_features": ["dented lid", "sticker on side"],
+        },
+        "compare": {"is_match": True, "confidence": 72, "reasoning": "Same shape and color."},
+        "verify": {
+            "question": "What sticker is on the side of the bottle?",
+            "expected_answer_type": "text",
+        },
+    }
+
+    def __init__(self, latency_ms=None, rate_limit_rate=None):
+        self.latency_ms = float(
+            os.getenv("FAKE_LLM_LATENCY_MS", "0") if latency_ms is None else latency_ms
+        )
+        self.rate_limit_rate = float(
+            os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")
+            if rate_limit_rate is None
+            else rate_limit_rate
+        )
+        self.calls = 0
+
+    DRAFT = "Hi! I think this is mine and I can describe it in detail. Could we meet on campus today? 🙂"
+
+    def _outcome(self):
+        if self.rate_limit_rate and random.random() < self.rate_limit_rate:
+            raise RateLimitError("Fake provider: 429 Too Many Requests", retry_after=0.1)
+
+    def _simulate(self, timeout):
+        self.calls += 1
+        delay = self.latency_ms / 1000
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError("Fake provider timed out")
+        time.sleep(delay)
+        self._outcome()
+
+    async def _simulate_async(self, timeout):
+        self.calls += 1
+        delay = self.latency_ms / 1000
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise LLMTimeoutError("Fake provider timed out")
+        await asyncio.sleep(delay)
+        self._outcome()
+
+    def chat_json(self, model, messages, max_tokens, timeout, purpose=None):
+        self._simulate(timeout)
+        return dict(self.CANNED.get(purpose, {}))
+
+    async def chat_json_async(self, model, messages, max_tokens, timeout, purpose=None):
+        await self._simulate_async(timeout)
+        return dict(self.CANNED.get(purpose, {}))
+
+    def generate_text(self, model, prompt, timeout, purpose=None):
+        self._simulate(timeout)
+        return self.DRAFT
+
+    async def generate_text_async(self, model, prompt, timeout, purpose=None):
+        await self._simulate_async(timeout)
+        return self.DRAFT
+
+
+# --- Gateway ---
+
+
+class LLMGateway:
+    def __init__(self, fake=None):
+        if fake is None:
+            fake = os.getenv("LLM_PROVIDER", "").lower() == "fake"
+        if fake:
+            self.openai = self.gemini = FakeProvider()
+        else:
+            self.openai = OpenAIProvider()
+            self.gemini = GeminiProvider()
+
+    def check(self, provider):
+        """Return an error string if the provider can't be used, else None."""
+        try:
+            if provider == "openai" and isinstance(self.openai, OpenAIProvider):
+                self.openai.client()
+            elif provider == "gemini" and isinstance(self.gemini, GeminiProvider):
+                self.gemini.model(os.getenv("GEMINI_PRIMARY_MODEL", "gemini-2.0-flash"))
+        except LLMConfigError as e:
+            return str(e)
+        return None
+
+    def _record(self, provider, purpose, started, outcome):
+        purpose = purpose or "other"
+        metrics.observe(
+            "llm_call_seconds", time.perf_counter() - started, provider=provider, purpose=purpose
+        )
+        metrics.inc("llm_calls_total", provider=provider, purpose=purpose, outcome=outcome)
+
+    def _call(self, provider, purpose, call, deadline, max_attempts):
+        """call_with_retries + per provider/purpose latency and outcome metrics."""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return call_with_retries(call, deadline, max_attempts=max_attempts)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self._record(provider, purpose, started, outcome)
+
+    async def _call_async(self, provider, purpose, call, deadline, max_attempts):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await call_with_retries_async(call, deadline, max_attempts=max_attempts)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self._record(provider, purpose, started, outcome)
+
+    def chat_json(
+        self,
+        messages,
+        model="gpt-4o-mini",
+        max_tokens=300,
+        deadline=45,
+        max_attempts=3,
+        purpose=None,
+    ):
+        """OpenAI chat completion in JSON mode -> parsed dict."""
+        return self._call(
+            "openai",
+            purpose,
+            lambda timeout: self.openai.chat_json(
+                model, messages, max_tokens, timeout, purpose=purpose
+            ),
+            deadline,
+            max_attempts,
+        )
+
+    async def chat_json_async(
+        self,
+        messages,
+        model="gpt-4o-mini",
+        max_tokens=300,
+        deadline=45,
+        max_attempts=3,
+        purpose=None,
+    ):
+        return await self._call_async(
+            "openai",
+            purpose,
+            lambda timeout: self.openai.chat_json_async(
+                model, messages, max_tokens, timeout, purpose=purpose
+            ),
+            deadline,
+            max_attempts,
+        )
+
+    def generate_text(self, model, prompt, deadline=20, max_attempts=1, purpose=None):
+        """Gemini text generation -> stripped text."""
+        return self._call(
+            "gemini",
+            purpose,
+            lambda timeout: self.gemini.generate_text(model, prompt, timeout, purpose=purpose),
+            deadline,
+            max_attempts,
+        )
+
+    async def generate_text_async(self, model, prompt, deadline=20, max_attempts=1, purpose=None):
+        return await self._call_async(
+            "gemini",
+            purpose,
+            lambda timeout: self.gemini.generate_text_async(
+                model, prompt, timeout, purpose=purpose
+            ),
+            deadline,
+            max_attempts,
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Process-wide gateway (created lazily so env vars are loaded first)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models import db, Item
+from ai_models.ai_service import analyze_image, item_image_ref
+from ai_models.taxonomy import normalize_tags
+from services.cache import invalidate
+from services.matching import refresh_suggestions
+from services.ratelimit import TokenBucket
+
+log = logging.getLogger(__name__)
+
+# --- Bulk Re-tagging ---
+# Re-runs AI analysis for items whose tags are missing or still hold the
+# fallback values written when analysis failed at upload time.
+# Analysis calls run on a bounded thread pool paced by a token bucket; DB
+# writes stay on the calling thread, one commit per page. Progress is
+# checkpointed to a JSON file so an interrupted (or `limit`ed) run resumes
+# where it stopped; a run that drains the queue deletes the checkpoint, so the
+# next one starts over and retries items that failed or fell back.
+
+FALLBACK_CATEGORY = "General Item"
+FALLBACK_COLOR = "See image"
+
+
+def needs_retag():
+    """SQL clause selecting items with missing or fallback AI tags."""
+    return (
+        Item.category.is_(None)
+        | (Item.category == FALLBACK_CATEGORY)
+        | Item.color.is_(None)
+        | (Item.color == FALLBACK_COLOR)
+    )
+
+
+def is_fallback(analysis):
+    return not analysis or (
+        analysis.get("category") in (None, FALLBACK_CATEGORY)
+        and analysis.get("color") in (None, FALLBACK_COLOR)
+    )
+
+
+def tag_values(analysis):
+    """Item column values from an analysis result."""
+    features = analysis.get("distinctive_features") or []
+    values = {
+        "category": analysis.get("category"),
+        "color": analysis.get("color"),
+        "brand": analysis.get("brand"),
+        "distinctive_features": features if isinstance(features, list) else [],
+    }
+    values.update(normalize_tags(values["category"], values["color"], values["brand"]))
+    return values
+
+
+def apply_tags(item_ids_to_values):
+    """Write tag values for several items in one transaction (executemany UPDATE)."""
+    db.session.bulk_update_mappings(
+        Item, [dict(values, id=item_id) for item_id, values in item_ids_to_values.items()]
+    )
+    db.session.commit()
+    if item_ids_to_values:
+        invalidate("items")
+
+    # New tags -> new match suggestions (no pushes for bulk backfills)
+    for item in Item.query.filter(Item.id.in_(list(item_ids_to_values))).all():
+        refresh_suggestions(item, notify=False)
+
+
+class RetagJob:
+    def __init__(
+        self,
+        app,
+        concurrency=4,
+        requests_per_minute=30,
+        page_size=20,
+        limit=None,
+        checkpoint_path=None,
+    ):
+        self.app = app
+        self.concurrency = concurrency
+        self.bucket = TokenBucket.per_minute(requests_per_minute, burst=concurrency)
+        self.page_size = page_size
+        self.limit = limit
+        self.checkpoint_path = checkpoint_path
+        self.stop_requested = threading.Event()
+        self.state = {
+            "last_id": 0,
+            "processed": 0,  # Across resumed runs
+            "run_processed": 0,  # This run only; `limit` applies to it
+            "updated": 0,
+            "failed": 0,
+            "elapsed": 0.0,
+            "running": False,
+        }
+
+    # --- Checkpointing ---
+
+    def load_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                self.state.update(json.load(f))
+            self.state["run_processed"] = 0
+            log.info("Resuming re-tag after item %s", self.state["last_id"])
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)  # atomic on POSIX
+
+    def clear_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def throughput(self):
+        elapsed = self.state["elapsed"]
+        return self.state["processed"] / elapsed if elapsed else 0.0
+
+    # --- Work ---
+
+    def _analyze(self, row):
+        self.bucket.acquire()
+        # encode_image may read ItemImage rows, which needs an app context
+        with self.app.app_context():
+            try:
+                analysis = analyze_image(item_image_ref(row), row.description)
+            except Exception as e:
+                log.warning("Re-tag of item %s failed: %s", row.id, e)
+                return row.id, None
+        return row.id, None if is_fallback(analysis) else tag_values(analysis)
+
+    def _page_size(self):
+        if self.limit is None:
+            return self.page_size
+        return min(self.page_size, self.limit - self.state["run_processed"])
+
+    def _next_page(self, size):
+        return (
+            db.session.query(Item.id, Item.description, Item.image_data, Item.image_url)
+            .filter(needs_retag(), Item.id > self.state["last_id"])
+            .order_by(Item.id)
+            .limit(size)
+            .all()
+        )
+
+    def run(self, on_progress=None):
+        """Process every pending item (or `limit` of them). Returns the final state."""
+        self.state["running"] = True
+        started = time.monotonic() - self.state["elapsed"]
+        drained = False
+        try:
+            with self.app.app_context(), ThreadPoolExecutor(self.concurrency) as pool:
+                while not self.stop_requested.is_set():
+                    size = self._page_size()
+                    if size <= 0:
+                        break  # Limit reached: the next run resumes from the checkpoint
+                    rows = self._next_page(size)
+                    if not rows:
+                        drained = True
+                        break
+
+                    updates = {}
+                    for item_id, values in pool.map(self._analyze, rows):
+                        if values is None:
+                            self.state["failed"] += 1
+                        else:
+                            updates[item_id] = values
+
+                    apply_tags(updates)
+
+                    self.state["processed"] += len(rows)
+                    self.state["run_processed"] += len(rows)
+                    self.state["updated"] += len(updates)
+                    self.state["last_id"] = rows[-1].id
+                    self.state["elapsed"] = time.monotonic() - started
+                    self.save_checkpoint()
+                    if on_progress:
+                        on_progress(self)
+        finally:
+            self.state["running"] = False
+            self.state["elapsed"] = time.monotonic() - started
+            if drained:
+                self.clear_checkpoint()
+            else:
+                self.save_checkpoint()
+        return self.state
@@ -0,0 +1,298 @@
+import hashlib
+import re
+from functools import lru_cache
+
+# --- Tag Taxonomy ---
+# The AI returns free text ("Navy", "dark blue", "Smartphone", "One Plus").
+# At write time each tag is mapped onto a canonical code so matching can
+# compare integers instead of substrings:
+#   category -> category_code (its group is code // 100, e.g. Phone -> Electronics)
+#   color    -> color_code (a color family, e.g. navy / dark blue -> Blue)
+#   brand    -> brand_key (canonical lowercase key, e.g. "One Plus" -> "oneplus")
+# Codes are stored on Item, so never renumber an existing entry; add new ones.
+# Stored codes are recomputed on the next start whenever taxonomy_version()
+# changes (migrations.py), or on demand with `python -m scripts.normalize_tags`.
+
+# Group-level codes (x00) double as "generic" categories, e.g. "Electronics".
+CATEGORIES = {
+    100: ("Electronics", ["electronics", "electronic", "gadget", "device"]),
+    101: ("Phone", ["phone", "smartphone", "mobile", "mobile phone", "cell phone", "cellphone", "iphone", "android phone"]),
+    102: ("Laptop", ["laptop", "notebook computer", "macbook", "chromebook", "computer"]),
+    103: ("Tablet", ["tablet", "ipad", "e reader", "kindle"]),
+    104: ("Headphones", ["headphones", "headphone", "earphones", "earphone", "earbuds", "earbud", "airpods", "headset"]),
+    105: ("Charger", ["charger", "charging cable", "cable", "power bank", "powerbank", "adapter", "power adapter"]),
+    106: ("Smartwatch", ["smartwatch", "smart watch", "fitness band", "fitness tracker", "apple watch"]),
+    107: ("Calculator", ["calculator", "scientific calculator"]),
+    108: ("Camera", ["camera"]),
+    109: ("USB Drive", ["usb drive", "usb", "flash drive", "pen drive", "pendrive", "hard drive"]),
+    200: ("Bag", ["bag", "bags", "luggage"]),
+    201: ("Backpack", ["backpack", "rucksack", "school bag", "laptop bag"]),
+    202: ("Handbag", ["handbag", "purse", "tote", "tote bag", "sling bag", "pouch"]),
+    300: ("Accessories", ["accessory", "accessories"]),
+    301: ("Wallet", ["wallet", "billfold", "card holder", "cardholder"]),
+    302: ("Watch", ["watch", "wristwatch", "wrist watch"]),
+    303: ("Glasses", ["glasses", "spectacles", "eyeglasses", "sunglasses", "shades"]),
+    304: ("Jewelry", ["jewelry", "jewellery", "ring", "necklace", "bracelet", "earring", "earrings", "chain"]),
+    305: ("Umbrella", ["umbrella"]),
+    400: ("Clothing", ["clothing", "clothes", "apparel", "garment"]),
+    401: ("Jacket", ["jacket", "hoodie", "coat", "sweater", "sweatshirt", "blazer"]),
+    402: ("Hat", ["hat", "cap", "beanie"]),
+    403: ("Shoes", ["shoes", "shoe", "sneakers", "slippers", "sandals", "footwear"]),
+    404: ("Scarf", ["scarf", "stole", "shawl"]),
+    500: ("Documents & Cards", ["documents", "document", "papers", "certificate", "card"]),
+    501: ("ID Card", ["id card", "id", "student id", "identity card", "college id", "badge"]),
+    502: ("Bank Card", ["bank card", "credit card", "debit card", "atm card"]),
+    600: ("Keys", ["keys", "key", "keychain", "key chain", "keyring", "key ring"]),
+    700: ("Bottle", ["bottle", "water bottle", "bottle cap", "bottle lid", "flask", "tumbler", "thermos", "sipper"]),
+    701: ("Lunch Box", ["lunch box", "lunchbox", "tiffin", "container"]),
+    800: ("Stationery", ["stationery", "pen", "pencil", "pencil case", "pencil box", "geometry box"]),
+    801: ("Book", ["book", "textbook", "notebook", "diary", "journal", "notes"]),
+    900: ("Sports Equipment", ["sports equipment", "ball", "racket", "racquet", "bat", "gym gear"]),
+}
+
+COLORS = {
+    1: ("Black", ["black", "jet black", "ebony"]),
+    2: ("White", ["white", "off white", "ivory", "cream"]),
+    3: ("Gray", ["gray", "grey", "charcoal", "slate", "space gray", "space grey", "ash"]),
+    4: ("Silver", ["silver", "metallic", "chrome", "steel"]),
+    5: ("Blue", ["blue", "navy", "navy blue", "dark blue", "light blue", "sky blue", "royal blue", "teal", "turquoise", "cyan", "denim", "aqua"]),
+    6: ("Red", ["red", "maroon", "burgundy", "crimson", "dark red", "wine", "scarlet"]),
+    7: ("Pink", ["pink", "magenta", "fuchsia", "rose", "hot pink"]),
+    8: ("Orange", ["orange", "coral", "peach", "rust"]),
+    9: ("Yellow", ["yellow", "mustard", "lemon"]),
+    10: ("Gold", ["gold", "golden", "rose gold", "champagne"]),
+    11: ("Green", ["green", "olive", "lime", "mint", "dark green", "light green", "emerald"]),
+    12: ("Purple", ["purple", "violet", "lavender", "lilac", "mauve"]),
+    13: ("Brown", ["brown", "tan", "beige", "khaki", "camel", "chocolate", "leather brown"]),
+    14: ("Multicolor", ["multicolor", "multicolour", "multi color", "multi colored", "rainbow", "patterned", "floral"]),
+    15: ("Transparent", ["transparent", "clear", "see through"]),
+}
+
+BRANDS = {
+    "apple": ["apple"],
+    "samsung": ["samsung"],
+    "oneplus": ["oneplus", "one plus"],
+    "xiaomi": ["xiaomi", "mi", "redmi"],
+    "realme": ["realme"],
+    "google": ["google", "pixel"],
+    "motorola": ["motorola", "moto"],
+    "dell": ["dell"],
+    "hp": ["hp", "hewlett packard"],
+    "lenovo": ["lenovo"],
+    "asus": ["asus"],
+    "acer": ["acer"],
+    "microsoft": ["microsoft"],
+    "sony": ["sony"],
+    "bose": ["bose"],
+    "jbl": ["jbl"],
+    "boat": ["boat"],
+    "logitech": ["logitech"],
+    "anker": ["anker"],
+    "casio": ["casio"],
+    "fossil": ["fossil"],
+    "titan": ["titan"],
+    "ray-ban": ["ray ban", "rayban"],
+    "nike": ["nike"],
+    "adidas": ["adidas"],
+    "puma": ["puma"],
+    "the north face": ["the north face", "north face", "tnf"],
+    "jansport": ["jansport", "jan sport"],
+    "herschel": ["herschel"],
+    "wildcraft": ["wildcraft"],
+    "skybags": ["skybags", "sky bags"],
+    "american tourister": ["american tourister"],
+    "hydro flask": ["hydro flask", "hydroflask"],
+    "milton": ["milton"],
+    "parker": ["parker"],
+}
+
+# What the AI writes when it doesn't know; normalizes to "no value"
+UNKNOWN = {"", "unknown", "none", "n a", "na", "null", "not visible", "see image", "general item", "generic", "other", "no brand", "unbranded"}
+
+MAX_PHRASE_WORDS = 3
+
+
+def clean_text(text):
+    """Lowercase, punctuation -> spaces, collapsed whitespace."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(text).lower()).split())
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up (returns limit + 1) once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _typo_budget(word):
+    if len(word) <= 4:
+        return 0  # Short words are real words more often than typos: glue/blue, cart/card
+    return 1 if len(word) < 8 else 2
+
+
+class SynonymTable:
+    """
+    Phrase -> code lookup: exact phrase, then the longest known sub-phrase
+    (the last one when prefer_last - "laptop charger" is a charger; otherwise
+    the first - "black with red stripes" is black), the same on singular
+    forms, then a typo fallback per word (off with fuzzy=False; a typo
+    equally close to two codes matches neither). Typo lookups are cached per word.
+    """
+
+    def __init__(self, phrases, prefer_last=False, fuzzy=True):
+        self.phrases = {clean_text(phrase): code for phrase, code in phrases}
+        self.prefer_last = prefer_last
+        self.fuzzy_enabled = fuzzy
+        self._words = [(p, c) for p, c in self.phrases.items() if " " not in p]
+        self.fuzzy = lru_cache(maxsize=4096)(self._fuzzy)
+
+    @classmethod
+    def from_entries(cls, entries, prefer_last=False, fuzzy=True):
+        """{code: (name, [synonyms, ...])} -> table; first mention of a phrase wins."""
+        phrases = {}
+        for code, (name, words) in entries.items():
+            for phrase in [name] + list(words):
+                phrases.setdefault(clean_text(phrase), code)
+        return cls(phrases.items(), prefer_last, fuzzy)
+
+    def _fuzzy(self, word):
+        """Closest single-word synonym within the typo budget."""
+        limit = _typo_budget(word)
+        if not limit:
+            return None
+        best, best_distance = set(), limit + 1
+        for phrase, code in self._words:
+            distance = edit_distance(word, phrase, limit)
+            if distance < best_distance:
+                best, best_distance = {code}, distance
+            elif distance == best_distance:
+                best.add(code)
+        # "gren": grey and green are both one edit away -> don't guess
+        return best.pop() if len(best) == 1 else None
+
+    def phrase_matches(self, text):
+        """Codes of every known phrase in `text`, longest phrases first, no overlaps."""
+        words = clean_text(text).split()
+        taken = [False] * len(words)
+        codes = []
+        for size in range(min(MAX_PHRASE_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                if any(taken[start:start + size]):
+                    continue
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.phrases:
+                    codes.append(self.phrases[phrase])
+                    taken[start:start + size] = [True] * size
+        return codes
+
+    def _longest_phrase(self, words):
+        for size in range(min(MAX_PHRASE_WORDS, len(words)), 0, -1):
+            starts = range(len(words) - size + 1)
+            for start in reversed(starts) if self.prefer_last else starts:
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.phrases:
+                    return self.phrases[phrase]
+        return None
+
+    def lookup(self, text):
+        cleaned = clean_text(text)
+        if cleaned in UNKNOWN:
+            return None
+        if cleaned in self.phrases:
+            return self.phrases[cleaned]
+
+        words = cleaned.split()
+        code = self._longest_phrase(words)
+        if code is not None:
+            return code
+
+        # Whole phrases again on singular forms ("water bottles") before any guessing
+        singular = [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words]
+        if singular != words:
+            code = self._longest_phrase(singular)
+            if code is not None:
+                return code
+
+        if not self.fuzzy_enabled:
+            return None
+        for word in reversed(words) if self.prefer_last else words:
+            code = self.fuzzy(word)
+            if code is not None:
+                return code
+        return None
+
+
+CATEGORY_TABLE = SynonymTable.from_entries(CATEGORIES, prefer_last=True)
+COLOR_TABLE = SynonymTable.from_entries(COLORS)
+# No typo matching for brands: they are short made-up words, and a near miss
+# is usually another word (bolt/boat, bell/dell), which then scores as a match
+BRAND_TABLE = SynonymTable.from_entries(
+    {key: (key, phrases) for key, phrases in BRANDS.items()}, fuzzy=False
+)
+
+# Bump when SynonymTable's matching rules change; edits to the tables above
+# are picked up by the hash on their own
+RULES_VERSION = 2
+
+
+def taxonomy_version():
+    """Fingerprint of the tables and rules the stored tag codes are computed with."""
+    tables = (CATEGORIES, COLORS, BRANDS, sorted(UNKNOWN), MAX_PHRASE_WORDS)
+    digest = hashlib.sha1(repr(tables).encode()).hexdigest()[:12]
+    return f"{RULES_VERSION}-{digest}"
+
+
+# --- Public API ---
+
+
+@lru_cache(maxsize=2048)
+def category_code(text):
+    return CATEGORY_TABLE.lookup(text) if text else None
+
+
+@lru_cache(maxsize=2048)
+def color_code(text):
+    return COLOR_TABLE.lookup(text) if text else None
+
+
+@lru_cache(maxsize=2048)
+def brand_key(text):
+    """Known brand key, else the cleaned text itself (still an exact-match key)."""
+    if not text:
+        return None
+    key = BRAND_TABLE.lookup(text)
+    if key:
+        return key
+    cleaned = clean_text(text)
+    return None if cleaned in UNKNOWN else cleaned[:50]
+
+
+def category_group(code):
+    return None if code is None else code // 100 * 100
+
+
+def category_name(code):
+    return CATEGORIES[code][0] if code in CATEGORIES else None
+
+
+def color_name(code):
+    return COLORS[code][0] if code in COLORS else None
+
+
+def normalize_tags(category, color, brand):
+    """Item column values for the normalized tag codes."""
+    return {
+        "category_code": category_code(category),
+        "color_code": color_code(color),
+        "brand_key": brand_key(brand),
+    }
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 
@@ -9,9 +10,15 @@ from dotenv import load_dotenv
 # Load env vars before importing other modules that might use them
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+# Structured logging first, so import-time messages go through it too
+from services.log import setup_logging
+setup_logging()
+log = logging.getLogger(__name__)
+
 from flask import Flask
 from flask_cors import CORS
 from models import db
+from migrations import run_migrations
 from routes.auth import auth_bp
 from routes.items import items_bp
 from routes.claims import claims_bp
@@ -34,21 +41,31 @@ if db_url:
     if db_url.startswith("postgres://"):
         db_url = db_url.replace("postgres://", "postgresql://", 1)
     app.config['SQLALCHEMY_DATABASE_URI'] = db_url
-    print("DEBUG: Using Remote Database")
+    log.info("Using remote database")
 elif os.getenv('VERCEL') or os.getenv('FLASK_ENV') == 'production':
     # Serverless environment fallback
     db_path = os.path.join('/tmp', 'campusfind.db')
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    print(f"DEBUG: Using Vercel /tmp DB at {db_path}")
+    log.info("Using Vercel /tmp DB at %s", db_path)
 else:
     # Local development
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///campusfind.db'
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Request body cap (also bounds chunked-transfer bodies with no Content-Length):
+# the largest accepted image plus room for the form fields around it
+from services.uploads import MAX_UPLOAD_BYTES
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 1024 * 1024
+
 # Initialize Extensions
 db.init_app(app)
 
+from services import log as request_log, metrics, notifications
+request_log.init_app(app)  # Request ids, per-request debug logging
+notifications.init_app(app)
+metrics.init_app(app)  # Request timing, SQL counts, /api/metrics
+
 # --- Register Blueprints (Routes) ---
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(items_bp, url_prefix='/api/items')
@@ -84,9 +101,15 @@ def health():
 try:
     with app.app_context():
         db.create_all()
-        print("DEBUG: Tables verified/created successfully")
+        run_migrations()
+        log.debug("Tables verified/created successfully")
 except Exception as e:
-    print(f"CRITICAL: DB Creation Failed: {e}")
+    log.critical("DB creation failed: %s", e)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    app.run(
+        debug=os.getenv('FLASK_DEBUG') == '1',
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', '5001')),
+    )
@@ -0,0 +1,399 @@
+"""
+ASGI entry point for I/O-bound serving:
+
+    WEB_CONCURRENCY=2 uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+(uvicorn takes its worker count from WEB_CONCURRENCY; setting it there rather
+than with --workers also lets the cache and rate limiter pick their shared
+backends.)
+
+The endpoints that spend nearly all their wall time waiting on OpenAI,
+Gemini and Cloudinary run here as async handlers on the gateway's async
+clients, so one process can keep hundreds of AI calls in flight instead of
+one per WSGI thread:
+
+    POST /api/items/                        create item (upload, tagging, verification question)
+    GET  /api/items/match/<id>?vision=true  vision comparison
+    POST /api/gemini/draft-message          message drafts
+
+Their blocking steps (Pillow, SQLAlchemy) run in the thread pool with an app
+context. Every other route is the regular Flask app mounted through a2wsgi,
+so sync endpoints keep working unchanged. `python app.py` / gunicorn (WSGI)
+still serve everything synchronously.
+"""
+import functools
+import json
+import logging
+import os
+import time
+import uuid
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app
+from ai_models.ai_service import (
+    analyze_image_async,
+    find_matches_with_images_async,
+    generate_verification_question_async,
+    image_refs,
+)
+from models import Item
+from routes.auth import token_user_id
+from routes.gemini import draft_message_async
+from routes.items import (
+    apply_verification,
+    build_item,
+    compress_image,
+    created_payload,
+    fallback_analysis,
+    save_item,
+    save_local_copy,
+    suggested_matches,
+)
+from services import metrics
+from services.matching import vision_candidates
+from services.metrics import span
+from services.idempotency import (
+    IdempotencyConflict,
+    begin,
+    complete,
+    file_digest,
+    fingerprint,
+    release,
+    request_key,
+)
+from services.ratelimit import Throttled, admit, client_ip, provider_slots
+from services.storage import upload_image_async
+from services.uploads import MAX_UPLOAD_BYTES
+
+log = logging.getLogger(__name__)
+
+# Threads serving the mounted Flask app (a2wsgi's default is 10)
+WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+# Same request body cap as the Flask app (and its routes mounted below)
+MAX_BODY_BYTES = flask_app.config["MAX_CONTENT_LENGTH"]
+
+
+class BodyTooLarge(Exception):
+    """Request body or uploaded file over its limit (answered with 413)."""
+
+
+# --- Helpers ---
+
+
+def in_app_context(func, *args):
+    """Run blocking func in the thread pool inside a Flask app context (own DB session)."""
+
+    def call():
+        with flask_app.app_context():
+            return func(*args)
+
+    return run_in_threadpool(call)
+
+
+def json_response(payload, status=200, headers=None):
+    """JSON encoded by Flask's provider, so both stacks serialize identically."""
+    return Response(
+        flask_app.json.dumps(payload), status, headers, media_type="application/json"
+    )
+
+
+def throttled_response(e):
+    payload, status, headers = e.response()
+    return json_response(payload, status, headers)
+
+
+def too_large_response(e):
+    return json_response({"error": str(e)}, 413)
+
+
+def bounded(request, limit=MAX_BODY_BYTES):
+    """
+    `request` with its body capped at `limit` bytes, like Flask's
+    MAX_CONTENT_LENGTH: a larger Content-Length raises BodyTooLarge right
+    away, a chunked-transfer body as soon as it goes past the limit.
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise BodyTooLarge(f"Request too large (max {limit} bytes)")
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        received += len(message.get("body", b""))
+        if received > limit:
+            raise BodyTooLarge(f"Request too large (max {limit} bytes)")
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def read_upload(upload, limit=MAX_UPLOAD_BYTES):
+    """An UploadFile's bytes, read in blocks; raises BodyTooLarge past `limit`."""
+    parts, size = [], 0
+    while True:
+        block = await upload.read(64 * 1024)
+        if not block:
+            break
+        size += len(block)
+        if size > limit:
+            raise BodyTooLarge(f"File too large (max {limit} bytes)")
+        parts.append(block)
+    return b"".join(parts)
+
+
+def request_ip(request):
+    return client_ip(request.headers, request.client.host if request.client else None)
+
+
+def instrumented(rule):
+    """Request metrics and X-Request-ID, like the Flask hooks do for sync routes."""
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter()
+            response = await handler(request)
+            elapsed = time.perf_counter() - started
+            metrics.observe("http_request_seconds", elapsed, method=request.method, endpoint=rule)
+            metrics.inc(
+                "http_requests_total",
+                method=request.method,
+                endpoint=rule,
+                status=str(response.status_code),
+            )
+            response.headers["X-Request-ID"] = (
+                request.headers.get("x-request-id") or uuid.uuid4().hex[:12]
+            )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# --- Async handlers ---
+
+
+def _save_new_item(item):
+    save_item(item)
+    return created_payload(item)
+
+
+@instrumented("/api/items/")
+async def create_item(request):
+    """Async twin of routes.items.create_item (with its Idempotency-Key support)."""
+    try:
+        user_id = token_user_id(request.headers.get("authorization"))
+        if user_id is None:
+            return json_response({"error": "Unauthorized: Missing or invalid token"}, 401)
+
+        key = request_key(request.headers)
+        request = bounded(request)
+        async with request.form() as form:
+            if key is None:
+                return await _admitted_create_item(request, form, user_id)
+            return await _idempotent_create_item(request, form, user_id, key)
+
+    except IdempotencyConflict as e:
+        return json_response(*e.response())
+    except Throttled as e:
+        return throttled_response(e)
+    except BodyTooLarge as e:
+        return too_large_response(e)
+    except Exception as e:
+        log.exception("create_item failed: %s", e)
+        return json_response({"error": str(e)}, 500)
+
+
+async def _form_fingerprint(scope, form):
+    """services.idempotency fingerprint of a parsed form, same as the Flask decorator's."""
+    fields, files = [], []
+    for name, value in form.multi_items():
+        if isinstance(value, UploadFile):
+            files.append((name, value.filename, file_digest(await read_upload(value))))
+            await value.seek(0)
+        else:
+            fields.append((name, value))
+    return fingerprint(scope, sorted(fields), sorted(files), json.dumps(None))
+
+
+async def _idempotent_create_item(request, form, user_id, key):
+    try:
+        request_hash = await _form_fingerprint("create_item", form)
+        stored = await in_app_context(begin, "create_item", user_id, key, request_hash)
+    except (IdempotencyConflict, BodyTooLarge):
+        raise
+    except Exception as e:
+        log.warning("Idempotency check failed, running without it: %s", e)
+        return await _admitted_create_item(request, form, user_id)
+
+    if stored is not None:
+        return Response(
+            stored.body,
+            stored.status,
+            {"Idempotent-Replayed": "true"},
+            media_type=stored.mimetype,
+        )
+
+    try:
+        response = await _admitted_create_item(request, form, user_id)
+    except BaseException:
+        await in_app_context(release, "create_item", user_id, key)
+        raise
+    await in_app_context(
+        complete,
+        "create_item",
+        user_id,
+        key,
+        response.status_code,
+        response.body.decode(),
+        response.media_type,
+    )
+    return response
+
+
+async def _admitted_create_item(request, form, user_id):
+    admit("upload", user_id=user_id, ip=request_ip(request))
+    with provider_slots("openai"):
+        return await _create_item(form, user_id)
+
+
+async def _create_item(form, user_id):
+    """The upload -> analyze -> verify -> save pipeline (admission already granted)."""
+    upload = form.get("image")
+    if not isinstance(upload, UploadFile):
+        return json_response({"error": "No image uploaded"}, 400)
+    if not upload.filename:
+        return json_response({"error": "No selected file"}, 400)
+
+    file_content = await read_upload(upload)
+    compressed_content, image_data_uri = await run_in_threadpool(
+        compress_image, file_content, upload.content_type
+    )
+
+    with span("upload"):
+        filename = await run_in_threadpool(save_local_copy, file_content, upload.filename)
+        try:
+            image_url = await upload_image_async(compressed_content)
+        except Exception as e:
+            log.error("Cloudinary upload failed: %s", e)
+            return json_response({"error": f"Image upload failed: {str(e)}"}, 500)
+
+    try:
+        with span("analyze"):
+            analysis = await analyze_image_async(image_data_uri, form.get("description", ""))
+    except Exception as ai_e:
+        log.warning("AI analysis failed, using fallback tags: %s", ai_e)
+        analysis = fallback_analysis(form)
+
+    new_item = build_item(user_id, form, analysis, image_url, filename)
+
+    if new_item.type == "found":
+        try:
+            with span("verify_question"):
+                vq = await generate_verification_question_async(
+                    new_item.description, new_item.distinctive_features
+                )
+            apply_verification(new_item, vq)
+        except Exception as vq_e:
+            log.warning("Verification question generation failed: %s", vq_e)
+
+    return json_response(await in_app_context(_save_new_item, new_item), 201)
+
+
+def _vision_inputs(item_id):
+    source_item = Item.query.get(item_id)
+    if source_item is None:
+        return None
+    candidates = vision_candidates(source_item)
+    return (source_item, candidates, *image_refs(source_item, candidates))
+
+
+def _suggested_matches(item_id):
+    source_item = Item.query.get(item_id)
+    return None if source_item is None else suggested_matches(source_item)
+
+
+@instrumented("/api/items/match/<int:id>")
+async def get_matches(request):
+    """Async twin of routes.items.get_matches."""
+    item_id = request.path_params["id"]
+    try:
+        if request.query_params.get("vision") == "true":
+            user_id = token_user_id(request.headers.get("authorization"))
+            admit("vision", user_id=user_id, ip=request_ip(request))
+            with provider_slots("openai"):
+                inputs = await in_app_context(_vision_inputs, item_id)
+                if inputs is None:
+                    return json_response({"error": "Item not found"}, 404)
+                try:
+                    with span("vision"):
+                        matches = await find_matches_with_images_async(*inputs)
+                except Exception as ai_e:
+                    log.warning("AI match failed (rate limit?): %s", ai_e)
+                    matches = []
+            if matches:
+                return json_response(matches)
+
+        matches = await in_app_context(_suggested_matches, item_id)
+        if matches is None:
+            return json_response({"error": "Item not found"}, 404)
+        return json_response(matches)
+    except Throttled as e:
+        return throttled_response(e)
+    except Exception as e:
+        log.exception("Error in get_matches: %s", e)
+        return json_response({"error": str(e)}, 500)
+
+
+@instrumented("/api/gemini/draft-message")
+async def draft_message(request):
+    """Async twin of routes.gemini.draft_message."""
+    user_id = token_user_id(request.headers.get("authorization"))
+    if user_id is None:
+        return json_response({"message": "Token is invalid!"}, 401)
+    try:
+        data = await bounded(request).json()
+    except BodyTooLarge as e:
+        return too_large_response(e)
+    except ValueError:
+        return json_response({"error": "Invalid JSON body"}, 400)
+    try:
+        admit("draft", user_id=user_id, ip=request_ip(request))
+        with provider_slots("gemini"):
+            payload, status, headers = await draft_message_async(data or {})
+    except Throttled as e:
+        return throttled_response(e)
+    return json_response(payload, status, headers)
+
+
+# --- Application ---
+
+app = Starlette(
+    routes=[
+        Route("/api/items/", create_item, methods=["POST"]),
+        Route("/api/items/match/{id:int}", get_matches, methods=["GET"]),
+        Route("/api/gemini/draft-message", draft_message, methods=["POST"]),
+        # Everything else (including GET /api/items/) falls through to Flask
+        Mount("", app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    ],
+)
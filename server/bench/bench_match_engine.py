@@ -0,0 +1,136 @@
+"""
+Micro-benchmark: vectorized tag scoring vs. the per-candidate Python loop.
+
+Builds synthetic unresolved pools (no database needed), then scores a set of
+source items against each pool both ways and prints candidates/second.
+
+Usage (from server/):
+    python -m bench.bench_match_engine [--sizes 10000 100000] [--queries 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models.taxonomy import normalize_tags
+from services.match_engine import Candidate, PoolIndex
+from services.matching import MATCH_THRESHOLD, MAX_SUGGESTIONS, score_pair
+
+CATEGORIES = ["Phone", "Smartphone", "Electronics", "Wallet", "Keys", "Backpack", "Laptop",
+              "Water Bottle", "ID Card", "Earbuds", "Umbrella", "Jacket", "Watch", "Charger"]
+COLORS = ["Black", "White", "Blue", "Navy", "Red", "Maroon", "Green",
+          "Silver", "Grey", "Brown", "Pink", "Yellow"]
+BRANDS = ["Apple", "Samsung", "Nike", "Adidas", "Dell", "HP", "Sony", "JBL",
+          "Hydro Flask", "North Face", None, None, None]
+
+
+def make_pool(size, rng):
+    pool = []
+    for i in range(1, size + 1):
+        tags = dict(
+            category=rng.choice(CATEGORIES),
+            color=rng.choice(COLORS + [c.lower() for c in COLORS]),
+            brand=rng.choice(BRANDS),
+        )
+        pool.append(
+            Candidate(
+                id=i,
+                user_id=rng.randrange(1, 5000),
+                type="found",
+                description=f"item {i}",
+                zone_id=None,
+                date_lost=None,
+                **tags,
+                **normalize_tags(**tags),
+            )
+        )
+    return pool
+
+
+def make_sources(count, rng, pool_size):
+    sources = []
+    for _ in range(count):
+        tags = dict(
+            category=rng.choice(CATEGORIES),
+            color=rng.choice(COLORS),
+            brand=rng.choice(BRANDS),
+        )
+        sources.append(
+            SimpleNamespace(
+                id=0,
+                type="lost",
+                shared=set(rng.sample(range(1, pool_size + 1), 20)),
+                **tags,
+                **normalize_tags(**tags),
+            )
+        )
+    return sources
+
+
+def python_loop(source, pool):
+    scored = []
+    for cand in pool:
+        score, reasons = score_pair(source, cand, cand.id in source.shared)
+        if score >= MATCH_THRESHOLD:
+            scored.append((cand, score, reasons))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [cand.id for cand, _, _ in scored[:MAX_SUGGESTIONS]]
+
+
+def vectorized(source, index):
+    scores = index.score(
+        source.category_code, source.color_code, source.brand_key, source.shared
+    )
+    return [index.rows[i].id for i in index.top_k(scores, MAX_SUGGESTIONS, MATCH_THRESHOLD)]
+
+
+def bench(size, queries, loop_queries, rng):
+    pool = make_pool(size, rng)
+    sources = make_sources(queries, rng, size)
+
+    started = time.perf_counter()
+    index = PoolIndex(pool)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fast = [vectorized(s, index) for s in sources]
+    fast_time = (time.perf_counter() - started) / queries
+
+    started = time.perf_counter()
+    slow = [python_loop(s, pool) for s in sources[:loop_queries]]
+    slow_time = (time.perf_counter() - started) / loop_queries
+
+    # Same top scores (ties may pick different ids at the cut-off)
+    for s, a, b in zip(sources, fast, slow):
+        top_a = sorted(score_pair(s, pool[i - 1], i in s.shared)[0] for i in a)
+        top_b = sorted(score_pair(s, pool[i - 1], i in s.shared)[0] for i in b)
+        assert top_a == top_b, (top_a, top_b)
+
+    print(
+        f"{size:>8} candidates | build {build * 1000:8.1f} ms | "
+        f"numpy {fast_time * 1000:7.2f} ms/query ({size / fast_time / 1e6:6.1f}M cand/s) | "
+        f"python {slow_time * 1000:8.1f} ms/query ({size / slow_time / 1e6:6.2f}M cand/s) | "
+        f"x{slow_time / fast_time:.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--loop-queries", type=int, default=5,
+                        help="Queries for the (slow) Python loop baseline")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        bench(size, args.queries, min(args.loop_queries, args.queries), rng)
+
+
+if __name__ == "__main__":
+    main()
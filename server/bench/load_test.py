@@ -0,0 +1,376 @@
+"""
+Load test: drive a realistic request mix against the API and report
+p50/p90/p99 latency and throughput per endpoint.
+
+By default the app is booted in-process on a threaded WSGI server against a
+throwaway SQLite file, with every external service faked (OpenAI/Gemini via
+LLM_PROVIDER=fake, Cloudinary via IMAGE_STORAGE=fake, FCM via
+NOTIFICATION_TRANSPORT=fake). Fake latencies are configurable so the numbers
+resemble production round trips.
+
+Usage (from server/):
+    python -m bench.load_test                                  # SQLite, defaults
+    python -m bench.load_test --database-url postgresql://localhost/campusfind_bench
+    python -m bench.load_test --duration 60 --concurrency 16 --out results.json
+    python -m bench.load_test --baseline results.json         # fail on regressions
+    python -m bench.load_test --url http://localhost:5001 --database-url ... --secret-key ...
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_MIX = "feed=35,search=20,detail=15,matches=5,upload=5,claim=5,notifications=15"
+SEARCH_WORDS = ["black", "blue", "wallet", "phone", "keys", "bottle", "library", "canteen", "apple", "bag"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CampusFind load test")
+    parser.add_argument("--url", help="Target an already running server instead of booting one")
+    parser.add_argument("--database-url", help="DB to boot against / seed (default: temp SQLite)")
+    parser.add_argument("--secret-key", help="JWT secret of the target server (--url mode)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--claims", type=int, default=500)
+    parser.add_argument("--no-seed", action="store_true", help="Use the data already in the DB")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds excluded from stats")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix")
+    parser.add_argument("--llm-latency-ms", type=int, default=800)
+    parser.add_argument("--upload-latency-ms", type=int, default=300)
+    parser.add_argument("--push-latency-ms", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare with a previous --out file")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Allowed p99 / RPS regression vs baseline, in percent")
+    return parser.parse_args()
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operation(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+# --- Booting the app in-process ---
+
+
+def configure_environment(args):
+    """Fakes + DB for the in-process app. Must run before `import app`."""
+    if not args.database_url:
+        path = os.path.join(tempfile.mkdtemp(prefix="campusfind_bench_"), "bench.db")
+        args.database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["IMAGE_STORAGE"] = "fake"
+    os.environ["FAKE_UPLOAD_LATENCY_MS"] = str(args.upload_latency_ms)
+    os.environ["NOTIFICATION_TRANSPORT"] = "fake"
+    os.environ["FAKE_FCM_LATENCY_MS"] = str(args.push_latency_ms)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every simulated user shares 127.0.0.1; measure serving, not admission control
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "none")
+
+
+def boot_server():
+    """Threaded WSGI server on a free port. Returns (base_url, server)."""
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+# --- Seeding ---
+
+
+def seed(database_url, users, items, claims, rng):
+    """Bulk-insert users, items and claims via scripts.seed_data."""
+    from sqlalchemy import create_engine
+    from scripts.seed_data import seed as seed_rows
+
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        result = seed_rows(conn, users=users, items=items, claims=claims, rng=rng)
+    engine.dispose()
+    return result["user_ids"], result["item_ids"]
+
+
+def existing_ids(database_url):
+    from sqlalchemy import create_engine, select
+    from models import Item, User
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        user_ids = [r[0] for r in conn.execute(select(User.id))]
+        item_ids = [r[0] for r in conn.execute(select(Item.id))]
+    engine.dispose()
+    return user_ids, item_ids
+
+
+def make_token(user_id, secret):
+    import jwt
+
+    return jwt.encode(
+        {"user_id": user_id, "email": f"bench{user_id}@campus.test",
+         "exp": datetime.utcnow() + timedelta(hours=24)},
+        secret,
+        algorithm="HS256",
+    )
+
+
+def sample_jpeg():
+    from PIL import Image
+
+    # Noise compresses like a real photo, so the server's resize/re-encode does real work
+    img = Image.effect_noise((1600, 1200), 64).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+# --- Operations ---
+# Each takes (session, ctx, rng) and returns (name, response).
+
+
+def op_feed(session, ctx, rng):
+    params = {"type": rng.choice(["all", "lost", "found"])}
+    return "GET /api/items/", session.get(f"{ctx['base']}/api/items/", params=params)
+
+
+def op_search(session, ctx, rng):
+    # One keystroke of a search-as-you-type box
+    word = rng.choice(SEARCH_WORDS)
+    prefix = word[: rng.randint(2, len(word))]
+    return "GET /api/items/?q=", session.get(f"{ctx['base']}/api/items/", params={"q": prefix})
+
+
+def op_detail(session, ctx, rng):
+    item_id = rng.choice(ctx["item_ids"])
+    return "GET /api/items/<id>", session.get(f"{ctx['base']}/api/items/{item_id}")
+
+
+def op_matches(session, ctx, rng):
+    item_id = rng.choice(ctx["item_ids"])
+    return "GET /api/items/match/<id>", session.get(f"{ctx['base']}/api/items/match/{item_id}")
+
+
+def op_upload(session, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    response = session.post(
+        f"{ctx['base']}/api/items/",
+        headers={"Authorization": f"Bearer {ctx['tokens'][user_id]}"},
+        data={
+            "type": rng.choice(["lost", "found"]),
+            "description": f"Bench upload {rng.random():.6f}",
+            "location": rng.choice(["Library", "Canteen", "Hostel"]),
+        },
+        files={"image": ("bench.jpg", ctx["jpeg"], "image/jpeg")},
+    )
+    return "POST /api/items/", response
+
+
+def op_claim(session, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    response = session.post(
+        f"{ctx['base']}/api/claims/",
+        headers={"Authorization": f"Bearer {ctx['tokens'][user_id]}"},
+        json={"item_id": rng.choice(ctx["item_ids"]), "message": "I think this is mine"},
+    )
+    return "POST /api/claims/", response
+
+
+def op_notifications(session, ctx, rng):
+    user_id = rng.choice(ctx["user_ids"])
+    response = session.get(
+        f"{ctx['base']}/api/claims/notifications",
+        headers={"Authorization": f"Bearer {ctx['tokens'][user_id]}"},
+    )
+    return "GET /api/claims/notifications", response
+
+
+OPERATIONS = {
+    "feed": op_feed,
+    "search": op_search,
+    "detail": op_detail,
+    "matches": op_matches,
+    "upload": op_upload,
+    "claim": op_claim,
+    "notifications": op_notifications,
+}
+
+
+# --- Driver ---
+
+
+def worker(ctx, mix, stop_at, record_after, results, seed):
+    import requests
+
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    session = requests.Session()
+    while time.monotonic() < stop_at:
+        op = OPERATIONS[rng.choices(names, weights)[0]]
+        started = time.monotonic()
+        try:
+            name, response = op(session, ctx, rng)
+            status = response.status_code
+        except Exception as e:
+            name, status = op.__name__, f"error:{type(e).__name__}"
+        elapsed = time.monotonic() - started
+        if started >= record_after:
+            results.append((name, elapsed, status))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples, window):
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    client_errors = defaultdict(int)
+    for name, elapsed, status in samples:
+        by_endpoint[name].append(elapsed)
+        if not isinstance(status, int) or status >= 500:
+            errors[name] += 1
+        elif status >= 400:
+            client_errors[name] += 1
+
+    report = {}
+    for name, values in sorted(by_endpoint.items()):
+        values.sort()
+        report[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "client_errors": client_errors[name],
+            "rps": len(values) / window,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p90_ms": percentile(values, 0.90) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    total = sum(r["count"] for r in report.values())
+    report["TOTAL"] = {"count": total, "rps": total / window,
+                       "errors": sum(errors.values()), "client_errors": sum(client_errors.values())}
+    return report
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<32} {'n':>7} {'5xx':>5} {'4xx':>5} {'rps':>8} "
+          f"{'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}   (ms)")
+    for name, r in report.items():
+        if name == "TOTAL":
+            continue
+        print(f"{name:<32} {r['count']:>7} {r['errors']:>5} {r['client_errors']:>5} {r['rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+    t = report["TOTAL"]
+    print(f"{'TOTAL':<32} {t['count']:>7} {t['errors']:>5} {t['client_errors']:>5} {t['rps']:>8.1f}")
+
+
+def compare(report, baseline, threshold):
+    """Print deltas vs a baseline run. Returns the list of regressions."""
+    regressions = []
+    print(f"\nvs baseline (threshold {threshold:.0f}%):")
+    for name, r in report.items():
+        base = baseline.get(name)
+        if not base or name == "TOTAL":
+            continue
+        p99_delta = (r["p99_ms"] - base["p99_ms"]) / base["p99_ms"] * 100 if base["p99_ms"] else 0.0
+        rps_delta = (r["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        flag = ""
+        if p99_delta > threshold or rps_delta < -threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<32} p99 {p99_delta:+6.1f}%   rps {rps_delta:+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    if args.url:
+        if not args.database_url or not args.secret_key:
+            raise SystemExit("--url needs --database-url (to find/seed data) and --secret-key")
+        base, server = args.url.rstrip("/"), None
+        secret = args.secret_key
+    else:
+        configure_environment(args)
+        base, server = boot_server()
+        from routes.auth import SECRET_KEY as secret
+
+    if args.no_seed:
+        user_ids, item_ids = existing_ids(args.database_url)
+    else:
+        started = time.monotonic()
+        user_ids, item_ids = seed(args.database_url, args.users, args.items, args.claims, rng)
+        print(f"Seeded {len(user_ids)} users, {len(item_ids)} items, {args.claims} claims "
+              f"in {time.monotonic() - started:.1f}s")
+    if not user_ids or not item_ids:
+        raise SystemExit("No users/items to drive load with")
+
+    ctx = {
+        "base": base,
+        "user_ids": user_ids,
+        "item_ids": item_ids,
+        "tokens": {uid: make_token(uid, secret) for uid in user_ids},
+        "jpeg": sample_jpeg(),
+    }
+
+    print(f"Driving {base} with {args.concurrency} workers for {args.duration:.0f}s "
+          f"(+{args.warmup:.0f}s warmup), mix: {args.mix}")
+    results = []
+    now = time.monotonic()
+    record_after = now + args.warmup
+    stop_at = record_after + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(ctx, mix, stop_at, record_after, results, args.seed + i))
+        for i in range(args.concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if server:
+        server.shutdown()
+
+    report = summarize(results, args.duration)
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "report": report}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["report"]
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
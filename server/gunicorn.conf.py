@@ -0,0 +1,101 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+ASGI mode (async AI endpoints, see asgi.py) with the same process management:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+
+Every default can be overridden from the environment. To re-tune for a
+host, run the load test against each candidate setting and compare:
+
+    python -m bench.load_test --url http://127.0.0.1:5001 \
+        --database-url $DATABASE_URL --secret-key $SECRET_KEY --out run.json
+
+Measured on a 1-vCPU container (load generator on the same core), SQLite,
+fake AI/storage/push at 800/300/50 ms, default mix, 16 clients, 30 s runs
+(60 s where two rows are given). p50/p99 in ms:
+
+    workers x threads   RPS         feed p50/p99            detail p50/p99        upload p50/p99
+    1 x 8               48 / 52     160/1084,  128/2152     144/2053, 117/1580    2260/3003, 2208/4824
+    2 x 8 (default)     44 / 50     233/925,   171/842      68/316,   77/529      2806/4261, 2650/4132
+    2 x 4               42          169/1620                127/1572              2260/2957
+    2 x 16              47          174/871                 52/354                2974/4976
+    4 x 2               50          76/2499                 38/2412               2293/4060
+    4 x 8               34          383/1284                70/357                3350/5038
+
+Throughput is CPU-bound and within noise for 1-2 processes; what separates
+the settings is tail latency. Two processes x 8 threads keep the read p99
+under ~1 s while 2-5 s uploads are in flight. With fewer threads, reads
+queue behind uploads (2 x 4, 4 x 2). A single process has one GIL and
+doubles the read p99. More processes than cores (4 x 8) lose throughput.
+With recycling off, worker RSS stayed between 125 and 220 MB over 120 s
+(about 2,700 requests per worker) without trending up. Each recycle at the
+old max_requests=1000 reset about 3 keep-alive client connections (8-9
+client errors per 60 s run, 0 with recycling off).
+"""
+import multiprocessing
+import os
+
+
+def _int(name, default):
+    return int(os.getenv(name, default))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# --- Workers ---
+# Requests mostly wait on OpenAI/Gemini/Cloudinary and the DB, and the CPU
+# parts (Pillow, NumPy scoring) release the GIL. So: one process per core for
+# the CPU work plus threads to overlap the waiting. Threads of one process
+# share the pooled HTTP clients, response cache and match-engine index;
+# extra processes would each rebuild them.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = _int("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count()))
+threads = _int("GUNICORN_THREADS", 8)
+
+# Workers must share the response cache, or a write invalidates only the
+# worker that handled it (read by services/cache.py when the app loads)
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+
+# Import the app (Flask, SDKs, NumPy, taxonomy tables) once in the master and
+# fork: workers share those pages copy-on-write, boot instantly, and the
+# create_all/migrations step runs once instead of racing in every worker.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# --- Recycling ---
+# Restart a worker after this many requests (jittered so they don't all
+# restart together) as a backstop against slow growth from image buffers and
+# caches. RSS was flat under load (see above) and every restart drops a few
+# keep-alive connections, so keep it rare.
+max_requests = _int("GUNICORN_MAX_REQUESTS", 5000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 500)
+
+# --- Timeouts ---
+# `timeout` kills a worker that stops heart-beating. With gthread the beat
+# comes from the main thread, so it is not a per-request cap (the LLM gateway
+# deadlines are), but a sync worker stuck on an upload+analyze+verify chain
+# needs well over the 30s default. (The benchmark's slowest upload took
+# 5.7 s on fake backends; real model round trips are what this is sized for.)
+timeout = _int("GUNICORN_TIMEOUT", 90)
+# On reload/shutdown, let in-flight AI calls finish
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+# Behind a load balancer / Vercel-style proxy that reuses connections
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+# Heartbeat files on tmpfs: a disk-backed /tmp can stall workers in containers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None  # e.g. "-" for stdout
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the preloading master (never share sockets across forks)."""
+    from app import app
+    from models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
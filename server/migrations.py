@@ -0,0 +1,220 @@
+import logging
+from datetime import datetime
+from sqlalchemy import bindparam, func, insert, inspect, literal, select, text, update
+from models import db, DataVersion, DeviceToken, Item, User
+from ai_models.taxonomy import normalize_tags, taxonomy_version
+from services.locations import gazetteer_version, zone_for
+
+log = logging.getLogger(__name__)
+
+# --- In-place Schema Upgrades ---
+# db.create_all() only creates missing tables; it never alters existing ones.
+# Each step below is idempotent (it inspects the live schema first), so the
+# whole list runs safely on every cold start, same as create_all.
+# Derived columns (normalized tags, zones) also record the version of the
+# rules they were computed with and are recomputed when it changes.
+
+
+def _column_type(conn, table, column):
+    for col in inspect(conn).get_columns(table):
+        if col["name"] == column:
+            return str(col["type"]).upper()
+    return None
+
+
+def distinctive_features_to_json(conn):
+    """Item.distinctive_features: JSON-encoded Text -> JSONB (Postgres) / JSON (SQLite)."""
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql":
+        if _column_type(conn, "item", "distinctive_features") != "JSONB":
+            conn.execute(
+                text(
+                    "UPDATE item SET distinctive_features = '[]' "
+                    "WHERE distinctive_features IS NULL OR btrim(distinctive_features) = ''"
+                )
+            )
+            conn.execute(
+                text(
+                    "ALTER TABLE item ALTER COLUMN distinctive_features "
+                    "TYPE JSONB USING distinctive_features::jsonb"
+                )
+            )
+            log.info("Migrated item.distinctive_features to JSONB")
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_item_distinctive_features "
+                "ON item USING GIN (distinctive_features)"
+            )
+        )
+    else:
+        # SQLite stores JSON as text already; only blank/garbage rows need fixing
+        # so the JSON type can decode every row.
+        conn.execute(
+            text(
+                "UPDATE item SET distinctive_features = '[]' "
+                "WHERE distinctive_features IS NULL OR distinctive_features = '' "
+                "OR json_valid(distinctive_features) = 0"
+            )
+        )
+
+
+def device_tokens_from_user_column(conn):
+    """Copy legacy User.fcm_token values into the DeviceToken registry."""
+    now = datetime.utcnow()
+    legacy = (
+        select(
+            func.max(User.id),
+            User.fcm_token,
+            literal(now, db.DateTime),
+            literal(now, db.DateTime),
+        )
+        .where(
+            User.fcm_token.isnot(None),
+            User.fcm_token != "",
+            User.fcm_token.notin_(select(DeviceToken.token)),
+        )
+        .group_by(User.fcm_token)
+    )
+    result = conn.execute(
+        insert(DeviceToken.__table__).from_select(
+            ["user_id", "token", "created_at", "last_seen_at"], legacy
+        )
+    )
+    if result.rowcount:
+        log.info("Migrated %d legacy FCM token(s) to device_token", result.rowcount)
+
+
+def data_version(conn, name):
+    """Stored DataVersion of a derived column, None if never recorded."""
+    return conn.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar()
+
+
+def set_data_version(conn, name, version):
+    table = DataVersion.__table__
+    conn.execute(table.delete().where(table.c.name == name))
+    conn.execute(
+        table.insert().values(name=name, version=version, updated_at=datetime.utcnow())
+    )
+
+
+TAXONOMY_COLUMNS = {
+    "category_code": "SMALLINT",
+    "color_code": "SMALLINT",
+    "brand_key": "VARCHAR(50)",
+}
+
+
+def normalize_item_tags(conn, batch_size=500):
+    """Recompute category_code / color_code / brand_key from the raw AI tags."""
+    stmt = (
+        update(Item.__table__)
+        .where(Item.__table__.c.id == bindparam("item_id"))
+        .values(
+            category_code=bindparam("category_code"),
+            color_code=bindparam("color_code"),
+            brand_key=bindparam("brand_key"),
+        )
+    )
+    updated, last_id = 0, 0
+    while True:
+        rows = conn.execute(
+            select(Item.id, Item.category, Item.color, Item.brand)
+            .where(Item.id > last_id)
+            .order_by(Item.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        conn.execute(
+            stmt,
+            [
+                dict(normalize_tags(row.category, row.color, row.brand), item_id=row.id)
+                for row in rows
+            ],
+        )
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+def item_taxonomy_columns(conn):
+    """Add the normalized tag columns to Item; backfill them whenever the taxonomy changes."""
+    existing = {col["name"] for col in inspect(conn).get_columns("item")}
+    missing = [name for name in TAXONOMY_COLUMNS if name not in existing]
+    for name in missing:
+        conn.execute(text(f"ALTER TABLE item ADD COLUMN {name} {TAXONOMY_COLUMNS[name]}"))
+        log.info("Added %s to item", name)
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_item_category_code ON item (category_code)")
+    )
+    version = taxonomy_version()
+    if missing or data_version(conn, "item_tags") != version:
+        count = normalize_item_tags(conn)
+        set_data_version(conn, "item_tags", version)
+        log.info(
+            "Normalized tags of %d item(s) with taxonomy %s "
+            "(run scripts.rebuild_matches to rescore suggestions)",
+            count,
+            version,
+        )
+
+
+def assign_item_zones(conn, batch_size=500):
+    """Recompute Item.zone_id from the free-text location."""
+    stmt = (
+        update(Item.__table__)
+        .where(Item.__table__.c.id == bindparam("item_id"))
+        .values(zone_id=bindparam("zone_id"))
+    )
+    updated, last_id = 0, 0
+    while True:
+        rows = conn.execute(
+            select(Item.id, Item.location)
+            .where(Item.id > last_id)
+            .order_by(Item.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        conn.execute(
+            stmt, [{"item_id": row.id, "zone_id": zone_for(row.location)} for row in rows]
+        )
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+def item_zone_column(conn):
+    """Add Item.zone_id; place existing items again whenever the gazetteer changes."""
+    existing = {col["name"] for col in inspect(conn).get_columns("item")}
+    if "zone_id" not in existing:
+        conn.execute(text("ALTER TABLE item ADD COLUMN zone_id SMALLINT"))
+        log.info("Added zone_id to item")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_item_zone_id ON item (zone_id)"))
+    version = gazetteer_version()
+    if "zone_id" not in existing or data_version(conn, "item_zones") != version:
+        count = assign_item_zones(conn)
+        set_data_version(conn, "item_zones", version)
+        log.info(
+            "Placed %d item(s) with gazetteer %s "
+            "(run scripts.rebuild_matches to rescore suggestions)",
+            count,
+            version,
+        )
+
+
+MIGRATIONS = [
+    distinctive_features_to_json,
+    device_tokens_from_user_column,
+    item_taxonomy_columns,
+    item_zone_column,
+]
+
+
+def run_migrations():
+    """Apply every step in order, each in its own transaction."""
+    for step in MIGRATIONS:
+        try:
+            with db.engine.begin() as conn:
+                step(conn)
+        except Exception as e:
+            log.critical("Migration '%s' failed: %s", step.__name__, e)
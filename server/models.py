@@ -1,8 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime, timedelta
+import base64
+import binascii
 
 db = SQLAlchemy()
 
+# Native JSON column: JSONB on Postgres (GIN-indexable), JSON (text) on SQLite
+JSONList = db.JSON().with_variant(JSONB(), "postgresql")
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -19,20 +26,46 @@ class User(db.Model):
     bio = db.Column(db.Text, nullable=True)
     profile_photo = db.Column(db.String(500), nullable=True)
     read_notifications = db.Column(db.Text, default='[]') # JSON list of read notification IDs
-    fcm_token = db.Column(db.Text, nullable=True) # Firebase Cloud Messaging Token
+    fcm_token = db.Column(db.Text, nullable=True) # Legacy single FCM token (superseded by DeviceToken)
     
     # Gamification
     trust_score = db.Column(db.Integer, default=0) # +10 for returning item, etc.
 
+class DeviceToken(db.Model):
+    """An FCM registration token for one browser/device. Users can have many."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    token = db.Column(db.String(500), unique=True, nullable=False)
+    user_agent = db.Column(db.String(300), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    # FCM treats tokens idle for ~2 months as stale; so do we
+    TTL = timedelta(days=60)
+
+    @classmethod
+    def active_tokens(cls, user_id):
+        cutoff = datetime.utcnow() - cls.TTL
+        rows = (
+            db.session.query(cls.token)
+            .filter(cls.user_id == user_id, cls.last_seen_at >= cutoff)
+            .all()
+        )
+        return [row.token for row in rows]
+
+
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     type = db.Column(db.String(20), nullable=False) # 'lost' or 'found'
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(200), nullable=False)
+    zone_id = db.Column(db.SmallInteger, nullable=True, index=True) # Campus zone (services/locations.py); NULL = unplaced
     date_lost = db.Column(db.DateTime, default=datetime.utcnow)
     image_url = db.Column(db.String(500), nullable=True) # Legacy/Backup
-    image_data = db.Column(db.Text, nullable=True) # Base64 Data URI (Vercel persistence)
+    # Image URL: Cloudinary or /api/items/images/<id> (legacy rows: Base64 Data URI until
+    # backfilled). Deferred like Claim.proof_image_data; list queries select it explicitly.
+    image_data = db.deferred(db.Column(db.Text, nullable=True))
     status = db.Column(db.String(20), default='unresolved') # unresolved, matched, claimed
     
     # Founder contact info (if type='found')
@@ -45,7 +78,12 @@ class Item(db.Model):
     category = db.Column(db.String(50), nullable=True)
     color = db.Column(db.String(50), nullable=True)
     brand = db.Column(db.String(50), nullable=True)
-    distinctive_features = db.Column(db.Text, nullable=True) # JSON string of unique features
+    distinctive_features = db.Column(JSONList, nullable=True, default=list) # List of unique features
+
+    # Normalized tags (ai_models/taxonomy.py), set at write time; matching compares these
+    category_code = db.Column(db.SmallInteger, nullable=True, index=True)
+    color_code = db.Column(db.SmallInteger, nullable=True)
+    brand_key = db.Column(db.String(50), nullable=True)
 
     # Verification Question (generated by AI for Found items)
     verification_question = db.Column(db.String(500), nullable=True)
@@ -55,6 +93,21 @@ class Item(db.Model):
     # Relationships
     claims = db.relationship('Claim', backref='item', lazy=True)
 
+    __table_args__ = (
+        # Feature-tag lookups (@> containment). Postgres only; see migrations.py
+        db.Index(
+            'ix_item_distinctive_features', 'distinctive_features', postgresql_using='gin'
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    @classmethod
+    def has_feature(cls, tag):
+        """SQL clause: distinctive_features contains this exact tag."""
+        if db.engine.dialect.name == 'postgresql':
+            return type_coerce(cls.distinctive_features, JSONB).contains([tag])
+        values = func.json_each(cls.distinctive_features).table_valued('value')
+        return select(values.c.value).where(values.c.value == tag).exists()
+
 class Claim(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
@@ -63,7 +116,8 @@ class Claim(db.Model):
     # Claim Details
     message = db.Column(db.Text, nullable=True) # Message from claimant
     proof_image = db.Column(db.String(500), nullable=True) # Optional proof
-    proof_image_data = db.Column(db.Text, nullable=True) # Base64 Data URI (Vercel persistence)
+    # Legacy Base64 Data URI; payloads now live in ItemImage (see scripts/backfill_images.py)
+    proof_image_data = db.deferred(db.Column(db.Text, nullable=True))
     
     # Status
     status = db.Column(db.String(20), default='pending') # pending, accepted, rejected, handed_over
@@ -77,3 +131,95 @@ class Claim(db.Model):
     qr_code = db.Column(db.String(500), nullable=True) # Unique string/token for QR
     
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ItemImage(db.Model):
+    """
+    Image payloads stored outside the item/claim rows.
+    Items and claims only keep a short URL (/api/items/images/<id>), so feed
+    scans never drag Base64 blobs through the DB connection.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=True, index=True)
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=True, index=True)
+    mime_type = db.Column(db.String(50), nullable=False, default='image/jpeg')
+    size = db.Column(db.Integer, nullable=False, default=0)
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    URL_PREFIX = '/api/items/images/'
+
+    @property
+    def url(self):
+        return f"{self.URL_PREFIX}{self.id}"
+
+    @classmethod
+    def id_from_url(cls, url):
+        """Image ID for a /api/items/images/<id> reference, else None."""
+        if not url or not url.startswith(cls.URL_PREFIX):
+            return None
+        tail = url[len(cls.URL_PREFIX):]
+        return int(tail) if tail.isdigit() else None
+
+    @classmethod
+    def from_data_uri(cls, data_uri, **kwargs):
+        """Decode a 'data:<mime>;base64,<payload>' string. Returns None if malformed."""
+        try:
+            header, payload = data_uri.split(',', 1)
+            mime_type = header[len('data:'):].split(';')[0] or 'image/jpeg'
+            raw = base64.b64decode(payload, validate=True)
+        except (ValueError, binascii.Error):
+            return None
+        return cls(mime_type=mime_type, data=raw, size=len(raw), **kwargs)
+
+
+class MatchSuggestion(db.Model):
+    """
+    Pre-computed tag match between a lost and a found item.
+    Stored in both directions so each side reads its list with one index scan.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False, index=True)
+    score = db.Column(db.Integer, nullable=False)
+    reasoning = db.Column(db.String(300), nullable=True)
+    notified = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('item_id', 'candidate_id', name='uq_match_pair'),
+        db.Index('ix_match_item_score', 'item_id', 'score'),
+    )
+
+
+class DataVersion(db.Model):
+    """
+    Version of the rules a derived column was last computed with (e.g. the
+    tag taxonomy behind Item.category_code). migrations.py recomputes the
+    column when the running code's version differs.
+    """
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.String(64), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdempotencyRecord(db.Model):
+    """
+    Outcome of a mutating request sent with an `Idempotency-Key` header, per
+    user and endpoint. Pending while the first attempt runs (status_code NULL),
+    then holds the stored response until expires_at. See services/idempotency.py.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    scope = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response = db.Column(db.Text, nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'scope', 'key', name='uq_idempotency_key'),
+    )
@@ -3,11 +3,14 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 import datetime
 from models import db, User
+import logging
 import os
 import re
 from functools import wraps
+from services.cache import cached_response, invalidate
 
 auth_bp = Blueprint('auth', __name__)
+log = logging.getLogger(__name__)
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key_change_me')
 
@@ -26,17 +29,27 @@ def token_required(f):
             if not current_user:
                 return jsonify({'message': 'User not found!'}), 401
         except jwt.ExpiredSignatureError:
-            print("DEBUG: Token Expired")
+            log.debug("Token expired")
             return jsonify({'message': 'Token has expired!'}), 401
         except jwt.InvalidTokenError as e:
-            print(f"DEBUG: Invalid Token Error: {e}")
+            log.debug("Invalid token: %s", e)
             return jsonify({'message': 'Token is invalid!'}), 401
         except Exception as e:
-            print(f"DEBUG: Token Auth Error: {e}")
+            log.warning("Token auth error: %s", e)
             return jsonify({'message': 'Token is invalid!'}), 401
         return f(current_user, *args, **kwargs)
     return decorated
 
+
+def token_user_id(auth_header):
+    """user_id from an 'Authorization: Bearer <jwt>' header, None if missing/invalid (no DB hit)."""
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return jwt.decode(auth_header.split(' ')[1], SECRET_KEY, algorithms=["HS256"])['user_id']
+    except Exception:
+        return None
+
 # --- Routes ---
 
 @auth_bp.route('/register', methods=['POST'])
@@ -83,7 +96,7 @@ def register():
         
         return jsonify({"message": "User created successfully"}), 201
     except Exception as e:
-        print(f"CRITICAL REGISTER ERROR: {e}")
+        log.exception("Register error: %s", e)
         return jsonify({"message": f"Server Error: {str(e)}"}), 500
 
 @auth_bp.route('/login', methods=['POST'])
@@ -186,6 +199,8 @@ def update_profile(current_user):
         current_user.profile_photo = data['profile_photo']
         
     db.session.commit()
+    # Name/photo appear on item detail pages and the leaderboard
+    invalidate("items", "leaderboard")
     
     return jsonify({
         "message": "Profile updated",
@@ -202,6 +217,7 @@ def update_profile(current_user):
     }), 200
 
 @auth_bp.route('/leaderboard', methods=['GET'])
+@cached_response("leaderboard")
 def get_leaderboard():
     """
     Get top 5 trusted users based on 'trust_score'.
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 import firebase_admin
 import json
+import logging
 from firebase_admin import credentials, auth
 from models import db, User
 import os
@@ -9,6 +10,7 @@ import datetime
 from routes.auth import SECRET_KEY
 
 auth_google_bp = Blueprint('auth_google', __name__)
+log = logging.getLogger(__name__)
 
 # Initialize Firebase Admin
 # We check if it's already initialized to avoid errors during reloads/hot-restarts
@@ -24,9 +26,9 @@ if not firebase_admin._apps:
             # Parse the JSON string from env var
             key_dict = json.loads(firebase_json)
             cred = credentials.Certificate(key_dict)
-            print("DEBUG: Loaded Firebase Credentials from Environment Variable")
+            log.debug("Loaded Firebase credentials from environment variable")
         except Exception as e:
-            print(f"ERROR: Failed to parse FIREBASE_SERVICE_ACCOUNT_JSON: {e}")
+            log.error("Failed to parse FIREBASE_SERVICE_ACCOUNT_JSON: %s", e)
 
     # STRATEGY 2: File Path (Local Development)
     if not cred:
@@ -39,9 +41,9 @@ if not firebase_admin._apps:
         if cred_path and os.path.exists(cred_path):
             try:
                 cred = credentials.Certificate(cred_path)
-                print(f"DEBUG: Loaded Firebase Credentials from file at {cred_path}")
+                log.debug("Loaded Firebase credentials from file at %s", cred_path)
             except Exception as e:
-                print(f"ERROR: Failed to load Firebase Cert file: {e}")
+                log.error("Failed to load Firebase cert file: %s", e)
 
     # Initialize App
     try:
@@ -49,15 +51,15 @@ if not firebase_admin._apps:
             firebase_admin.initialize_app(cred, {
                 'storageBucket': os.getenv('FIREBASE_STORAGE_BUCKET')
             })
-            print("DEBUG: Firebase Admin Initialized successfully")
+            log.info("Firebase Admin initialized")
         else:
-            print("WARNING: No Firebase Credentials found. Google Auth may fail locally.")
+            log.warning("No Firebase credentials found. Google Auth may fail locally.")
             # Fallback for Google Cloud environments (rarely used here but good practice)
             firebase_admin.initialize_app(None, {
                 'storageBucket': os.getenv('FIREBASE_STORAGE_BUCKET')
             }) 
     except Exception as e:
-        print(f"DEBUG: Firebase Init failed: {e}")
+        log.warning("Firebase init failed: %s", e)
 
 @auth_google_bp.route('/google', methods=['POST'])
 def google_login():
@@ -118,7 +120,5 @@ def google_login():
         }), 200
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"Google Auth Error: {e}")
+        log.exception("Google auth error: %s", e)
         return jsonify({"error": f"Google Auth Failed: {str(e)}"}), 401
@@ -1,14 +1,22 @@
 from flask import Blueprint, request, jsonify
-from models import db, Claim, Item, User
+from models import db, Claim, DeviceToken, Item
 from routes.auth import token_required
+from services.cache import invalidate
+from services.idempotency import idempotent
+from services.match_engine import pool_remove
+from services.matching import prune_item
+from services.notifications import excerpt, notify_user
 from datetime import datetime
 import json
+import logging
 
 claims_bp = Blueprint("claims", __name__)
+log = logging.getLogger(__name__)
 
 
 @claims_bp.route("/", methods=["POST"])
 @token_required
+@idempotent("create_claim")
 def create_claim(current_user):
     """
     Submit a claim for an item.
@@ -38,25 +46,13 @@ def create_claim(current_user):
     db.session.add(claim)
     db.session.commit()
 
-    # Notify Item Owner (Finder) via Firebase
-    try:
-        from firebase_admin import messaging
-
-        owner = User.query.get(item.user_id)
-        if owner and owner.fcm_token:
-            msg = messaging.Message(
-                notification=messaging.Notification(
-                    title="New Claim Request",
-                    body=f"Someone claimed your found item: {item.description}",
-                ),
-                token=owner.fcm_token,
-                data={"click_action": f"/item/{item.id}"},
-            )
-            response = messaging.send(msg)
-            print(f"DEBUG: Sent FCM to Owner: {response}")
-    except Exception as e:
-        # Don't fail the request if notification fails
-        print(f"WARNING: FCM Send Failed: {e}")
+    # Notify Item Owner (Finder) via Firebase (queued, sent off the request thread)
+    notify_user(
+        item.user_id,
+        title="New Claim Request",
+        body=f"Someone claimed your found item: {excerpt(item.description)}",
+        data={"click_action": f"/item/{item.id}"},
+    )
 
     return (
         jsonify({"message": "Claim submitted successfully", "claim_id": claim.id}),
@@ -156,23 +152,14 @@ def respond_to_claim(current_user, claim_id):
         claim.status = "rejected"
         claim.response_message = response_msg
         db.session.commit()
+        invalidate("items")
 
         # Notify Claimant
-        try:
-            from firebase_admin import messaging
-
-            claimant = User.query.get(claim.claimant_id)
-            if claimant and claimant.fcm_token:
-                msg = messaging.Message(
-                    notification=messaging.Notification(
-                        title="Claim Rejected ❌",
-                        body=f"Your claim for '{item.description}' was rejected.",
-                    ),
-                    token=claimant.fcm_token,
-                )
-                messaging.send(msg)
-        except Exception as e:
-            print(f"WARNING: FCM Send Failed: {e}")
+        notify_user(
+            claim.claimant_id,
+            title="Claim Rejected ❌",
+            body=f"Your claim for '{excerpt(item.description)}' was rejected.",
+        )
 
         return jsonify({"message": "Claim rejected"}), 200
 
@@ -206,24 +193,15 @@ def respond_to_claim(current_user, claim_id):
         claim.qr_code = code
 
         db.session.commit()
+        invalidate("items")
 
         # Notify Claimant
-        try:
-            from firebase_admin import messaging
-
-            claimant = User.query.get(claim.claimant_id)
-            if claimant and claimant.fcm_token:
-                msg = messaging.Message(
-                    notification=messaging.Notification(
-                        title="Claim Accepted! ✅",
-                        body=f"Your claim for '{item.description}' was accepted. Check details!",
-                    ),
-                    token=claimant.fcm_token,
-                    data={"click_action": f"/item/{item.id}"},
-                )
-                messaging.send(msg)
-        except Exception as e:
-            print(f"WARNING: FCM Send Failed: {e}")
+        notify_user(
+            claim.claimant_id,
+            title="Claim Accepted! ✅",
+            body=f"Your claim for '{excerpt(item.description)}' was accepted. Check details!",
+            data={"click_action": f"/item/{item.id}"},
+        )
 
         return (
             jsonify({"message": "Claim accepted. Code generated.", "qr_token": code}),
@@ -273,6 +251,7 @@ def verify_claim_qr(current_user):
         # 1. Update Statuses
         claim.status = "completed"
         item.status = "claimed"  # This hides it from main feeds
+        prune_item(item.id)  # No longer a match candidate for anyone
 
         # 2. Award Points (Gamification) - ALWAYS TO THE FINDER
         points_awarded = 10
@@ -293,6 +272,10 @@ def verify_claim_qr(current_user):
             recipient_name = "You"
 
         db.session.commit()
+        pool_remove(item.id)
+
+        # Item left the public feed and someone's trust score changed
+        invalidate("items", "leaderboard")
 
         return (
             jsonify(
@@ -308,7 +291,7 @@ def verify_claim_qr(current_user):
         )
 
     except Exception as e:
-        print(f"Verification Error: {e}")
+        log.exception("Verification error: %s", e)
         return jsonify({"error": "Verification failed"}), 500
 
 
@@ -316,7 +299,8 @@ def verify_claim_qr(current_user):
 @token_required
 def save_fcm_token(current_user):
     """
-    Save the user's FCM token for push notifications.
+    Register (or refresh) this device's FCM token for push notifications.
+    Each browser/device keeps its own token; re-posting bumps last_seen_at.
     """
     data = request.get_json()
     token = data.get("token")
@@ -324,12 +308,49 @@ def save_fcm_token(current_user):
     if not token:
         return jsonify({"error": "Token required"}), 400
 
-    current_user.fcm_token = token
+    now = datetime.utcnow()
+    device = DeviceToken.query.filter_by(token=token).first()
+    if device:
+        # Same browser may now be signed in as someone else
+        device.user_id = current_user.id
+        device.last_seen_at = now
+    else:
+        device = DeviceToken(
+            user_id=current_user.id,
+            token=token,
+            user_agent=(request.headers.get("User-Agent") or "")[:300],
+            created_at=now,
+            last_seen_at=now,
+        )
+        db.session.add(device)
+
+    # Automatic expiry: drop devices that haven't checked in for a while
+    DeviceToken.query.filter(DeviceToken.last_seen_at < now - DeviceToken.TTL).delete(
+        synchronize_session=False
+    )
     db.session.commit()
 
     return jsonify({"message": "Token saved"}), 200
 
 
+@claims_bp.route("/notifications/token", methods=["DELETE"])
+@token_required
+def delete_fcm_token(current_user):
+    """
+    Unregister a device token (e.g. on logout).
+    """
+    data = request.get_json(silent=True) or {}
+    token = data.get("token")
+
+    if not token:
+        return jsonify({"error": "Token required"}), 400
+
+    DeviceToken.query.filter_by(token=token, user_id=current_user.id).delete()
+    db.session.commit()
+
+    return jsonify({"message": "Token removed"}), 200
+
+
 @claims_bp.route("/notifications/read", methods=["POST"])
 @token_required
 def mark_notification_read(current_user):
@@ -1,42 +1,219 @@
+import asyncio
+import logging
 import os
-import google.generativeai as genai
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from flask import Blueprint, request, jsonify
+from ai_models.llm_gateway import RateLimitError, get_gateway
+from routes.auth import token_required
+from services.cache import LRUCache
+from services.ratelimit import rate_limited
+from services import metrics
 
 gemini_bp = Blueprint('gemini_bp', __name__)
+log = logging.getLogger(__name__)
 
-def get_gemini_model():
+# List of models to try in order of preference.
+# We fallback to older/experimental models if the primary (2.0-flash) is rate-limited.
+CANDIDATE_MODELS = [
+    'gemini-2.0-flash',        # Primary (Fastest, Smartest)
+    'gemini-2.0-flash-exp',    # Fallback 1
+    'gemini-2.5-flash',        # Fallback 2 (Newer, might have different quota)
+    'gemini-2.0-flash-lite',   # Fallback 3 (Lighter, higher limits)
+]
+
+# Circuit breaker: a model that just returned 429 is skipped for this long
+COOLDOWN_SECONDS = int(os.getenv('GEMINI_COOLDOWN_SECONDS', '60'))
+
+# Drafts are generic per (item type, description), so identical asks reuse them
+DRAFT_CACHE_TTL = int(os.getenv('GEMINI_DRAFT_CACHE_TTL', '900'))
+
+# Hedged mode (GEMINI_HEDGE=1): if the current model hasn't answered after its
+# observed p90 latency, fire the next candidate too; first success wins.
+HEDGE_ENABLED = os.getenv('GEMINI_HEDGE') == '1'
+HEDGE_QUANTILE = float(os.getenv('GEMINI_HEDGE_QUANTILE', '0.9'))
+HEDGE_DEFAULT_DELAY = float(os.getenv('GEMINI_HEDGE_DELAY', '2.0'))  # seconds, until we have samples
+REQUEST_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '20'))
+
+_cooldowns = {}  # model name -> timestamp when it may be tried again
+_drafts = LRUCache(max_entries=512)
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini-hedge')
+
+
+def _available_models():
+    """Candidates whose circuit is closed (not recently rate-limited)."""
+    now = time.time()
+    return [m for m in CANDIDATE_MODELS if _cooldowns.get(m, 0) <= now]
+
+
+def _trip(model_name):
+    _cooldowns[model_name] = time.time() + COOLDOWN_SECONDS
+    log.warning("Model '%s' rate-limited, skipping it for %ss", model_name, COOLDOWN_SECONDS)
+
+
+def _draft_key(item_type, item_desc):
+    return (item_type, " ".join(str(item_desc).lower().split()))
+
+
+def _generate(model_name, prompt):
+    """One model call. Records latency of successful calls per model."""
+    started = time.perf_counter()
+    text = get_gateway().generate_text(
+        model_name, prompt, deadline=REQUEST_TIMEOUT, purpose="draft"
+    )
+    metrics.observe("gemini_model_seconds", time.perf_counter() - started, model=model_name)
+    if not text:
+        raise RuntimeError(f"Empty response from '{model_name}'")
+    return text
+
+
+async def _generate_async(model_name, prompt):
+    started = time.perf_counter()
+    text = await get_gateway().generate_text_async(
+        model_name, prompt, deadline=REQUEST_TIMEOUT, purpose="draft"
+    )
+    metrics.observe("gemini_model_seconds", time.perf_counter() - started, model=model_name)
+    if not text:
+        raise RuntimeError(f"Empty response from '{model_name}'")
+    return text
+
+
+def _record_failure(model_name, error):
+    log.warning("Model '%s' failed: %s", model_name, error)
+    if isinstance(error, RateLimitError):
+        _trip(model_name)
+
+
+def _draft_sequential(prompt, candidate_models):
+    """Try each model in turn. Returns (model_name, text, last_error)."""
+    last_error = None
+    for model_name in candidate_models:
+        try:
+            log.debug("Trying model '%s'", model_name)
+            return model_name, _generate(model_name, prompt), None
+        except Exception as e:
+            _record_failure(model_name, e)
+            last_error = e
+            # Continue to next model
+    return None, None, last_error
+
+
+async def _draft_sequential_async(prompt, candidate_models):
+    last_error = None
+    for model_name in candidate_models:
+        try:
+            return model_name, await _generate_async(model_name, prompt), None
+        except Exception as e:
+            _record_failure(model_name, e)
+            last_error = e
+    return None, None, last_error
+
+
+def _hedge_delay(model_name):
+    return metrics.histogram("gemini_model_seconds", model=model_name).quantile(
+        HEDGE_QUANTILE, default=HEDGE_DEFAULT_DELAY
+    )
+
+
+def _draft_hedged(prompt, candidate_models):
     """
-    Lazy initialization of Gemini client.
-    Checks multiple env vars for robustness.
+    Race the candidates. The next model is launched when the latest one is
+    slower than its own p90 (or fails); the first success wins.
+    Losers that haven't started are cancelled; in-flight ones are abandoned
+    (their result is ignored and REQUEST_TIMEOUT bounds them).
     """
-    # Try common names for the key
-    api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-    
-    if not api_key:
-        print("CRITICAL: No Gemini/Google API Key found in environment variables.")
-        return None, "Server configuration error: Missing API Key"
+    remaining = list(candidate_models)
+    in_flight = {}
+    last_error = None
+
+    def launch():
+        name = remaining.pop(0)
+        log.debug("Hedging with model '%s'", name)
+        in_flight[_hedge_pool.submit(_generate, name, prompt)] = name
+        return name
+
+    newest = launch()
+    while in_flight:
+        timeout = _hedge_delay(newest) if remaining else None
+        done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            # Newest model is slow -> add the next candidate to the race
+            newest = launch()
+            continue
+
+        failed = False
+        for future in done:
+            model_name = in_flight.pop(future)
+            try:
+                text = future.result()
+            except Exception as e:
+                _record_failure(model_name, e)
+                last_error = e
+                failed = True
+                continue
+            for loser in in_flight:
+                loser.cancel()
+            return model_name, text, None
 
+        # A racer failed: replace it right away instead of waiting out the delay
+        if failed and remaining:
+            newest = launch()
+
+    return None, None, last_error
+
+
+async def _draft_hedged_async(prompt, candidate_models):
+    """_draft_hedged on the event loop; losers are really cancelled."""
+    remaining = list(candidate_models)
+    in_flight = {}
+    last_error = None
+
+    def launch():
+        name = remaining.pop(0)
+        log.debug("Hedging with model '%s'", name)
+        in_flight[asyncio.ensure_future(_generate_async(name, prompt))] = name
+        return name
+
+    newest = launch()
     try:
-        genai.configure(api_key=api_key)
-        # Use 'gemini-2.0-flash' as it is available and supported
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        return model, None
-    except Exception as e:
-        print(f"CRITICAL: Failed to configure Gemini: {e}")
-        return None, f"Configuration failed: {str(e)}"
+        while in_flight:
+            timeout = _hedge_delay(newest) if remaining else None
+            done, _ = await asyncio.wait(
+                in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
 
-@gemini_bp.route('/draft-message', methods=['POST'])
-def draft_message():
-    data = request.get_json()
-    item_type = data.get('item_type', 'item')
-    item_desc = data.get('item_desc', 'this item')
-    
-    # Initialize on request
-    _, error = get_gemini_model() # Just checks key existence
-    if error:
-        return jsonify({"error": error}), 500
+            if not done:
+                newest = launch()
+                continue
+
+            failed = False
+            for task in done:
+                model_name = in_flight.pop(task)
+                try:
+                    text = task.result()
+                except Exception as e:
+                    _record_failure(model_name, e)
+                    last_error = e
+                    failed = True
+                    continue
+                return model_name, text, None
 
-    prompt = ""
+            if failed and remaining:
+                newest = launch()
+    finally:
+        for loser in in_flight:
+            loser.cancel()
+
+    return None, None, last_error
+
+
+# --- Draft Message ---
+# prepare_draft/draft_result are shared with the async handler in asgi.py.
+# Both return (payload, status, headers) for early exits / the final answer.
+
+
+def _draft_prompt(item_type, item_desc):
     if item_type == "found":
         prompt = f"""
         Write a polite, short message to someone who found a "{item_desc}".
@@ -52,40 +229,70 @@ def draft_message():
         Max 2 sentences. No emojis within the text, maybe one at end.
         """
 
-    # List of models to try in order of preference
-    # The user's key seems to have access to advanced/experimental models
-    # List of models to try in order of preference.
-    # We fallback to older/experimental models if the primary (2.0-flash) is rate-limited.
-    candidate_models = [
-        'gemini-2.0-flash',        # Primary (Fastest, Smartest)
-        'gemini-2.0-flash-exp',    # Fallback 1
-        'gemini-2.5-flash',        # Fallback 2 (Newer, might have different quota)
-        'gemini-2.0-flash-lite',   # Fallback 3 (Lighter, higher limits)
-    ]
-    
-    last_error = None
+    return prompt
 
-    print(f"DEBUG: Attempting to draft message for '{item_desc}'")
 
-    for model_name in candidate_models:
-        try:
-            print(f"DEBUG: Trying model '{model_name}'...")
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            
-            if response.text:
-                print(f"DEBUG: Success with '{model_name}'")
-                return jsonify({"message": response.text.strip(), "model_used": model_name})
-                
-        except Exception as e:
-            print(f"WARNING: Model '{model_name}' failed: {e}")
-            last_error = e
-            # Continue to next model
-            continue
+def prepare_draft(data):
+    """
+    Returns (cache_key, prompt, candidate_models, early) where `early` is a
+    ready (payload, status, headers) answer (cache hit, config error, all
+    models cooling down) or None if a model has to be called.
+    """
+    item_type = data.get('item_type', 'item')
+    item_desc = data.get('item_desc', 'this item')
+
+    cache_key = _draft_key(item_type, item_desc)
+    cached = _drafts.get(cache_key)
+    if cached:
+        payload = {"message": cached["message"], "model_used": cached["model_used"], "cached": True}
+        return cache_key, None, None, (payload, 200, {})
+
+    # Initialize on request (no-op after the first call)
+    error = get_gateway().check("gemini") # Just checks key existence
+    if error:
+        return cache_key, None, None, ({"error": error}, 500, {})
+
+    candidate_models = _available_models()
+    if not candidate_models:
+        # Every model is cooling down: answer now instead of burning 4 failed round-trips
+        retry_after = max(1, int(min(_cooldowns.values()) - time.time()))
+        payload = {"error": "Gemini is busy (Rate Limit). Please try again in a minute."}
+        return cache_key, None, None, (payload, 429, {'Retry-After': str(retry_after)})
+
+    return cache_key, _draft_prompt(item_type, item_desc), candidate_models, None
+
+
+def draft_result(cache_key, model_name, message, last_error):
+    if message:
+        log.debug("Draft generated with '%s'", model_name)
+        _drafts.set(cache_key, {"message": message, "model_used": model_name}, ttl=DRAFT_CACHE_TTL)
+        return {"message": message, "model_used": model_name}, 200, {}
 
     # If all failed
     error_msg = str(last_error)
-    if "429" in error_msg:
-        return jsonify({"error": "Gemini is busy (Rate Limit). Please try again in a minute."}), 429
-    
-    return jsonify({"error": f"All AI models failed. Last error: {error_msg}"}), 500
+    if isinstance(last_error, RateLimitError):
+        return {"error": "Gemini is busy (Rate Limit). Please try again in a minute."}, 429, {}
+
+    return {"error": f"All AI models failed. Last error: {error_msg}"}, 500, {}
+
+
+async def draft_message_async(data):
+    """Async twin of draft_message (asgi.py). Returns (payload, status, headers)."""
+    cache_key, prompt, candidate_models, early = prepare_draft(data)
+    if early:
+        return early
+    draft = _draft_hedged_async if HEDGE_ENABLED else _draft_sequential_async
+    return draft_result(cache_key, *await draft(prompt, candidate_models))
+
+
+@gemini_bp.route('/draft-message', methods=['POST'])
+@token_required
+@rate_limited("draft", providers=("gemini",))
+def draft_message(current_user):
+    cache_key, prompt, candidate_models, early = prepare_draft(request.get_json())
+    if early:
+        payload, status, headers = early
+    else:
+        draft = _draft_hedged if HEDGE_ENABLED else _draft_sequential
+        payload, status, headers = draft_result(cache_key, *draft(prompt, candidate_models))
+    return jsonify(payload), status, headers
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from models import Item, Claim, User, db
+from models import Item, Claim, ItemImage, User, db
 from flask import current_app
 import requests
 import base64
@@ -7,21 +7,46 @@ from ai_models.ai_service import (
     analyze_image,
     generate_verification_question,
     find_matches_with_images,
+    item_image_ref,
 )
+from ai_models.llm_gateway import RateLimitError
+from ai_models.taxonomy import normalize_tags
 import os
 import json
-import traceback
+import logging
 import base64
 import jwt
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import cloudinary
-import cloudinary.uploader
-from routes.auth import SECRET_KEY
+from routes.auth import SECRET_KEY, token_required, token_user_id
+from services.cache import cached_response, invalidate
+from services.locations import zone_for
+from services.idempotency import idempotent
+from services import jpeg, metrics, uploads
+from services.metrics import span
+from services.ratelimit import rate_limited
+from services.matching import (
+    live_suggestions,
+    refresh_suggestions,
+    stored_suggestions,
+    vision_candidates,
+)
+from services.serializers import (
+    DETAIL_FIELDS,
+    FEED_FIELDS,
+    item_columns,
+    json_response,
+    select_fields,
+    serialize_row,
+    serialize_rows,
+)
+from services.storage import upload_image
 from PIL import Image
 import io
 
 items_bp = Blueprint("items", __name__)
+log = logging.getLogger(__name__)
 
 
 @items_bp.route("/<int:item_id>/poster", methods=["GET"])
@@ -41,7 +66,195 @@ cloudinary.config(
 )
 
 
+# --- Create Item pipeline ---
+# Shared by the Flask view below and the async handler in asgi.py: the
+# blocking steps (image work, DB) are plain functions, the remote AI calls
+# are made by the caller (sync or awaited).
+
+
+# Upload image policy: longest side and JPEG quality of what we store and send to the AI
+MAX_IMAGE_SIDE = 1024
+JPEG_QUALITY = 70
+# An upload already within policy (the web client pre-resizes in the browser)
+# is stored as sent. The quality ceiling allows a bit over JPEG_QUALITY since
+# browser encoders rarely land exactly on it; the size cap keeps pathological
+# files (huge metadata, 4:4:4 at q80) on the slow path.
+FASTPATH_MAX_QUALITY = int(os.getenv("IMAGE_FASTPATH_MAX_QUALITY", "80"))
+FASTPATH_MAX_BYTES = int(os.getenv("IMAGE_FASTPATH_MAX_BYTES", str(600 * 1024)))
+
+
+def within_policy(file_content):
+    """
+    True if the upload is an 8-bit baseline/progressive RGB or gray JPEG we
+    can keep as is. Files with Exif/XMP/IPTC metadata are re-encoded: the
+    image goes to a public URL and the metadata can hold GPS coordinates.
+    """
+    if len(file_content) > FASTPATH_MAX_BYTES:
+        return False
+    info = jpeg.probe(file_content)
+    return (
+        info is not None
+        and info.frame in (jpeg.BASELINE, jpeg.PROGRESSIVE)
+        and info.precision == 8
+        and not info.metadata
+        and info.components in (1, 3)
+        and max(info.width, info.height) <= MAX_IMAGE_SIDE
+        and info.quality <= FASTPATH_MAX_QUALITY
+    )
+
+
+def compress_image(file_content, content_type=None):
+    """Decode, downscale and re-encode an upload. Returns (jpeg_bytes, data_uri for the AI)."""
+    with span("probe"):
+        fast = within_policy(file_content)
+    metrics.inc("image_compress_total", path="fast" if fast else "reencode")
+    if fast:
+        base64_data = base64.b64encode(file_content).decode("utf-8")
+        return file_content, f"data:image/jpeg;base64,{base64_data}"
+
+    with span("decode"):
+        # Open image using Pillow
+        img = Image.open(io.BytesIO(file_content))
+
+        # Convert to RGB (in case of RGBA/PNG)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+    # --- Image Compression ---
+    with span("compress"):
+        # Resize if too large (Max dimension 1024px)
+        max_size = (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE)
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+        # Save to buffer with compression
+        compressed_buffer = io.BytesIO()
+        img.save(compressed_buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        compressed_content = compressed_buffer.getvalue()
+
+        # Generate Base64 for AI (using compressed image is fine and faster)
+        base64_data = base64.b64encode(compressed_content).decode("utf-8")
+        mime_type = content_type or "image/jpeg"
+        return compressed_content, f"data:{mime_type};base64,{base64_data}"
+
+
+def save_local_copy(file_content, original_name):
+    """Local Backup for dev/debugging. Returns the stored filename."""
+    if os.getenv("VERCEL") or os.getenv("FLASK_ENV") == "production":
+        upload_folder = os.path.join("/tmp", "uploads")
+    else:
+        upload_folder = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), "uploads"
+        )
+    os.makedirs(upload_folder, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    filename = f"{timestamp}_{secure_filename(original_name)}"
+    with open(os.path.join(upload_folder, filename), "wb") as f:
+        f.write(file_content)
+    return filename
+
+
+def fallback_analysis(form):
+    """Tags used when AI analysis fails (e.g., quotas, network)."""
+    return {
+        "category": "General Item",
+        "color": "See image",
+        "brand": None,
+        "description": form.get("description", "Check image for details"),
+        "distinctive_features": [],
+    }
+
+
+def build_item(user_id, form, analysis, image_url, filename):
+    """New (unsaved) Item from the form, AI analysis and uploaded image."""
+    # Handle Manual Tags (User Overrides)
+    try:
+        manual_tags = json.loads(form.get("manual_tags", "[]"))
+        if not isinstance(manual_tags, list):
+            manual_tags = []
+    except:
+        manual_tags = []
+
+    # Merge AI features and manual tags
+    ai_features = analysis.get("distinctive_features", [])
+    all_features = list(set(ai_features + manual_tags))
+
+    final_category = form.get("category") or analysis.get("category")
+    final_color = form.get("color") or analysis.get("color")
+    final_brand = form.get("brand") or analysis.get("brand")
+
+    return Item(
+        user_id=user_id,
+        type=form.get("type", "lost"),
+        description=analysis.get(
+            "description", form.get("description", "No description")
+        ),
+        location=form.get("location", "Unknown"),
+        zone_id=zone_for(form.get("location")),
+        date_lost=datetime.utcnow(),
+        image_url=filename,
+        image_data=image_url, # Store Cloudinary URL
+        category=final_category,
+        color=final_color,
+        brand=final_brand,
+        **normalize_tags(final_category, final_color, final_brand),
+        distinctive_features=all_features,
+        contact_info=form.get("contact_info"),
+    )
+
+
+def apply_verification(item, vq):
+    item.verification_question = vq.get("question")
+    item.verification_answer_type = vq.get("expected_answer_type")
+
+
+def save_item(new_item):
+    """Award points, commit, invalidate caches and compute match suggestions."""
+    # Gamification: Award 5 Points for Reporting (ONLY for FOUND items)
+    # We reward people for helping others, not for losing things!
+    if new_item.type == "found":
+        try:
+            user = User.query.get(new_item.user_id)
+            if user:
+                user.trust_score = getattr(user, "trust_score", 0) + 5
+        except Exception as xp_e:
+            log.warning("XP update failed: %s", xp_e)
+
+    with span("commit"):
+        db.session.add(new_item)
+        db.session.commit()
+
+    # Feed changed (and leaderboard too if points were awarded)
+    invalidate("items", "leaderboard")
+
+    # Score against the opposite-type pool once, store suggestions, notify owners
+    try:
+        with span("match"):
+            refresh_suggestions(new_item)
+    except Exception as match_e:
+        log.warning("Match suggestion refresh failed: %s", match_e)
+        db.session.rollback()
+
+
+def created_payload(item):
+    return {
+        "message": "Item reported successfully",
+        "item": {
+            "id": item.id,
+            "description": item.description,
+            "image_url": item.image_data,
+            "ai_tags": {
+                "category": item.category,
+                "color": item.color,
+                "brand": item.brand,
+            },
+        },
+    }
+
+
 @items_bp.route("/", methods=["POST"])
+@idempotent("create_item")
+@rate_limited("upload", providers=("openai",))
 def create_item():
     """
     Report a new Lost or Found item.
@@ -50,8 +263,12 @@ def create_item():
     - Stores outcome in DB
     """
 
-    # print("DEBUG: Entered create_item")
     try:
+        # Check the token before spending an upload and AI calls on the request
+        user_id = token_user_id(request.headers.get("Authorization"))
+        if user_id is None:
+            return jsonify({"error": "Unauthorized: Missing or invalid token"}), 401
+
         # 1. Handle Image Upload
         if "image" not in request.files:
             return jsonify({"error": "No image uploaded"}), 400
@@ -60,204 +277,194 @@ def create_item():
         if file.filename == "":
             return jsonify({"error": "No selected file"}), 400
 
-        # ... (Processing Base64 and Image) ...
-        # Process Image for DB (Base64)
+        return create_from_image(
+            user_id, file.read(), file.filename, file.content_type, request.form
+        )
 
-        file_content = file.read()
-        
-        # --- Image Compression ---
-        # Open image using Pillow
-        img = Image.open(io.BytesIO(file_content))
-        
-        # Convert to RGB (in case of RGBA/PNG)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-            
-        # Resize if too large (Max dimension 1024px)
-        max_size = (1024, 1024)
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # Save to buffer with compression
-        compressed_buffer = io.BytesIO()
-        img.save(compressed_buffer, format="JPEG", quality=70, optimize=True)
-        compressed_buffer.seek(0)
-        
-        # Update file_content to use the compressed version
-        compressed_content = compressed_buffer.getvalue()
-        
-        # Generate Base64 for AI (using compressed image is fine and faster)
-        base64_data = base64.b64encode(compressed_content).decode("utf-8")
-        mime_type = file.content_type or "image/jpeg"
-        image_data_uri = f"data:{mime_type};base64,{base64_data}"
-
-        # Local Backup for dev/debugging
-        if os.getenv("VERCEL") or os.getenv("FLASK_ENV") == "production":
-            upload_folder = os.path.join("/tmp", "uploads")
-        else:
-            upload_folder = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "uploads"
-            )
+    except Exception as e:
+        log.exception("create_item failed: %s", e)
+        return jsonify({"error": str(e)}), 500
 
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder)
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"{timestamp}_{secure_filename(file.filename)}"
-        filepath = os.path.join(upload_folder, filename)
+def create_from_image(user_id, file_content, original_name, content_type, form):
+    """Compress -> upload -> analyze -> verify -> save. Returns a Flask (response, status)."""
+    compressed_content, image_data_uri = compress_image(file_content, content_type)
 
-        with open(filepath, "wb") as f:
-            f.write(file_content)
+    with span("upload"):
+        filename = save_local_copy(file_content, original_name)
 
         # Cloudinary Upload
         try:
-            print("DEBUG: Uploading to Cloudinary...")
-            # We can upload the file_content (bytes) directly
             # Use compressed_content to save bandwidth/storage
-            upload_result = cloudinary.uploader.upload(
-                compressed_content, 
-                folder="campusfind",
-                resource_type="image"
-            )
-            image_url = upload_result.get("secure_url")
-            print(f"DEBUG: Cloudinary Upload Success: {image_url}")
+            image_url = upload_image(compressed_content)
+            log.debug("Cloudinary upload success: %s", image_url)
         except Exception as e:
-            print(f"ERROR: Cloudinary Upload Failed: {e}")
+            log.error("Cloudinary upload failed: %s", e)
             return jsonify({"error": f"Image upload failed: {str(e)}"}), 500
 
-        # 2. AI Analysis (Auto-Tagging)
-        print("DEBUG: Starting AI analysis...")
-        try:
-            data = request.form
-            # Pass the data URI directly to avoid disk dependency issues on serverless
-            analysis = analyze_image(image_data_uri, data.get("description", ""))
-            print(f"DEBUG: AI Analysis result: {analysis}")
-        except Exception as ai_e:
-            print(f"DEBUG: AI Analysis Failed: {ai_e}")
-            # Fallback to defaults if AI fails (e.g., quotas, network)
-            analysis = {
-                "category": "General Item",
-                "color": "See image",
-                "brand": None,
-                "description": data.get("description", "Check image for details"),
-                "distinctive_features": [],
-            }
-
-        # 2a. Handle Manual Tags (User Overrides)
-        manual_tags_str = data.get("manual_tags", "[]")
+    # 2. AI Analysis (Auto-Tagging)
+    try:
+        # Pass the data URI directly to avoid disk dependency issues on serverless
+        with span("analyze"):
+            analysis = analyze_image(image_data_uri, form.get("description", ""))
+    except Exception as ai_e:
+        log.warning("AI analysis failed, using fallback tags: %s", ai_e)
+        analysis = fallback_analysis(form)
+
+    # 3. Create Item Record
+    new_item = build_item(user_id, form, analysis, image_url, filename)
+
+    # 4. Generate Verification Question if it's a 'Found' item
+    # This helps the founder verify if a claimant is the true owner
+    if new_item.type == "found":
         try:
-            manual_tags = json.loads(manual_tags_str)
-            if not isinstance(manual_tags, list):
-                manual_tags = []
-        except:
-            manual_tags = []
+            with span("verify_question"):
+                vq = generate_verification_question(
+                    new_item.description, new_item.distinctive_features
+                )
+            apply_verification(new_item, vq)
+        except Exception as vq_e:
+            log.warning("Verification question generation failed: %s", vq_e)
 
-        # Merge AI features and manual tags
-        ai_features = analysis.get("distinctive_features", [])
-        all_features = list(set(ai_features + manual_tags))
-        analysis["distinctive_features"] = all_features
+    save_item(new_item)
+    return jsonify(created_payload(new_item)), 201
 
-        # 3. Get User ID from Token
-        token = request.headers.get("Authorization")
-        if not token or not token.startswith("Bearer "):
-            return jsonify({"error": "Unauthorized: Missing or invalid token"}), 401
 
-        try:
-            token_str = token.split(" ")[1]
-            data = jwt.decode(token_str, SECRET_KEY, algorithms=["HS256"])
-            user_id = data["user_id"]
-        except Exception as e:
-            return jsonify({"error": "Unauthorized: Invalid token"}), 401
+# --- Chunked Uploads ---
+# Resumable alternative to POST / for large photos on slow links (see
+# services/uploads.py): POST /uploads, PUT /uploads/<id> chunks with an
+# Upload-Offset header, GET /uploads/<id> to find where to resume, then
+# POST /uploads/<id>/finalize with the usual item fields.
 
-        # 4. Create Item Record
-        data = request.form
 
-        final_category = (
-            data.get("category") if data.get("category") else analysis.get("category")
-        )
-        final_color = data.get("color") if data.get("color") else analysis.get("color")
-        final_brand = data.get("brand") if data.get("brand") else analysis.get("brand")
-
-        new_item = Item(
-            user_id=user_id,
-            type=data.get("type", "lost"),
-            description=analysis.get(
-                "description", data.get("description", "No description")
-            ),
-            location=data.get("location", "Unknown"),
-            date_lost=datetime.utcnow(),
-            image_url=filename,
-            image_data=image_url, # Store Cloudinary URL
-            category=final_category,
-            color=final_color,
-            brand=final_brand,
-            distinctive_features=json.dumps(analysis.get("distinctive_features", [])),
-            contact_info=data.get("contact_info"),
+def read_bounded(stream, limit):
+    """The body, but never more than limit + 1 bytes (over limit: reject it)."""
+    parts, size = [], 0
+    while size <= limit:
+        block = stream.read(min(64 * 1024, limit + 1 - size))
+        if not block:
+            break
+        parts.append(block)
+        size += len(block)
+    return b"".join(parts)
+
+
+def upload_error(e):
+    payload, status, headers = e.response()
+    return jsonify(payload), status, headers
+
+
+@items_bp.route("/uploads", methods=["POST"])
+@token_required
+def start_upload(current_user):
+    data = request.get_json(silent=True) or {}
+    try:
+        session = uploads.start(
+            current_user.id,
+            data.get("filename"),
+            data.get("content_type"),
+            data.get("size"),
+            data.get("sha256"),
         )
+    except uploads.UploadError as e:
+        return upload_error(e)
+    return jsonify(session), 201
 
-        # 5. Generate Verification Question if it's a 'Found' item
-        # This helps the founder verify if a claimant is the true owner
-        if new_item.type == "found":
-            try:
-                distinctive_features = analysis.get("distinctive_features", [])
-                vq = generate_verification_question(
-                    new_item.description, distinctive_features
-                )
-                new_item.verification_question = vq.get("question")
-                new_item.verification_answer_type = vq.get("expected_answer_type")
-            except Exception as vq_e:
-                print(f"DEBUG: VQ Gen Failed: {vq_e}")
-
-        # Gamification: Award 5 Points for Reporting (ONLY for FOUND items)
-        # We reward people for helping others, not for losing things!
-        if new_item.type == "found":
-            try:
 
-                user = User.query.get(user_id)
-                if user:
-                    user.trust_score = getattr(user, "trust_score", 0) + 5
-            except Exception as xp_e:
-                print(f"XP Update Failed: {xp_e}")
+@items_bp.route("/uploads/<upload_id>", methods=["GET"])
+@token_required
+def upload_status(current_user, upload_id):
+    try:
+        return jsonify(uploads.status(upload_id, current_user.id)), 200
+    except uploads.UploadError as e:
+        return upload_error(e)
 
-        db.session.add(new_item)
-        db.session.commit()
 
-        return (
-            jsonify(
-                {
-                    "message": "Item reported successfully",
-                    "item": {
-                        "id": new_item.id,
-                        "description": new_item.description,
-                        "image_url": new_item.image_data,
-                        "ai_tags": {
-                            "category": new_item.category,
-                            "color": new_item.color,
-                            "brand": new_item.brand,
-                        },
-                    },
-                }
-            ),
-            201,
+@items_bp.route("/uploads/<upload_id>", methods=["PUT"])
+@token_required
+def upload_chunk(current_user, upload_id):
+    """Raw chunk bytes; `Upload-Offset` = bytes already received, optional `X-Chunk-SHA256`."""
+    limit = uploads.MAX_CHUNK_BYTES
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return jsonify({"error": "Upload-Offset header required"}), 400
+
+    # Bounded read: a chunked-transfer body has no Content-Length to check up front
+    data = b""
+    if (request.content_length or 0) <= limit:
+        data = read_bounded(request.stream, limit)
+    if (request.content_length or 0) > limit or len(data) > limit:
+        return jsonify({"error": f"Chunk too large (max {limit} bytes)"}), 413
+    try:
+        session = uploads.append(
+            upload_id,
+            current_user.id,
+            offset,
+            data,
+            request.headers.get("X-Chunk-SHA256"),
         )
+    except uploads.UploadError as e:
+        return upload_error(e)
+    return jsonify(session), 200
 
+
+@items_bp.route("/uploads/<upload_id>", methods=["DELETE"])
+@token_required
+def cancel_upload(current_user, upload_id):
+    try:
+        uploads.discard(upload_id, current_user.id)
+    except uploads.UploadError as e:
+        return upload_error(e)
+    return jsonify({"message": "Upload cancelled"}), 200
+
+
+@items_bp.route("/uploads/<upload_id>/finalize", methods=["POST"])
+@token_required
+@idempotent("finalize_upload")
+@rate_limited("upload", providers=("openai",))
+def finalize_upload(current_user, upload_id):
+    """Create the item from a completed upload (same fields as POST /, form or JSON)."""
+    try:
+        file_content, meta = uploads.finish(upload_id, current_user.id)
+    except uploads.UploadError as e:
+        return upload_error(e)
+
+    form = request.form
+    if not form:
+        form = dict(request.get_json(silent=True) or {})
+        if isinstance(form.get("manual_tags"), list):
+            form["manual_tags"] = json.dumps(form["manual_tags"])
+
+    try:
+        response, status = create_from_image(
+            current_user.id, file_content, meta["filename"], meta["content_type"], form
+        )
     except Exception as e:
-        print(f"DEBUG: CRITICAL ERROR: {e}")
-        traceback.print_exc()
+        log.exception("finalize_upload failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
+    # Keep the spool for a retry if the pipeline failed (e.g. Cloudinary down)
+    if status < 500:
+        uploads.discard(upload_id, current_user.id)
+    return response, status
+
 
 @items_bp.route("/", methods=["GET"])
+@cached_response("items")
 def get_items():
     """
     Get main feed of items.
-    Supports filtering by type (lost/found/all), search queries, and status.
+    Supports filtering by type (lost/found/all), search queries, feature tags and status.
+    Optional sparse fieldset: ?fields=id,description,image_url
     """
     try:
         type_filter = request.args.get("type")
         search_query = request.args.get("q")
+        fields = select_fields(request.args.get("fields"), FEED_FIELDS)
 
-        # Start query
-        query = Item.query
+        # Start query (plain row tuples, only the columns we serialize)
+        query = db.session.query(*item_columns(fields))
 
         # FILTER: Exclude 'claimed' items from the public feed to keep it fresh
         # Unless specifically requested (e.g. for Stats page)
@@ -265,7 +472,7 @@ def get_items():
             query = query.filter(Item.status != "claimed")
 
         if type_filter and type_filter != "all":
-            query = query.filter_by(type=type_filter)
+            query = query.filter(Item.type == type_filter)
 
         if search_query:
             search = f"%{search_query}%"
@@ -276,36 +483,15 @@ def get_items():
                 | (Item.location.ilike(search))
             )
 
-        # Sort by newest first
-        items = query.order_by(Item.date_lost.desc()).all()
-
-        result = []
-        for item in items:
-            img_src = item.image_data
-            if not img_src and item.image_url:
-                img_src = f"/uploads/{os.path.basename(item.image_url)}"
+        # Exact feature-tag filter (?feature=sticker&feature=cracked screen)
+        for tag in request.args.getlist("feature"):
+            if tag.strip():
+                query = query.filter(Item.has_feature(tag.strip()))
 
-            result.append(
-                {
-                    "id": item.id,
-                    "type": item.type,
-                    "description": item.description,
-                    "location": item.location,
-                    "date_lost": item.date_lost.strftime("%Y-%m-%d %H:%M"),
-                    "image_url": img_src,
-                    "category": item.category,
-                    "color": item.color,
-                    "brand": item.brand,
-                    "distinctive_features": (
-                        json.loads(item.distinctive_features)
-                        if item.distinctive_features
-                        else []
-                    ),
-                    "status": item.status,
-                }
-            )
+        # Sort by newest first
+        rows = query.order_by(Item.date_lost.desc()).all()
 
-        return jsonify(result), 200
+        return json_response(serialize_rows(rows, fields))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -317,110 +503,66 @@ def get_my_items():
         return jsonify({"error": "Unauthorized"}), 401
 
     try:
-
-        # from models import Claim # Imported at top level now
-
         token = token.split(" ")[1]
         data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         user_id = data["user_id"]
+        fields = select_fields(request.args.get("fields"), FEED_FIELDS)
 
-        # 1. Items uploaded by me
-        my_uploads = Item.query.filter_by(user_id=user_id).all()
-
-        # 2. Items claimed by me (where I am the claimant/finder/respondent)
-        my_claims = Claim.query.filter_by(claimant_id=user_id).all()
-        my_claimed_items = [c.item for c in my_claims]
-
-        # Combine unique items
-        all_items_map = {}
-
-        for item in my_uploads:
-            all_items_map[item.id] = item
-
-        for item in my_claimed_items:
-            all_items_map[item.id] = item
-
-        # Convert to list and sort
-        combined_items = list(all_items_map.values())
-        combined_items.sort(key=lambda x: x.date_lost, reverse=True)
-
-        result = []
-        for item in combined_items:
-            img_src = item.image_data
-            if not img_src and item.image_url:
-                img_src = f"/uploads/{os.path.basename(item.image_url)}"
+        # Items uploaded by me + items I claimed, in a single query
+        claimed_item_ids = db.session.query(Claim.item_id).filter(
+            Claim.claimant_id == user_id
+        )
+        rows = (
+            db.session.query(*item_columns(fields))
+            .filter((Item.user_id == user_id) | (Item.id.in_(claimed_item_ids)))
+            .order_by(Item.date_lost.desc())
+            .all()
+        )
 
-            result.append(
-                {
-                    "id": item.id,
-                    "type": item.type,
-                    "description": item.description,
-                    "location": item.location,
-                    "date_lost": item.date_lost.strftime("%Y-%m-%d %H:%M"),
-                    "image_url": img_src,
-                    "category": item.category,
-                    "color": item.color,
-                    "brand": item.brand,
-                    "distinctive_features": (
-                        json.loads(item.distinctive_features)
-                        if item.distinctive_features
-                        else []
-                    ),
-                    "status": item.status,
-                }
-            )
-        return jsonify(result), 200
+        return json_response(serialize_rows(rows, fields))
     except Exception as e:
-        print(f"My Items Error: {e}")
+        log.warning("My items error: %s", e)
         return jsonify({"error": str(e)}), 401
 
 
 @items_bp.route("/<int:id>", methods=["GET"])
+@cached_response("items")
 def get_item(id):
     """Get single item details"""
     try:
-        item = Item.query.get_or_404(id)
-
-        img_src = item.image_data
-        if not img_src and item.image_url:
-            img_src = f"/uploads/{os.path.basename(item.image_url)}"
-
-        return (
-            jsonify(
-                {
-                    "id": item.id,
-                    "type": item.type,
-                    "description": item.description,
-                    "location": item.location,
-                    "date_lost": item.date_lost.strftime("%Y-%m-%d %H:%M"),
-                    "image_url": img_src,
-                    "category": item.category,
-                    "color": item.color,
-                    "brand": item.brand,
-                    "distinctive_features": (
-                        json.loads(item.distinctive_features)
-                        if item.distinctive_features
-                        else []
-                    ),
-                    "status": item.status,
-                    "user_id": item.user_id,
-                    "reporter": {
-                        "name": item.user.name,
-                        "email": item.user.email,
-                        "phone": getattr(item.user, "phone", None),
-                        "profile_photo": getattr(item.user, "profile_photo", None),
-                        "contact_info": item.contact_info,
-                    },
-                }
-            ),
-            200,
+        fields = select_fields(request.args.get("fields"), DETAIL_FIELDS)
+        row = (
+            db.session.query(*item_columns(fields))
+            .join(User, User.id == Item.user_id)
+            .filter(Item.id == id)
+            .first()
         )
+        if row is None:
+            return jsonify({"error": "Item not found"}), 404
+
+        return json_response(serialize_row(row, fields))
     except Exception as e:
         return jsonify({"error": str(e)}), 404
 
 
+@items_bp.route("/images/<int:image_id>", methods=["GET"])
+def get_item_image(image_id):
+    """Serve an image payload stored in the ItemImage table (immutable)."""
+    image = ItemImage.query.get(image_id)
+    if image is None:
+        return jsonify({"error": "Image not found"}), 404
+
+    response = current_app.response_class(image.data, mimetype=image.mime_type)
+    response.set_etag(f"img-{image.id}")
+    # Payloads are never rewritten in place, so browsers/CDNs can keep them forever
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response.make_conditional(request)
+
+
 @items_bp.route("/<int:id>/analyze", methods=["POST"])
-def reanalyze_item(id):
+@token_required
+@rate_limited("analyze", providers=("openai",))
+def reanalyze_item(current_user, id):
     """
     Manually trigger AI analysis for an existing item.
     Useful for items that failed analysis or were uploaded before AI fixes.
@@ -429,27 +571,25 @@ def reanalyze_item(id):
 
         item = Item.query.get_or_404(id)
 
-        if not item.image_url:
+        # Cloudinary URL / stored image first, local upload as a fallback
+        image_ref = item_image_ref(item)
+        if not image_ref:
             return jsonify({"error": "Item has no image"}), 400
 
-        # Get full path
-        img_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            "uploads",
-            os.path.basename(item.image_url),
-        )
-
-        if not os.path.exists(img_path):
+        if not item.image_data and not os.path.exists(image_ref):
             return jsonify({"error": "Image file not found on server"}), 404
 
         # Run Analysis
-        analysis = analyze_image(img_path, item.description)
+        with span("analyze"):
+            analysis = analyze_image(image_ref, item.description)
 
         # Update Item
         item.category = analysis.get("category")
         item.color = analysis.get("color")
         item.brand = analysis.get("brand")
-        item.distinctive_features = json.dumps(analysis.get("distinctive_features", []))
+        item.distinctive_features = analysis.get("distinctive_features", [])
+        for column, value in normalize_tags(item.category, item.color, item.brand).items():
+            setattr(item, column, value)
 
         # Smart Description Update: Only update if AI gives a better description
         ai_desc = analysis.get("description")
@@ -459,6 +599,8 @@ def reanalyze_item(id):
             pass
 
         db.session.commit()
+        invalidate("items")
+        refresh_suggestions(item)
 
         return (
             jsonify(
@@ -467,101 +609,110 @@ def reanalyze_item(id):
                     "tags": {
                         "category": item.category,
                         "color": item.color,
-                        "features": json.loads(item.distinctive_features),
+                        "features": item.distinctive_features,
                     },
                 }
             ),
             200,
         )
 
+    except RateLimitError:
+        return jsonify({"error": "AI is busy (Rate Limit). Please try again in a minute."}), 429
     except Exception as e:
-        print(f"Re-analysis failed: {e}")
+        log.exception("Re-analysis failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+def suggested_matches(source_item):
+    """Tag-based matches: stored suggestions, else scored on the fly."""
+    # Stored suggestions (indexed read)
+    matches = stored_suggestions(source_item.id)
+
+    # Items reported before suggestions existed: score on the fly
+    if len(matches) == 0 and source_item.status == "unresolved":
+        matches = live_suggestions(source_item)
+    return matches
+
+
 @items_bp.route("/match/<int:id>", methods=["GET"])
+@rate_limited("vision", providers=("openai",), when=lambda: request.args.get("vision") == "true")
 def get_matches(id):
     """
-    🎯 FLAGSHIP FEATURE: Get AI-powered image matches for an item
-    Compares the item against opposite-type items using Gemini Vision
+    🎯 FLAGSHIP FEATURE: Get matches for an item
+    Reads the suggestions pre-computed when the item was created/re-tagged.
+    ?vision=true additionally compares images with the vision model (slow, paid).
     """
     try:
 
         # Get source item
         source_item = Item.query.get_or_404(id)
 
-        # Get opposite type items that are unresolved
-        opposite_type = "found" if source_item.type == "lost" else "lost"
-        candidates = Item.query.filter_by(type=opposite_type, status="unresolved").all()
-
-        if not candidates:
-            return jsonify([]), 200
-
         matches = []
 
-        # 1. Try AI Matching
-        try:
-            matches = find_matches_with_images(source_item, candidates)
-        except Exception as ai_e:
-            print(f"AI Match Failed (Rate Limit?): {ai_e}")
-            matches = []  # Fallback
+        # 1. Optional: AI image matching against the top tag candidates
+        if request.args.get("vision") == "true":
+            # Only the best nearby, in-window tag matches are worth a vision call
+            candidates = vision_candidates(source_item)
+            try:
+                with span("vision"):
+                    matches = find_matches_with_images(source_item, candidates)
+            except Exception as ai_e:
+                log.warning("AI match failed (rate limit?): %s", ai_e)
+                matches = []  # Fallback
 
-        # 2. Fallback: DB Pattern Matching if AI returned 0 matches
         if len(matches) == 0:
-            print("Using DB Fallback for Matching...")
-            fallback_matches = []
-            for cand in candidates:
-                score = 0
-                reasons = []
-
-                # Check Category
-                if source_item.category and cand.category:
-                    if source_item.category.lower() == cand.category.lower():
-                        score += 40
-                        reasons.append(f"Same category ({source_item.category})")
-
-                # Check Color
-                if source_item.color and cand.color:
-                    if (
-                        source_item.color.lower() in cand.color.lower()
-                        or cand.color.lower() in source_item.color.lower()
-                    ):
-                        score += 30
-                        reasons.append(f"Similar color ({source_item.color})")
-
-                # Check Brand
-                if source_item.brand and cand.brand:
-                    if source_item.brand.lower() in cand.brand.lower():
-                        score += 20
-                        reasons.append(f"Same brand ({source_item.brand})")
-
-                if score >= 30:  # Threshold
-                    fallback_matches.append(
-                        {
-                            "item": {
-                                "id": cand.id,
-                                "description": cand.description,
-                                "image_url": (
-                                    cand.image_data
-                                    if cand.image_data
-                                    else (
-                                        f"/uploads/{os.path.basename(cand.image_url)}"
-                                        if cand.image_url
-                                        else None
-                                    )
-                                ),
-                            },
-                            "confidence": score,
-                            "reasoning": "Basic Feature Match: " + ", ".join(reasons),
-                        }
-                    )
-
-            # Sort by score
-            matches = sorted(
-                fallback_matches, key=lambda x: x["confidence"], reverse=True
-            )[:5]
+            matches = suggested_matches(source_item)
 
         return jsonify(matches), 200
     except Exception as e:
-        print(f"Error in get_matches: {e}")
+        log.exception("Error in get_matches: %s", e)
         return jsonify({"error": str(e)}), 500
+
+
+# --- Admin: Bulk Re-tagging ---
+
+_retag_job = None
+
+
+@items_bp.route("/admin/retag", methods=["POST"])
+@token_required
+def start_retag(current_user):
+    """
+    Start a background re-tag run for items with missing/fallback AI tags.
+    Body (optional): {"concurrency": 4, "rpm": 30, "limit": 100, "restart": false}
+    Resumes an interrupted or limited run unless "restart" is set.
+    """
+    global _retag_job
+    if current_user.role != "admin":
+        return jsonify({"error": "Admins only"}), 403
+    if _retag_job and _retag_job.state["running"]:
+        return jsonify({"error": "A re-tag run is already in progress"}), 409
+
+    from ai_models.retagging import RetagJob
+    import threading
+
+    data = request.get_json(silent=True) or {}
+    _retag_job = RetagJob(
+        current_app._get_current_object(),
+        concurrency=int(data.get("concurrency", 4)),
+        requests_per_minute=int(data.get("rpm", 30)),
+        limit=int(data["limit"]) if data.get("limit") else None,
+        checkpoint_path=os.path.join("/tmp", "campusfind_retag.json"),
+    )
+    if not data.get("restart"):
+        _retag_job.load_checkpoint()
+    threading.Thread(target=_retag_job.run, name="retag", daemon=True).start()
+
+    return jsonify({"message": "Re-tag started", "state": _retag_job.state}), 202
+
+
+@items_bp.route("/admin/retag", methods=["GET"])
+@token_required
+def retag_status(current_user):
+    """Progress of the current/last re-tag run."""
+    if current_user.role != "admin":
+        return jsonify({"error": "Admins only"}), 403
+    if not _retag_job:
+        return jsonify({"state": None}), 200
+    state = dict(_retag_job.state, items_per_sec=round(_retag_job.throughput, 3))
+    return jsonify({"state": state}), 200
@@ -0,0 +1,96 @@
+"""
+Move legacy Base64 image payloads out of the item/claim rows.
+
+Items and claims created before Cloudinary stored full 'data:image/...;base64'
+URIs in Item.image_data / Claim.proof_image_data. This job copies each payload
+into the ItemImage table and rewrites the row to a short /api/items/images/<id>
+URL. It only ever touches rows that still hold a data URI, so it is safe to
+stop and re-run at any time.
+
+Usage (from server/):
+    python -m scripts.backfill_images [--batch-size 50] [--dry-run]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, Item, Claim, ItemImage
+
+log = logging.getLogger(__name__)
+
+
+def _backfill(column, owner_field, batch_size, dry_run):
+    """Generic loop over one (model column, ItemImage FK field) pair."""
+    model = column.class_
+    moved, skipped, last_id = 0, 0, 0
+
+    while True:
+        # Keyset pagination: only this batch's blobs are ever in memory
+        rows = (
+            db.session.query(model.id, column)
+            .filter(model.id > last_id, column.like("data:%"))
+            .order_by(model.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        for row_id, data_uri in rows:
+            image = ItemImage.from_data_uri(data_uri, **{owner_field: row_id})
+            if image is None:
+                log.warning("%s %s: malformed data URI, skipped", model.__name__, row_id)
+                skipped += 1
+                continue
+            if dry_run:
+                moved += 1
+                continue
+
+            db.session.add(image)
+            db.session.flush()  # assigns image.id
+            db.session.query(model).filter(model.id == row_id).update(
+                {column: image.url}, synchronize_session=False
+            )
+            moved += 1
+
+        if not dry_run:
+            db.session.commit()
+        last_id = rows[-1][0]
+        log.info("%s: %d moved so far (last id %s)", model.__name__, moved, last_id)
+
+    return moved, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    started = time.time()
+    with app.app_context():
+        items = _backfill(Item.image_data, "item_id", args.batch_size, args.dry_run)
+        claims = _backfill(
+            Claim.proof_image_data, "claim_id", args.batch_size, args.dry_run
+        )
+
+    if items[0] or claims[0]:
+        # Feed responses embed image URLs
+        from services.cache import invalidate
+        invalidate("items")
+
+    print(
+        f"Done in {time.time() - started:.1f}s: "
+        f"items {items[0]} moved / {items[1]} skipped, "
+        f"claims {claims[0]} moved / {claims[1]} skipped"
+        + (" (dry run)" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Recompute the normalized tag columns (category_code, color_code, brand_key)
+and campus zone (zone_id) for every item from its raw tags and location.
+
+The app does this on startup whenever taxonomy_version() (ai_models/taxonomy.py)
+or gazetteer_version() (services/locations.py) differs from the version the
+stored rows were computed with; run this to apply an edit without a restart.
+Either way, follow up with scripts.rebuild_matches.
+
+Usage (from server/):
+    python -m scripts.normalize_tags [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db
+from migrations import assign_item_zones, normalize_item_tags, set_data_version
+from ai_models.taxonomy import taxonomy_version
+from services.locations import gazetteer_version
+from services.cache import invalidate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-normalize item tags.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    started = time.time()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            count = normalize_item_tags(conn, batch_size=args.batch_size)
+            assign_item_zones(conn, batch_size=args.batch_size)
+            set_data_version(conn, "item_tags", taxonomy_version())
+            set_data_version(conn, "item_zones", gazetteer_version())
+        invalidate("items")
+    print(f"Done in {time.time() - started:.1f}s: {count} item(s) normalized")
+    print("Run `python -m scripts.rebuild_matches` to rescore stored suggestions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Recompute stored match suggestions for every unresolved item.
+
+New and re-tagged items get suggestions automatically; run this once after
+deploying the MatchSuggestion table (or after changing the scoring rules).
+
+Usage (from server/):
+    python -m scripts.rebuild_matches
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, Item
+from services.matching import refresh_suggestions
+
+
+def main():
+    started = time.time()
+    with app.app_context():
+        # Only lost items need a pass: each stored pair is written both ways
+        ids = [
+            row.id
+            for row in db.session.query(Item.id)
+            .filter(Item.status == "unresolved", Item.type == "lost")
+            .order_by(Item.id)
+            .all()
+        ]
+        pairs = 0
+        for i, item_id in enumerate(ids, 1):
+            pairs += len(refresh_suggestions(Item.query.get(item_id), notify=False))
+            if i % 100 == 0:
+                print(f"DEBUG: {i}/{len(ids)} items scored")
+    print(f"Done in {time.time() - started:.1f}s: {len(ids)} items, {pairs} suggestion pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Re-run AI tagging for items with missing or fallback tags.
+
+Selects items whose category/color are empty or still "General Item" /
+"See image", analyzes them with bounded concurrency under a requests-per-minute
+budget, and checkpoints progress so an interrupted run picks up where it left off.
+`--limit` counts items in this run; a run that gets through every pending item
+deletes the checkpoint, so the next one re-checks items that failed.
+
+Usage (from server/):
+    python -m scripts.retag_items [--concurrency 4] [--rpm 30] [--limit N]
+                                  [--checkpoint retag_checkpoint.json] [--restart]
+
+Non-interactive mode through the OpenAI Batch API (cheaper, up to 24h):
+    python -m scripts.retag_items --batch submit   # queue pending items
+    python -m scripts.retag_items --batch poll     # apply finished batches
+    python -m scripts.retag_items --batch wait     # poll until all batches finish
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from ai_models.retagging import RetagJob
+from ai_models import batch_analysis
+
+
+def _report(job):
+    s = job.state
+    print(
+        f"processed {s['processed']} | updated {s['updated']} | failed {s['failed']} | "
+        f"last id {s['last_id']} | {job.throughput:.2f} items/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=30, help="Max analysis calls per minute")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--checkpoint", default="retag_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--batch", choices=["submit", "poll", "wait"], help="Use the Batch API")
+    parser.add_argument("--state", default="batch_state.json", help="Batch mode state file")
+    parser.add_argument("--local", action="store_true", help="Batch mode: local stand-in backend")
+    args = parser.parse_args()
+
+    if args.batch:
+        backend = (
+            batch_analysis.LocalBatchBackend()
+            if args.local
+            else batch_analysis.default_backend()
+        )
+        with app.app_context():
+            if args.batch == "submit":
+                batch_id = batch_analysis.submit_pending(
+                    backend, args.state, max_items=args.limit or 1000
+                )
+                print(f"Submitted {batch_id}" if batch_id else "Nothing to submit.")
+            else:
+                updated = batch_analysis.poll(backend, args.state, wait=args.batch == "wait")
+                print(f"Applied tags to {updated} item(s).")
+        return
+
+    job = RetagJob(
+        app,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        page_size=args.page_size,
+        limit=args.limit,
+        checkpoint_path=args.checkpoint,
+    )
+    if not args.restart:
+        job.load_checkpoint()
+
+    try:
+        job.run(on_progress=_report)
+    except KeyboardInterrupt:
+        print("Interrupted; progress saved to checkpoint.")
+    _report(job)
+
+
+if __name__ == "__main__":
+    main()
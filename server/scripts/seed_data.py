@@ -0,0 +1,294 @@
+"""
+Bulk-generate synthetic users, items and claims for scale testing
+(indexes, pagination, matching) - 100k+ rows in seconds.
+
+Rows go in through SQLAlchemy Core executemany in chunks (or Postgres COPY
+with --copy), never ORM adds. Tags, colors and locations follow skewed,
+campus-like distributions and are normalized exactly like real uploads
+(category_code/color_code/brand_key/zone_id); images are Cloudinary-style
+URLs; claims cover every state (pending, accepted, rejected, completed), with
+completed claims marking the item claimed and crediting the finder.
+
+Usage (from server/):
+    python -m scripts.seed_data --items 100000 --claims 40000 --users 5000
+    python -m scripts.seed_data --items 500000 --copy          # Postgres COPY
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, text
+
+from ai_models.taxonomy import normalize_tags
+from models import Claim, Item, User
+from services.locations import ZONES, zone_for
+from services.storage import fake_image_url
+
+# --- Distributions ---
+# (value, weight). Weights are rough shares from a campus lost & found desk.
+
+CATEGORIES = [
+    ("Phone", 14), ("Smartphone", 4), ("Wallet", 12), ("Keys", 10), ("ID Card", 10),
+    ("Water Bottle", 9), ("Earbuds", 6), ("Headphones", 3), ("Charger", 5), ("Umbrella", 4),
+    ("Backpack", 4), ("Laptop", 2), ("Notebook", 4), ("Textbook", 2), ("Jacket", 3),
+    ("Glasses", 3), ("Watch", 2), ("Calculator", 3),
+]
+BRANDS = {
+    "Phone": ["Apple", "Samsung", "OnePlus", "Xiaomi", "Vivo", "Oppo", "Realme"],
+    "Smartphone": ["Apple", "Samsung", "Google", "Motorola"],
+    "Earbuds": ["Apple", "Boat", "Samsung", "JBL", "OnePlus"],
+    "Headphones": ["Sony", "JBL", "Bose", "Boat"],
+    "Charger": ["Apple", "Samsung", "Anker", "Mi"],
+    "Laptop": ["Apple", "Dell", "HP", "Lenovo", "Asus"],
+    "Watch": ["Casio", "Titan", "Fastrack", "Apple"],
+    "Calculator": ["Casio"],
+    "Water Bottle": ["Milton", "Cello", "Tupperware"],
+    "Backpack": ["Wildcraft", "American Tourister", "Skybags", "Nike"],
+}
+COLORS = [
+    ("Black", 30), ("Blue", 12), ("White", 10), ("Grey", 8), ("Silver", 7), ("Red", 6),
+    ("Navy", 4), ("Green", 4), ("Brown", 5), ("Pink", 3), ("Gold", 3), ("Purple", 2),
+    ("Yellow", 2), ("Orange", 2), ("Transparent", 2),
+]
+ZONE_WEIGHTS = {1: 14, 2: 16, 3: 6, 4: 6, 5: 15, 6: 12, 7: 9, 8: 4, 9: 6, 10: 3, 11: 4, 12: 2, 13: 1, 14: 2}
+LOCATION_TEMPLATES = ["{}", "near the {}", "{} 2nd floor", "outside {}", "{} entrance", "inside the {}"]
+FEATURES = [
+    "cracked screen", "sticker on back", "name written inside", "keychain attached",
+    "scratched corner", "transparent case", "missing cap", "initials engraved", "torn strap",
+]
+CLAIM_STATES = [("pending", 40), ("rejected", 25), ("accepted", 15), ("completed", 20)]
+
+
+def _sampler(pairs):
+    values = [v for v, _ in pairs]
+    cum, total = [], 0
+    for _, weight in pairs:
+        total += weight
+        cum.append(total)
+    return lambda rng: rng.choices(values, cum_weights=cum)[0]
+
+
+def _location_phrases():
+    """Free-text locations users actually type, each with its zone weight."""
+    pairs = []
+    for zone_id, name in ZONES.items():
+        weight = ZONE_WEIGHTS.get(zone_id, 1)
+        for template in LOCATION_TEMPLATES:
+            pairs.append((template.format(name), weight))
+    # A few that no zone matches (zone_id stays NULL, like real data)
+    pairs += [("somewhere on campus", 2), ("not sure", 1)]
+    return pairs
+
+
+pick_category = _sampler(CATEGORIES)
+pick_color = _sampler(COLORS)
+pick_state = _sampler(CLAIM_STATES)
+pick_location = _sampler(_location_phrases())
+
+
+# --- Row generation ---
+
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar() or 0) + 1
+
+
+def generate_users(first_id, count, rng):
+    return [
+        {
+            "id": first_id + i,
+            "email": f"seed{first_id + i}@campus.test",
+            "name": f"Student {first_id + i}",
+            "role": "student",
+            "trust_score": 0,
+            "read_notifications": "[]",
+        }
+        for i in range(count)
+    ]
+
+
+def generate_items(first_id, count, user_ids, days, now, rng):
+    rows = []
+    for i in range(count):
+        category = pick_category(rng)
+        color = pick_color(rng)
+        brand = rng.choice(BRANDS[category]) if category in BRANDS and rng.random() < 0.7 else None
+        location = pick_location(rng)
+        item_type = "found" if rng.random() < 0.55 else "lost"
+        features = rng.sample(FEATURES, rng.randint(0, 2))
+        # Skewed towards recent reports
+        date_lost = now - timedelta(seconds=int(days * 86400 * rng.random() ** 2))
+        item_id = first_id + i
+        rows.append({
+            "id": item_id,
+            "user_id": rng.choice(user_ids),
+            "type": item_type,
+            "description": " ".join(filter(None, [color, brand, category.lower()]))
+            + (f" with {features[0]}" if features else ""),
+            "location": location,
+            "zone_id": zone_for(location),
+            "date_lost": date_lost,
+            "image_data": fake_image_url(f"seed-{item_id}".encode()),
+            "status": "unresolved",
+            "category": category,
+            "color": color,
+            "brand": brand,
+            "distinctive_features": features,
+            "verification_question": f"What color is the {category.lower()}?" if item_type == "found" else None,
+            "verification_answer": color if item_type == "found" else None,
+            "verification_answer_type": "color" if item_type == "found" else None,
+            **normalize_tags(category, color, brand),
+        })
+    return rows
+
+
+def generate_claims(first_id, count, items, user_ids, users_by_id, now, rng):
+    """
+    Claims in every state. At most one accepted/completed claim per item;
+    completing marks the item claimed and credits the finder (+10 trust).
+    """
+    rows = []
+    resolved = set()
+    for i in range(count):
+        item = rng.choice(items)
+        claimant_id = rng.choice(user_ids)
+        while claimant_id == item["user_id"] and len(user_ids) > 1:
+            claimant_id = rng.choice(user_ids)
+        state = pick_state(rng)
+        if state in ("accepted", "completed") and item["id"] in resolved:
+            state = "rejected"
+        timestamp = min(now, item["date_lost"] + timedelta(hours=rng.randint(1, 24 * 7)))
+        accepted = state in ("accepted", "completed")
+        rows.append({
+            "id": first_id + i,
+            "item_id": item["id"],
+            "claimant_id": claimant_id,
+            "message": "I think this is mine, it has the same marks.",
+            "status": state,
+            "response_message": "This doesn't match the item." if state == "rejected" else None,
+            "meeting_location": ZONES.get(item["zone_id"], item["location"]) if accepted else None,
+            "meeting_time": timestamp + timedelta(days=rng.randint(1, 3)) if accepted else None,
+            "qr_code": f"{rng.randint(100000, 999999)}" if accepted else None,
+            "timestamp": timestamp,
+        })
+        if accepted:
+            resolved.add(item["id"])
+        if state == "completed":
+            item["status"] = "claimed"
+            finder_id = claimant_id if item["type"] == "lost" else item["user_id"]
+            users_by_id[finder_id]["trust_score"] += 10
+    return rows
+
+
+# --- Bulk insert ---
+
+
+def _insert_chunks(conn, table, rows, chunk_size):
+    for start in range(0, len(rows), chunk_size):
+        conn.execute(insert(table), rows[start : start + chunk_size])
+
+
+def _copy_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _copy(conn, table, rows):
+    """Postgres COPY FROM STDIN (CSV; None -> NULL)."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[c]) for c in columns])
+    buffer.seek(0)
+
+    preparer = conn.dialect.identifier_preparer
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        preparer.format_table(table), ", ".join(preparer.quote(c) for c in columns)
+    )
+    conn.connection.cursor().copy_expert(sql, buffer)
+
+
+def _sync_sequence(conn, table):
+    """Explicit ids leave Postgres serial sequences behind; catch them up."""
+    name = conn.dialect.identifier_preparer.format_table(table)
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT MAX(id) FROM {name}))"
+    ))
+
+
+def seed(conn, users=1000, items=10000, claims=4000, days=90, rng=None, chunk_size=5000, copy=False):
+    """
+    Generate and insert everything on one Core connection (caller commits).
+    Returns {"user_ids", "item_ids", "claims"}.
+    """
+    rng = rng or random.Random()
+    now = datetime.utcnow()
+    postgres = conn.dialect.name == "postgresql"
+    if copy and not postgres:
+        raise ValueError("COPY needs PostgreSQL")
+
+    user_rows = generate_users(_next_id(conn, User), users, rng)
+    user_ids = [u["id"] for u in user_rows]
+    item_rows = generate_items(_next_id(conn, Item), items, user_ids, days, now, rng)
+    claim_rows = generate_claims(
+        _next_id(conn, Claim), claims, item_rows, user_ids,
+        {u["id"]: u for u in user_rows}, now, rng,
+    )
+
+    for model, rows in ((User, user_rows), (Item, item_rows), (Claim, claim_rows)):
+        if not rows:
+            continue
+        if copy:
+            _copy(conn, model.__table__, rows)
+        else:
+            _insert_chunks(conn, model.__table__, rows, chunk_size)
+        if postgres:
+            _sync_sequence(conn, model.__table__)
+
+    return {"user_ids": user_ids, "item_ids": [i["id"] for i in item_rows], "claims": len(claim_rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-insert synthetic users/items/claims.")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--claims", type=int, default=40000)
+    parser.add_argument("--days", type=int, default=180, help="Spread item dates over this many days")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per executemany")
+    parser.add_argument("--copy", action="store_true", help="Use COPY (PostgreSQL only)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (reproducible data)")
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+    from services.cache import invalidate
+
+    started = time.time()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            result = seed(
+                conn, users=args.users, items=args.items, claims=args.claims, days=args.days,
+                rng=random.Random(args.seed), chunk_size=args.chunk_size, copy=args.copy,
+            )
+        invalidate("items", "leaderboard")
+    print(
+        f"Inserted {len(result['user_ids'])} users, {len(result['item_ids'])} items, "
+        f"{result['claims']} claims in {time.time() - started:.1f}s"
+    )
+    print("Run `python -m scripts.rebuild_matches` to compute match suggestions for them.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, current_app
+
+log = logging.getLogger(__name__)
+
+# --- Response Cache ---
+# Public read endpoints (feed, item detail, leaderboard) are cached here.
+# Keys are versioned per namespace ("items", "leaderboard"): writes bump the
+# namespace generation instead of hunting down individual keys, so every old
+# entry simply stops being addressable and ages out of the LRU/TTL.
+
+DEFAULT_TTL = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+
+class LRUCache:
+    """
+    In-process LRU cache with per-entry TTL. Thread-safe.
+    Counters (incr) live outside the LRU: an evicted generation would fall
+    back to 0 and make entries cached under the old key current again.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class SQLiteCache:
+    """
+    Local stand-in for a shared cache (Redis/Memcached style).
+    Backed by a SQLite file so every worker process on the host sees the
+    same entries and the same invalidations.
+    """
+
+    PURGE_EVERY = 500  # writes between sweeps of expired entries
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+        )
+        conn.commit()
+        # SQLite handles must not cross a fork (gunicorn --preload)
+        os.register_at_fork(after_in_child=self._forget_connections)
+
+    def _forget_connections(self):
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value), expires_at),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Delete expired entries (superseded generations are never read again, only aged out)."""
+        self._conn().execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            value = (pickle.loads(row[0]) if row else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, NULL)",
+                (key, pickle.dumps(value)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def counter(self, key):
+        # Counters are stored without expiry, so purge_expired never drops them
+        return self.get(key) or 0
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+
+class NullCache:
+    """Disables caching (CACHE_BACKEND=none)."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def counter(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+def _build_backend():
+    """
+    Pick the backend from CACHE_BACKEND:
+    - memory: per-process LRU
+    - sqlite: shared file cache for multi-worker deployments
+    - none: caching disabled
+    Unset: sqlite when the server runs several worker processes (an
+    invalidation in one worker must reach the others), else memory.
+    """
+    default = "sqlite" if int(os.getenv("WEB_CONCURRENCY") or "1") > 1 else "memory"
+    backend = (os.getenv("CACHE_BACKEND") or default).lower()
+    if backend == "none":
+        return NullCache()
+    if backend == "sqlite":
+        path = os.getenv("CACHE_SQLITE_PATH") or os.path.join(
+            "/tmp", "campusfind_cache.db"
+        )
+        return SQLiteCache(path)
+    return LRUCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "512")))
+
+
+cache = _build_backend()
+
+
+def generation(namespace):
+    """Current version counter of a namespace (bumped on every invalidation)."""
+    return cache.counter(f"gen:{namespace}")
+
+
+def invalidate(*namespaces):
+    """Write-through invalidation: call after committing a write."""
+    for namespace in namespaces:
+        try:
+            cache.incr(f"gen:{namespace}")
+        except Exception as e:
+            # Never fail a write because the cache is unavailable
+            log.warning("Cache invalidation failed for '%s': %s", namespace, e)
+
+
+def _normalized_args():
+    """Sorted, trimmed query params so '?b=1&a=x ' and '?a=x&b=1' share a key."""
+    pairs = []
+    for key in sorted(request.args.keys()):
+        values = sorted(v.strip() for v in request.args.getlist(key) if v.strip())
+        if values:
+            pairs.append(f"{key.lower()}={','.join(values)}")
+    return "&".join(pairs)
+
+
+def _etag_for(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _conditional_response(body, mimetype, etag):
+    # Werkzeug parses If-None-Match into unquoted tags; weak comparison per RFC 9110
+    if request.if_none_match.contains_weak(etag.strip('"')):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, status=200, mimetype=mimetype)
+    response.set_etag(etag.strip('"'))
+    # Clients may store the response but must revalidate (cheap 304) every time
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def cached_response(*namespaces, ttl=None):
+    """
+    Cache successful GET responses of a public view.
+    The key is the path + normalized query params + the generation of every
+    namespace the response depends on. Adds ETag / If-None-Match support.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                gens = ".".join(str(generation(ns)) for ns in namespaces)
+                key = f"resp:{request.path}?{_normalized_args()}@{gens}"
+                hit = cache.get(key)
+            except Exception as e:
+                log.warning("Cache lookup failed: %s", e)
+                return f(*args, **kwargs)
+
+            if hit is not None:
+                body, mimetype, etag = hit
+                response = _conditional_response(body, mimetype, etag)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            rv = current_app.make_response(f(*args, **kwargs))
+            if rv.status_code != 200 or rv.direct_passthrough:
+                return rv
+
+            body = rv.get_data()
+            etag = _etag_for(body)
+            try:
+                cache.set(key, (body, rv.mimetype, etag), ttl=ttl or DEFAULT_TTL)
+            except Exception as e:
+                log.warning("Cache store failed: %s", e)
+
+            response = _conditional_response(body, rv.mimetype, etag)
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, jsonify, make_response, request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyRecord
+from services import metrics
+
+log = logging.getLogger(__name__)
+
+# --- Idempotency Keys ---
+# A client that retries a timed-out POST with the same `Idempotency-Key`
+# header gets the first attempt's response back instead of a second upload,
+# AI analysis and duplicate row. Keys are scoped per user and endpoint.
+# The first attempt inserts a pending record (the unique constraint makes
+# concurrent retries race on the insert, not on the work). On completion it
+# stores the response for IDEMPOTENCY_TTL. Failures worth retrying (5xx,
+# 429) drop the record so the next attempt runs for real.
+# Records are written on their own connection so a pending key is visible to
+# other workers immediately and survives the view's session being rolled back.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))  # seconds a response is replayed
+# A pending key whose worker died is taken over after this (longer than any request)
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+IN_PROGRESS_RETRY_AFTER = 2  # seconds
+
+StoredResponse = namedtuple("StoredResponse", "status body mimetype")
+
+_table = IdempotencyRecord.__table__
+
+
+class IdempotencyConflict(Exception):
+    """The key is in use by an in-flight request, or was used for a different one."""
+
+    def __init__(self, message, status, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def response(self):
+        """(payload, status, headers)"""
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after else {}
+        return {"error": str(self)}, self.status, headers
+
+
+def fingerprint(*parts):
+    """Stable hash of a request's meaningful content (form fields, file digests, JSON)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def should_store(status):
+    """Replay successes and client errors; let a retry redo server errors and throttling."""
+    return status < 500 and status != 429
+
+
+def _match(user_id, scope, key):
+    return (_table.c.user_id == user_id) & (_table.c.scope == scope) & (_table.c.key == key)
+
+
+def begin(scope, user_id, key, request_hash):
+    """
+    Claim `key` for this request. Returns None if the caller should do the
+    work (then call complete() or release()), or the StoredResponse to replay.
+    Raises IdempotencyConflict if another attempt holds the key or the key
+    was used with a different request.
+    """
+    for _ in range(3):
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    _table.insert().values(
+                        user_id=user_id,
+                        scope=scope,
+                        key=key,
+                        request_hash=request_hash,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+                    )
+                )
+                # Housekeeping: this user's expired keys (bounded, index-friendly)
+                conn.execute(
+                    _table.delete().where(
+                        (_table.c.user_id == user_id) & (_table.c.expires_at < now)
+                    )
+                )
+            return None
+        except IntegrityError:
+            pass
+
+        with db.engine.begin() as conn:
+            row = conn.execute(select(_table).where(_match(user_id, scope, key))).first()
+            if row is None:
+                continue  # Released in between: try the insert again
+            if row.expires_at <= now:
+                # Expired response, or a pending key whose worker died
+                conn.execute(_table.delete().where(_table.c.id == row.id))
+                continue
+
+        if row.request_hash != request_hash:
+            metrics.inc("idempotency_total", scope=scope, outcome="mismatch")
+            raise IdempotencyConflict(
+                f"{HEADER} was already used for a different request.", 422
+            )
+        if row.status_code is None:
+            metrics.inc("idempotency_total", scope=scope, outcome="in_progress")
+            raise IdempotencyConflict(
+                "A request with this Idempotency-Key is still being processed.",
+                409,
+                IN_PROGRESS_RETRY_AFTER,
+            )
+        metrics.inc("idempotency_total", scope=scope, outcome="replayed")
+        return StoredResponse(row.status_code, row.response, row.mimetype)
+
+    raise IdempotencyConflict(
+        "A request with this Idempotency-Key is still being processed.",
+        409,
+        IN_PROGRESS_RETRY_AFTER,
+    )
+
+
+def complete(scope, user_id, key, status, body, mimetype):
+    """Store the response of the attempt holding `key` (or drop it if retryable)."""
+    if not should_store(status):
+        release(scope, user_id, key)
+        return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                _table.update()
+                .where(_match(user_id, scope, key) & _table.c.status_code.is_(None))
+                .values(
+                    status_code=status,
+                    response=body,
+                    mimetype=mimetype,
+                    expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL),
+                )
+            )
+    except Exception as e:
+        # The response still goes out; retries see "in progress" until the lock expires
+        log.warning("Storing idempotent response failed: %s", e)
+        return
+    metrics.inc("idempotency_total", scope=scope, outcome="stored")
+
+
+def release(scope, user_id, key):
+    """Drop a pending key so a retry runs the request again."""
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                _table.delete().where(
+                    _match(user_id, scope, key) & _table.c.status_code.is_(None)
+                )
+            )
+    except Exception as e:
+        # The lock times out on its own after IDEMPOTENCY_LOCK_SECONDS
+        log.warning("Releasing idempotency key failed: %s", e)
+
+
+def request_key(headers):
+    """The validated header value, None if absent. Raises IdempotencyConflict if malformed."""
+    key = (headers.get(HEADER) or "").strip()
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyConflict(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters.", 400)
+    return key
+
+
+def _flask_request_hash(scope):
+    files = []
+    for name, storage in request.files.items(multi=True):
+        files.append((name, storage.filename, file_digest(storage.read())))
+        storage.seek(0)
+    return fingerprint(
+        scope,
+        sorted(request.form.items(multi=True)),
+        sorted(files),
+        json.dumps(request.get_json(silent=True), sort_keys=True),
+    )
+
+
+def idempotent(scope):
+    """
+    `Idempotency-Key` support for a Flask view. Requests without the header,
+    or without a valid token (the view answers 401), pass straight through.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            from routes.auth import token_user_id
+
+            user_id = token_user_id(request.headers.get("Authorization"))
+            try:
+                key = request_key(request.headers)
+            except IdempotencyConflict as e:
+                payload, status, headers = e.response()
+                return jsonify(payload), status, headers
+            if key is None or user_id is None:
+                return f(*args, **kwargs)
+
+            try:
+                stored = begin(scope, user_id, key, _flask_request_hash(scope))
+            except IdempotencyConflict as e:
+                payload, status, headers = e.response()
+                return jsonify(payload), status, headers
+            except Exception as e:
+                # Fail open: a broken store must not take the endpoint down
+                log.warning("Idempotency check failed, running without it: %s", e)
+                return f(*args, **kwargs)
+
+            if stored is not None:
+                response = Response(stored.body, stored.status, mimetype=stored.mimetype)
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except BaseException:
+                release(scope, user_id, key)
+                raise
+            complete(
+                scope,
+                user_id,
+                key,
+                response.status_code,
+                response.get_data(as_text=True),
+                response.mimetype,
+            )
+            return response
+
+        return decorated
+
+    return decorator
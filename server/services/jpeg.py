@@ -0,0 +1,101 @@
+import struct
+from collections import namedtuple
+
+# --- JPEG Header Probe ---
+# Reads dimensions and an IJG-equivalent quality estimate from the marker
+# segments only (no entropy decoding), so an upload that is already small
+# enough can skip the decode/resize/re-encode in compress_image.
+
+# frame: the SOF marker (0xC0 baseline, 0xC2 progressive, others are
+# lossless/arithmetic/12-bit variants); metadata: an APP1 (Exif/XMP, which
+# can hold GPS) or APP13 (IPTC) segment is present.
+JpegInfo = namedtuple(
+    "JpegInfo", "width height components quality progressive frame precision metadata"
+)
+
+BASELINE = 0xC0
+PROGRESSIVE = 0xC2
+
+# IJG (libjpeg) base luminance table, the one every common encoder scales
+# by its quality setting. Order doesn't matter: only the sum is compared.
+_STD_LUMINANCE = (
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+)
+_STD_LUMINANCE_SUM = sum(_STD_LUMINANCE)
+
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_PROGRESSIVE = {0xC2, 0xC6, 0xCA, 0xCE}
+
+
+def estimate_quality(table):
+    """IJG quality (1-100) whose scaled base table is closest to `table` (64 entries)."""
+    scale = sum(table) * 100.0 / _STD_LUMINANCE_SUM
+    if scale <= 0:
+        return 100
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(100, round(quality)))
+
+
+def _luminance_table(segment):
+    """Table 0 from a DQT segment payload (which may hold several tables)."""
+    pos = 0
+    while pos < len(segment):
+        precision, table_id = segment[pos] >> 4, segment[pos] & 0x0F
+        size = 128 if precision else 64
+        body = segment[pos + 1:pos + 1 + size]
+        if len(body) < size:
+            return None
+        if table_id == 0:
+            return struct.unpack(">64H", body) if precision else tuple(body)
+        pos += 1 + size
+    return None
+
+
+def probe(content):
+    """JpegInfo from the headers of `content`, or None if it isn't a well-formed JPEG."""
+    if len(content) < 4 or content[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    quality = frame = None
+    metadata = False
+    while pos + 4 <= len(content):
+        if content[pos] != 0xFF:
+            return None
+        marker = content[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # No length field
+            pos += 2
+            continue
+        (length,) = struct.unpack(">H", content[pos + 2:pos + 4])
+        segment = content[pos + 4:pos + 2 + length]
+        if length < 2 or len(segment) < length - 2:
+            return None
+
+        if marker == 0xDB and quality is None:
+            table = _luminance_table(segment)
+            if table is not None:
+                quality = estimate_quality(table)
+        elif marker in _SOF_MARKERS:
+            if len(segment) < 6:
+                return None
+            height, width = struct.unpack(">HH", segment[1:5])
+            frame = (width, height, segment[5], marker in _PROGRESSIVE, marker, segment[0])
+        elif marker in (0xE1, 0xED):
+            metadata = True
+        elif marker == 0xDA:  # Start of scan: all tables and the frame header are known
+            break
+        pos += 2 + length
+
+    if frame is None or quality is None:
+        return None
+    width, height, components, progressive, sof, precision = frame
+    return JpegInfo(width, height, components, quality, progressive, sof, precision, metadata)
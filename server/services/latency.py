@@ -0,0 +1,55 @@
+import threading
+
+# --- Latency Histograms ---
+# Fixed, log-spaced buckets (seconds). Cheap to update from any thread and
+# good enough to read p50/p90/p99 for decisions like hedge delays.
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0,
+)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q, default=None, min_samples=20):
+        """
+        Upper bucket bound below which a fraction q of samples fall.
+        Returns `default` until there are enough samples to trust.
+        """
+        with self._lock:
+            if self.count < min_samples:
+                return default
+            target = q * self.count
+            cumulative = 0
+            for i, n in enumerate(self.counts):
+                cumulative += n
+                if cumulative >= target:
+                    return self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+        return default
+
+    def snapshot(self):
+        """(bucket bounds, cumulative counts, count, sum) for exporters."""
+        with self._lock:
+            cumulative, running = [], 0
+            for n in self.counts:
+                running += n
+                cumulative.append(running)
+            return self.buckets, cumulative, self.count, self.sum
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+from functools import lru_cache
+
+from ai_models.taxonomy import RULES_VERSION, SynonymTable
+
+log = logging.getLogger(__name__)
+
+# --- Campus Gazetteer ---
+# Item.location is free text ("2nd floor of the library", "near canteen").
+# It is mapped to a campus zone at write time (Item.zone_id). Matching only
+# considers candidates in the same or an adjacent zone, and inside a date
+# window around date_lost. Items whose location can't be placed (zone_id
+# NULL) are never pruned by location.
+#
+# The built-in zones fit a typical campus; point CAMPUS_ZONES_FILE at a JSON
+# file to use your own:
+#   {"zones": [{"id": 1, "name": "Library", "aliases": ["lib"], "adjacent": [2]}]}
+# Zone ids are stored on Item, so never renumber an existing zone. Aliases
+# should name a place ("basketball court"), not a generic word ("court",
+# "ground") that also shows up in unrelated text like "ground floor".
+# Stored zone ids are recomputed on the next start whenever
+# gazetteer_version() changes (migrations.py).
+
+DEFAULT_ZONES = [
+    (1, "Library", ["central library", "reading room", "lib", "study hall"], [2, 9]),
+    (2, "Academic Block", ["classroom", "lecture hall", "lecture theatre", "academic building", "main building", "faculty room", "staff room"], [1, 3, 4, 9, 12, 14]),
+    (3, "Science Labs", ["lab", "labs", "laboratory", "chemistry lab", "physics lab", "biology lab", "computer lab"], [2, 4]),
+    (4, "Engineering Block", ["engineering", "workshop", "mechanical block", "cse block", "it block"], [2, 3]),
+    (5, "Cafeteria", ["canteen", "cafe", "mess", "food court", "dining hall", "juice shop"], [6, 7, 9]),
+    (6, "Hostels", ["hostel", "dorm", "dormitory", "residence hall", "boys hostel", "girls hostel"], [5, 7, 8, 13]),
+    (7, "Sports Complex", ["playground", "sports ground", "cricket ground", "football ground", "gym", "gymnasium", "sports", "stadium", "basketball court", "tennis court", "football field", "sports field", "swimming pool", "running track"], [5, 6]),
+    (8, "Parking", ["parking lot", "parking area", "bike stand", "cycle stand"], [6, 10]),
+    (9, "Student Center", ["student centre", "activity center", "common room", "club room", "student union"], [1, 2, 5, 14]),
+    (10, "Main Gate", ["gate", "entrance", "main entrance", "security", "security desk", "reception"], [8, 11, 12]),
+    (11, "Bus Stop", ["bus", "bus stand", "shuttle", "transport", "college bus"], [10]),
+    (12, "Admin Block", ["admin", "administration", "admin office", "accounts", "registrar", "exam cell"], [2, 10]),
+    (13, "Medical Center", ["health center", "health centre", "medical", "clinic", "dispensary", "infirmary"], [6]),
+    (14, "Auditorium", ["seminar hall", "amphitheatre", "amphitheater", "open air theatre", "oat", "convention hall"], [2, 9]),
+]
+
+# Candidates must be reported within this many days of the source, either way.
+# date_lost is set when the report is made, not when the item went missing,
+# so a found report can come before the owner's lost report as easily as after.
+MATCH_WINDOW_DAYS = int(os.getenv("MATCH_WINDOW_DAYS", "30"))
+
+def _load_zones():
+    path = os.getenv("CAMPUS_ZONES_FILE")
+    if not path:
+        return DEFAULT_ZONES
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return [
+            (int(z["id"]), z["name"], z.get("aliases", []), z.get("adjacent", []))
+            for z in data["zones"]
+        ]
+    except Exception as e:
+        log.warning("Could not load CAMPUS_ZONES_FILE '%s', using defaults: %s", path, e)
+        return DEFAULT_ZONES
+
+
+_ZONE_ROWS = _load_zones()
+ZONES = {zone_id: name for zone_id, name, _, _ in _ZONE_ROWS}
+
+# Adjacency is declared one way and made symmetric here
+ADJACENT = {zone_id: {zone_id} for zone_id in ZONES}
+for _zone_id, _, _, _neighbours in _ZONE_ROWS:
+    for _other in _neighbours:
+        if _other in ADJACENT:
+            ADJACENT[_zone_id].add(_other)
+            ADJACENT[_other].add(_zone_id)
+
+ZONE_TABLE = SynonymTable.from_entries(
+    {zone_id: (name, aliases) for zone_id, name, aliases, _ in _ZONE_ROWS},
+    prefer_last=False,
+)
+
+# Bump when zone_for's rules change (zone table edits are hashed)
+ZONE_RULES_VERSION = 2
+
+
+def gazetteer_version():
+    """Fingerprint of the zones (incl. CAMPUS_ZONES_FILE) and rules stored zone ids come from."""
+    digest = hashlib.sha1(repr(_ZONE_ROWS).encode()).hexdigest()[:12]
+    return f"{RULES_VERSION}.{ZONE_RULES_VERSION}-{digest}"
+
+
+@lru_cache(maxsize=2048)
+def zone_for(location):
+    """
+    Zone id for a free-text location, or None if it can't be placed. Text
+    naming places in different zones ("between the library and the canteen")
+    stays unplaced: a wrong zone prunes the right candidates, no zone prunes none.
+    """
+    if not location:
+        return None
+    zones = set(ZONE_TABLE.phrase_matches(location))
+    if len(zones) == 1:
+        return zones.pop()
+    if zones:
+        return None
+    return ZONE_TABLE.lookup(location)  # Plural / typo fallbacks
+
+
+def zone_name(zone_id):
+    return ZONES.get(zone_id)
+
+
+def nearby_zones(zone_id):
+    """The zone itself plus its neighbours (None: anywhere)."""
+    if zone_id is None:
+        return None
+    return ADJACENT.get(zone_id, {zone_id})
+
+
+def date_window(date_lost):
+    """
+    (earliest, latest) date_lost for opposite-type candidates of an item.
+    Symmetric, so a pair is inside the window from both sides.
+    """
+    if date_lost is None:
+        return None, None
+    window = timedelta(days=MATCH_WINDOW_DAYS)
+    return date_lost - window, date_lost + window
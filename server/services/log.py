@@ -0,0 +1,172 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+from flask import g, has_request_context, request
+
+# --- Logging ---
+# Every module logs through `logging.getLogger(__name__)`. Records are put on
+# an in-memory queue by the calling thread and written to stdout by a
+# background listener, so request threads never block on log I/O.
+#
+#   LOG_FORMAT=json|text        one JSON object per line (default) or plain text
+#   LOG_LEVEL=INFO              default threshold
+#   LOG_LEVELS=routes.items=DEBUG,ai_models=WARNING   per-module overrides (prefix match)
+#   LOG_DEBUG_SAMPLE=1.0        fraction of DEBUG records kept (high-volume lines)
+#   DEBUG_LOG_TOKEN=...         send `X-Debug-Log: <token>` to log everything
+#                               (DEBUG, unsampled) for that one request
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))
+DEBUG_LOG_TOKEN = os.getenv("DEBUG_LOG_TOKEN")
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_handler = None
+
+
+def _parse_levels(spec):
+    levels = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, level = part.partition("=")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def _request_state():
+    """(request_id, debug flag) of the current Flask request, if any."""
+    if not has_request_context():
+        return None, False
+    return g.get("request_id"), g.get("debug_log", False)
+
+
+class LevelFilter(logging.Filter):
+    """
+    Per-module thresholds, DEBUG sampling and per-request debug.
+    Runs on the calling thread before the record is queued.
+    """
+
+    def __init__(self, default_level, levels, debug_sample):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+        self.debug_sample = debug_sample
+        self._thresholds = {}
+
+    def threshold(self, name):
+        level = self._thresholds.get(name)
+        if level is None:
+            level, best = self.default_level, -1
+            for prefix, prefix_level in self.levels.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    level, best = prefix_level, len(prefix)
+            self._thresholds[name] = level
+        return level
+
+    def filter(self, record):
+        request_id, debug = _request_state()
+        if request_id:
+            record.request_id = request_id
+        if debug:
+            return True
+        if record.levelno < self.threshold(record.name):
+            return False
+        if record.levelno <= logging.DEBUG and self.debug_sample < 1.0:
+            return random.random() < self.debug_sample
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def setup_logging():
+    """Install the queue handler on the root logger (idempotent)."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    default_level = logging.getLevelName(LOG_LEVEL)
+    levels = _parse_levels(os.getenv("LOG_LEVELS", ""))
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "text":
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    records = queue.SimpleQueue()
+    _handler = logging.handlers.QueueHandler(records)
+    _handler.addFilter(LevelFilter(default_level, levels, DEBUG_SAMPLE))
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    # Loggers must let DEBUG through when per-request debug is possible;
+    # LevelFilter does the real gating.
+    root.setLevel(
+        logging.DEBUG if DEBUG_LOG_TOKEN else min([default_level, *levels.values()])
+    )
+
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_stop_listener)
+    # Forked workers (gunicorn --preload) inherit the queue but not the thread
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    """Fresh queue + thread in the child; records queued pre-fork are the parent's to write."""
+    global _listener
+    if _listener is not None:
+        _handler.queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(
+            _handler.queue, *_listener.handlers, respect_handler_level=False
+        )
+        _listener.start()
+
+
+# --- Flask integration ---
+
+
+def _before_request():
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    g.debug_log = bool(DEBUG_LOG_TOKEN) and request.headers.get("X-Debug-Log") == DEBUG_LOG_TOKEN
+
+
+def _after_request(response):
+    if g.get("request_id"):
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
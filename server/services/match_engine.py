@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from models import db, Item
+from ai_models.taxonomy import category_group
+
+# --- Vectorized Tag Scoring ---
+# The unresolved pool of one item type is loaded once into int32 arrays:
+# category_code / color_code straight from the normalized Item columns
+# (ai_models/taxonomy.py) and brand_key dictionary-encoded to ints. Scoring a
+# source item is then a handful of integer comparisons over the whole pool,
+# and top-k uses argpartition instead of a full sort. Zone / date arrays let
+# callers prune the pool before scoring.
+# Each process keeps its index for MATCH_POOL_TTL seconds, then reloads it,
+# so writes made by other workers/instances show up within that bound. Its
+# own creates, re-tags and claims are applied in place right away
+# (copy-on-write, so concurrent scorers keep a consistent snapshot).
+
+Candidate = namedtuple(
+    "Candidate",
+    "id user_id type description category color brand category_code color_code brand_key "
+    "zone_id date_lost",
+)
+
+MISSING = -1
+EPOCH = datetime(1970, 1, 1)
+MATCH_POOL_TTL = float(os.getenv("MATCH_POOL_TTL", "30"))
+
+
+def _seconds(value):
+    return np.nan if value is None else (value - EPOCH).total_seconds()
+
+
+class _Encoder:
+    """String -> int code dictionary for one attribute."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, value):
+        if not value:
+            return MISSING
+        return self.codes.setdefault(value, len(self.codes))
+
+
+def _codes(values, count):
+    return np.fromiter(
+        (MISSING if v is None else v for v in values), dtype=np.int32, count=count
+    )
+
+
+class PoolIndex:
+    _ARRAYS = ("ids", "category", "group", "color", "brand", "zone", "dates")
+
+    def __init__(self, rows):
+        self.rows = rows
+        count = len(rows)
+        self.ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=count)
+        self.category = _codes((r.category_code for r in rows), count)
+        self.group = np.where(self.category == MISSING, MISSING, self.category // 100 * 100)
+        self.color = _codes((r.color_code for r in rows), count)
+        self._brands = _Encoder()
+        self.brand = _codes((self._brands.encode(r.brand_key) for r in rows), count)
+        self.zone = _codes((r.zone_id for r in rows), count)
+        self.dates = np.fromiter(
+            (_seconds(r.date_lost) for r in rows), dtype=np.float64, count=count
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _derived(self, rows, arrays):
+        index = PoolIndex.__new__(PoolIndex)
+        index.rows = rows
+        index._brands = self._brands  # Only ever grows; old arrays never hold new codes
+        for name, values in zip(self._ARRAYS, arrays):
+            setattr(index, name, values)
+        return index
+
+    def without(self, item_id):
+        """New index minus one item (self if it isn't in the pool)."""
+        keep = self.ids != item_id
+        if keep.all():
+            return self
+        rows = [row for row, kept in zip(self.rows, keep) if kept]
+        return self._derived(rows, [getattr(self, name)[keep] for name in self._ARRAYS])
+
+    def with_row(self, row):
+        """New index with `row` added, or replacing the item's previous row."""
+        base = self.without(row.id)
+        category = MISSING if row.category_code is None else row.category_code
+        values = (
+            row.id,
+            category,
+            MISSING if category == MISSING else category // 100 * 100,
+            MISSING if row.color_code is None else row.color_code,
+            base._brands.encode(row.brand_key),
+            MISSING if row.zone_id is None else row.zone_id,
+            _seconds(row.date_lost),
+        )
+        arrays = []
+        for name, value in zip(self._ARRAYS, values):
+            current = getattr(base, name)
+            arrays.append(np.append(current, value).astype(current.dtype, copy=False))
+        return base._derived(base.rows + [row], arrays)
+
+    def prune(self, zones=None, start=None, end=None):
+        """
+        Pool positions worth scoring: candidates in one of `zones` (or not
+        placed) and with date_lost inside [start, end] (or undated).
+        """
+        keep = np.ones(len(self.rows), dtype=bool)
+        if zones is not None:
+            keep &= np.isin(self.zone, np.fromiter(zones, dtype=np.int32)) | (
+                self.zone == MISSING
+            )
+        # NaN (undated) compares False both ways, so it's never dropped
+        if start is not None:
+            keep &= ~(self.dates < _seconds(start))
+        if end is not None:
+            keep &= ~(self.dates > _seconds(end))
+        return np.flatnonzero(keep)
+
+    def score(
+        self, category_code=None, color_code=None, brand_key=None, shared_ids=(), positions=None
+    ):
+        """
+        Score candidates at once (all, or only `positions` from prune()).
+        Same rules as matching.score_pair.
+        """
+        if positions is None:
+            positions = np.arange(len(self.rows))
+        scores = np.zeros(len(positions), dtype=np.int16)
+        if not len(positions):
+            return scores
+
+        if category_code is not None:
+            same = self.category[positions] == category_code
+            scores += 40 * same
+            scores += 20 * (~same & (self.group[positions] == category_group(category_code)))
+
+        if color_code is not None:
+            scores += 30 * (self.color[positions] == color_code)
+
+        brand = self._brands.codes.get(brand_key) if brand_key else None
+        if brand is not None:
+            scores += 20 * (self.brand[positions] == brand)
+
+        if shared_ids:
+            scores += 10 * np.isin(
+                self.ids[positions], np.fromiter(shared_ids, dtype=np.int64)
+            )
+
+        return scores
+
+    def top_k(self, scores, k, threshold=0):
+        """Indices (into `scores`) of the k best scores >= threshold, best first."""
+        eligible = np.flatnonzero(scores >= threshold)
+        if len(eligible) > k:
+            part = np.argpartition(-scores[eligible], k - 1)[:k]
+            eligible = eligible[part]
+        # Stable order: score desc, then pool order
+        order = np.lexsort((eligible, -scores[eligible]))
+        return eligible[order]
+
+
+_CANDIDATE_COLUMNS = (
+    Item.id,
+    Item.user_id,
+    Item.type,
+    Item.description,
+    Item.category,
+    Item.color,
+    Item.brand,
+    Item.category_code,
+    Item.color_code,
+    Item.brand_key,
+    Item.zone_id,
+    Item.date_lost,
+)
+
+_pools = {}  # item type -> (monotonic load time, PoolIndex)
+_pools_lock = threading.Lock()
+
+
+def _load_pool(item_type):
+    rows = [
+        Candidate(*row)
+        for row in db.session.query(*_CANDIDATE_COLUMNS)
+        .filter(Item.type == item_type, Item.status == "unresolved")
+        .all()
+    ]
+    return PoolIndex(rows)
+
+
+def pool_index(item_type):
+    """Encoded unresolved pool for one item type (reloaded every MATCH_POOL_TTL seconds)."""
+    cached = _pools.get(item_type)
+    if cached and time.monotonic() - cached[0] < MATCH_POOL_TTL:
+        return cached[1]
+
+    loaded_at = time.monotonic()
+    index = _load_pool(item_type)
+    with _pools_lock:
+        _pools[item_type] = (loaded_at, index)
+    return index
+
+
+def _update_pool(item_type, change):
+    # Keeps the load time: other processes' writes still arrive with the next reload
+    with _pools_lock:
+        cached = _pools.get(item_type)
+        if cached:
+            _pools[item_type] = (cached[0], change(cached[1]))
+
+
+def pool_upsert(item):
+    """Reflect a committed create / re-tag / status change of `item` in this process."""
+    if item.status != "unresolved":
+        pool_remove(item.id)
+        return
+    row = Candidate(*(getattr(item, column.key) for column in _CANDIDATE_COLUMNS))
+    _update_pool(item.type, lambda index: index.with_row(row))
+
+
+def pool_remove(item_id):
+    """Drop a committed, no longer matchable (e.g. claimed) item from this process's pools."""
+    for item_type in list(_pools):
+        _update_pool(item_type, lambda index: index.without(item_id))
@@ -0,0 +1,228 @@
+from sqlalchemy import insert
+
+from models import db, Item, MatchSuggestion
+from ai_models.taxonomy import category_group, category_name, color_name
+from services.locations import date_window, nearby_zones
+from services.match_engine import pool_index, pool_upsert
+from services.notifications import excerpt, notify_user
+from services.serializers import image_src
+
+# --- Match Suggestions ---
+# Tag-based matches are computed once when an item is created or re-tagged
+# (scored against the opposite-type unresolved pool, pruned to nearby campus
+# zones and a date window) and stored in the MatchSuggestion table. The match
+# endpoint then only reads them.
+# Scoring itself runs on the dictionary-encoded pool in match_engine;
+# score_pair stays as the readable reference and builds the reasoning text.
+
+MATCH_THRESHOLD = 30  # Minimum score to keep a suggestion
+NOTIFY_THRESHOLD = 70  # Strong enough to push to the other item's owner
+MAX_SUGGESTIONS = 5
+MAX_STORED = 50  # Per item; keeps refresh cheap when the pool is huge
+
+
+def opposite_type(item_type):
+    return "found" if item_type == "lost" else "lost"
+
+
+def pool_filters(source):
+    """
+    SQL clauses for the candidates worth comparing with `source`: unresolved,
+    opposite type, same or adjacent campus zone, inside the date window.
+    """
+    clauses = [Item.type == opposite_type(source.type), Item.status == "unresolved"]
+    zones = nearby_zones(source.zone_id)
+    if zones is not None:
+        clauses.append(Item.zone_id.in_(zones) | Item.zone_id.is_(None))
+    start, end = date_window(source.date_lost)
+    if start is not None:
+        clauses.append(Item.date_lost.is_(None) | Item.date_lost.between(start, end))
+    return clauses
+
+
+def shared_feature_ids(source):
+    """Candidate items sharing any distinctive feature tag (SQL)."""
+    features = source.distinctive_features or []
+    if not features:
+        return set()
+    rows = (
+        db.session.query(Item.id)
+        .filter(*pool_filters(source), db.or_(*[Item.has_feature(f) for f in features]))
+        .all()
+    )
+    return {row.id for row in rows}
+
+
+def score_pair(source, cand, shared_features=False):
+    """Basic feature match score (0-100) and the reasons behind it."""
+    score = 0
+    reasons = []
+
+    # Check Category (normalized codes; same group counts for less)
+    if source.category_code is not None and cand.category_code is not None:
+        if source.category_code == cand.category_code:
+            score += 40
+            reasons.append(f"Same category ({category_name(source.category_code)})")
+        elif category_group(source.category_code) == category_group(cand.category_code):
+            score += 20
+            reasons.append(
+                f"Related category ({category_name(category_group(source.category_code))})"
+            )
+
+    # Check Color (same color family)
+    if source.color_code is not None and source.color_code == cand.color_code:
+        score += 30
+        reasons.append(f"Similar color ({color_name(source.color_code)})")
+
+    # Check Brand
+    if source.brand_key and source.brand_key == cand.brand_key:
+        score += 20
+        reasons.append(f"Same brand ({source.brand})")
+
+    # Check Distinctive Features
+    if shared_features:
+        score += 10
+        reasons.append("Shared distinctive features")
+
+    return score, reasons
+
+
+def score_pool(source, limit=MAX_STORED):
+    """
+    [(candidate row, score, reasoning)] above threshold, best first.
+    The pool is pruned by zone and date window, the rest scored in one
+    vectorized pass; reasons are only spelled out for the top `limit`.
+    """
+    index = pool_index(opposite_type(source.type))
+    start, end = date_window(source.date_lost)
+    positions = index.prune(nearby_zones(source.zone_id), start, end)
+    shared = shared_feature_ids(source)
+    scores = index.score(
+        source.category_code, source.color_code, source.brand_key, shared, positions
+    )
+
+    scored = []
+    for i in index.top_k(scores, limit, threshold=MATCH_THRESHOLD):
+        cand = index.rows[positions[i]]
+        _, reasons = score_pair(source, cand, cand.id in shared)
+        scored.append((cand, int(scores[i]), "Basic Feature Match: " + ", ".join(reasons)))
+    return scored
+
+
+def vision_candidates(source, limit=2):
+    """Full Item rows for the best tag matches, to spend vision calls on."""
+    ids = [cand.id for cand, _, _ in score_pool(source, limit)]
+    if not ids:
+        return []
+    query = Item.query.options(db.undefer(Item.image_data)).filter(Item.id.in_(ids))
+    items = {item.id: item for item in query.all()}
+    return [items[i] for i in ids if i in items]
+
+
+def prune_item(item_id):
+    """Drop every suggestion involving this item (e.g. once it's claimed)."""
+    db.session.query(MatchSuggestion).filter(
+        (MatchSuggestion.item_id == item_id) | (MatchSuggestion.candidate_id == item_id)
+    ).delete(synchronize_session=False)
+
+
+def refresh_suggestions(item, notify=True):
+    """
+    Recompute and store suggestions for one item (both directions).
+    Call after the item's tags were committed. Commits.
+    Each pair is pushed to the candidate's owner at most once: the
+    `notified` flag survives the recompute (e.g. a re-analyze) and is set
+    in the same commit as the new rows, before anything is sent.
+    """
+    already_notified = {
+        cand_id
+        for (cand_id,) in db.session.query(MatchSuggestion.candidate_id).filter(
+            MatchSuggestion.item_id == item.id, MatchSuggestion.notified.is_(True)
+        )
+    }
+    prune_item(item.id)
+    if item.status != "unresolved":
+        db.session.commit()
+        pool_upsert(item)
+        return []
+
+    scored = score_pool(item)
+    # Proactively tell owners of strong existing matches about the new item
+    to_notify = [
+        cand
+        for cand, score, _ in scored
+        if notify
+        and score >= NOTIFY_THRESHOLD
+        and cand.user_id != item.user_id
+        and cand.id not in already_notified
+    ]
+    notified = already_notified | {cand.id for cand in to_notify}
+
+    rows = []
+    for cand, score, reasoning in scored:
+        pair = {"score": score, "reasoning": reasoning, "notified": cand.id in notified}
+        rows.append({"item_id": item.id, "candidate_id": cand.id, **pair})
+        rows.append({"item_id": cand.id, "candidate_id": item.id, **pair})
+    if rows:
+        db.session.execute(insert(MatchSuggestion), rows)
+    db.session.commit()
+    pool_upsert(item)  # Scorers of the other type see it without waiting for a reload
+
+    for cand in to_notify:
+        notify_user(
+            cand.user_id,
+            title="Possible match found 🔍",
+            body=f"A newly reported {item.type} item may be your '{excerpt(cand.description)}'.",
+            data={"click_action": f"/item/{cand.id}"},
+        )
+    return scored
+
+
+def _match_payload(cand_id, description, image_data, image_url, score, reasoning):
+    return {
+        "id": cand_id,
+        "item": {
+            "id": cand_id,
+            "description": description,
+            "image_url": image_src(image_data, image_url),
+        },
+        "confidence": score,
+        "reasoning": reasoning,
+    }
+
+
+def stored_suggestions(item_id, limit=MAX_SUGGESTIONS):
+    """Best stored suggestions whose candidate is still unresolved."""
+    rows = (
+        db.session.query(
+            Item.id,
+            Item.description,
+            Item.image_data,
+            Item.image_url,
+            MatchSuggestion.score,
+            MatchSuggestion.reasoning,
+        )
+        .join(Item, Item.id == MatchSuggestion.candidate_id)
+        .filter(MatchSuggestion.item_id == item_id, Item.status == "unresolved")
+        .order_by(MatchSuggestion.score.desc())
+        .limit(limit)
+        .all()
+    )
+    return [_match_payload(*row) for row in rows]
+
+
+def live_suggestions(source, limit=MAX_SUGGESTIONS):
+    """Score on the fly (items created before suggestions were stored)."""
+    top = score_pool(source, limit)
+    if not top:
+        return []
+    images = dict(
+        (row.id, (row.image_data, row.image_url))
+        for row in db.session.query(Item.id, Item.image_data, Item.image_url)
+        .filter(Item.id.in_([cand.id for cand, _, _ in top]))
+        .all()
+    )
+    return [
+        _match_payload(cand.id, cand.description, *images[cand.id], score, reasoning)
+        for cand, score, reasoning in top
+    ]
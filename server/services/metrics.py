@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.latency import LatencyHistogram
+
+# --- Metrics & Timing ---
+# One in-process registry of latency histograms and counters, exported in
+# Prometheus text format at /api/metrics. Code marks interesting stages with
+#
+#     with span("upload"): ...        or        @timed("analyze")
+#
+# Every span feeds a histogram and, inside a request, is also kept on `g`
+# so the request can be answered with a Server-Timing header
+# (SERVER_TIMING=1). SQL statements are counted and timed through
+# SQLAlchemy cursor events. Numbers are per worker process.
+
+PREFIX = "campusfind"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Optional bearer token for /api/metrics
+
+_histograms = {}  # (name, labels) -> LatencyHistogram
+_counters = {}  # (name, labels) -> float
+_lock = threading.Lock()
+
+
+def _key(name, labels):
+    return f"{PREFIX}_{name}", tuple(sorted(labels.items()))
+
+
+def histogram(name, **labels):
+    """The histogram for this name + label set (created on first use)."""
+    key = _key(name, labels)
+    hist = _histograms.get(key)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(key, LatencyHistogram())
+    return hist
+
+
+def observe(name, seconds, **labels):
+    histogram(name, **labels).observe(seconds)
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+# --- Spans ---
+
+
+def _request_spans():
+    if not has_request_context():
+        return None
+    if "metric_spans" not in g:
+        g.metric_spans = []
+    return g.metric_spans
+
+
+@contextmanager
+def span(stage):
+    """Time a block as one stage (histogram + Server-Timing entry)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("stage_seconds", elapsed, stage=stage)
+        spans = _request_spans()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def timed(stage):
+    """Decorator form of span()."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# --- SQL statements ---
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metric_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metric_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    observe("db_query_seconds", elapsed, operation=operation)
+    if has_request_context():
+        g.metric_sql_count = g.get("metric_sql_count", 0) + 1
+        g.metric_sql_seconds = g.get("metric_sql_seconds", 0.0) + elapsed
+
+
+# --- Flask integration ---
+
+
+def _before_request():
+    g.metric_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.get("metric_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if endpoint == "/api/metrics":
+        return response
+
+    observe("http_request_seconds", elapsed, method=request.method, endpoint=endpoint)
+    inc(
+        "http_requests_total",
+        method=request.method,
+        endpoint=endpoint,
+        status=str(response.status_code),
+    )
+    sql_count = g.get("metric_sql_count", 0)
+    if sql_count:
+        inc("db_queries_total", sql_count, endpoint=endpoint)
+
+    if SERVER_TIMING:
+        entries = [
+            f'{name};dur={seconds * 1000:.1f}' for name, seconds in g.get("metric_spans", [])
+        ]
+        if sql_count:
+            entries.append(
+                f'db;dur={g.metric_sql_seconds * 1000:.1f};desc="{sql_count} queries"'
+            )
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def render():
+    """Prometheus text exposition of every histogram and counter."""
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    seen = set()
+    for (name, labels), hist in histograms:
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        bounds, cumulative, count, total = hist.snapshot()
+        for bound, n in zip(bounds, cumulative):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {n}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for (name, labels), value in counters:
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/api/metrics", "metrics", metrics_view)
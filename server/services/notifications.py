@@ -0,0 +1,324 @@
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+
+# --- Push Notification Dispatch ---
+# Claim routes enqueue pushes and return immediately. A background worker
+# drains the queue and sends each event to all of the recipient's devices in
+# one FCM multicast call, retries transient failures with backoff and prunes
+# tokens FCM reports as dead.
+
+log = logging.getLogger(__name__)
+
+OK = "ok"
+INVALID_TOKEN = "invalid_token"  # Token is gone for good -> prune it
+TRANSIENT = "transient"  # Worth retrying (quota, 5xx, network)
+FAILED = "failed"  # Permanent error for this message, drop it
+
+# FCM multicast limit per call
+MAX_MULTICAST_TOKENS = 500
+# User-written text quoted in a push body is cut to this many characters
+MAX_EXCERPT_CHARS = 80
+
+
+def excerpt(text, limit=MAX_EXCERPT_CHARS):
+    """`text` on one line, cut to `limit` characters with an ellipsis."""
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+class Notification:
+    """One event fanned out to a set of device tokens."""
+
+    def __init__(self, tokens, title, body, data=None):
+        self.tokens = list(tokens)
+        self.title = title
+        self.body = body
+        self.data = data or {}
+        self.attempts = 0
+
+    def retry_for(self, tokens):
+        """Copy of this event restricted to the tokens that still need it."""
+        clone = Notification(tokens, self.title, self.body, self.data)
+        clone.attempts = self.attempts
+        return clone
+
+
+class FirebaseTransport:
+    """One send_each_for_multicast call per event."""
+
+    def send(self, notification):
+        """Returns one result per token, in order."""
+        from firebase_admin import exceptions, messaging
+
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=notification.title, body=notification.body
+            ),
+            tokens=notification.tokens,
+            data=notification.data or None,
+        )
+        try:
+            batch = messaging.send_each_for_multicast(message)
+        except Exception as e:
+            log.warning("FCM multicast failed: %s", e)
+            return [TRANSIENT] * len(notification.tokens)
+
+        results = []
+        for resp in batch.responses:
+            if resp.success:
+                results.append(OK)
+            elif isinstance(
+                resp.exception,
+                (messaging.UnregisteredError, messaging.SenderIdMismatchError),
+            ):
+                results.append(INVALID_TOKEN)
+            elif isinstance(
+                resp.exception,
+                (
+                    messaging.QuotaExceededError,
+                    exceptions.UnavailableError,
+                    exceptions.InternalError,
+                    exceptions.DeadlineExceededError,
+                ),
+            ):
+                results.append(TRANSIENT)
+            else:
+                # e.g. InvalidArgumentError: usually the message itself (size,
+                # data values), so the token is kept
+                log.warning("FCM rejected push: %s", resp.exception)
+                results.append(FAILED)
+        return results
+
+
+class FakeTransport:
+    """
+    Local stand-in for FCM (NOTIFICATION_TRANSPORT=fake).
+    Records every delivered (token, notification) pair; `outcomes` maps a
+    token to a forced result.
+    """
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.sent = []
+        self.calls = 0
+        self.outcomes = {}
+
+    def send(self, notification):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        self.calls += 1
+        results = []
+        for token in notification.tokens:
+            result = self.outcomes.get(token, OK)
+            if result == OK:
+                self.sent.append((token, notification))
+            results.append(result)
+        return results
+
+
+def _build_transport():
+    if os.getenv("NOTIFICATION_TRANSPORT", "firebase").lower() == "fake":
+        return FakeTransport(latency_ms=int(os.getenv("FAKE_FCM_LATENCY_MS", "0")))
+    return FirebaseTransport()
+
+
+class NotificationQueue:
+    """
+    Batched, retrying push dispatcher.
+    The worker thread starts lazily on first use (and again after a fork), so
+    preloaded multi-process servers get one worker per process.
+    """
+
+    def __init__(
+        self,
+        transport,
+        flush_interval=0.25,
+        max_batch=100,
+        max_attempts=4,
+        base_backoff=1.0,
+        inline=False,
+    ):
+        self.transport = transport
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.inline = inline
+        self.on_invalid_tokens = None
+
+        self._queue = queue.Queue()
+        self._retries = []  # heap of (ready_at, seq, notification)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self._worker = None
+        self._pid = None
+
+    # --- Producer side ---
+
+    def enqueue(self, notification):
+        if self.inline:
+            # Serverless: no process survives the response, send right away
+            self._dispatch([notification])
+            return
+        with self._lock:
+            self._pending += 1
+        self._ensure_worker()
+        self._queue.put(notification)
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far was sent or dropped."""
+        deadline = time.time() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    # --- Worker side ---
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._worker = threading.Thread(
+                target=self._run, name="notification-dispatch", daemon=True
+            )
+            self._worker.start()
+
+    def _next_batch(self):
+        batch = []
+        now = time.time()
+        while self._retries and self._retries[0][0] <= now and len(batch) < self.max_batch:
+            batch.append(heapq.heappop(self._retries)[2])
+
+        # Wait for the first event, then gather whatever else arrives
+        # within flush_interval (bounded by max_batch).
+        timeout = self.flush_interval
+        if not batch and self._retries:
+            timeout = max(0.0, self._retries[0][0] - now)
+        elif not batch:
+            timeout = None
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._dispatch(batch)
+                except Exception as e:
+                    log.exception("Notification dispatch crashed: %s", e)
+                    self._done(len(batch))
+
+    def _dispatch(self, batch):
+        invalid_tokens = []
+        finished = 0
+        for notification in batch:
+            results = self.transport.send(notification)
+            notification.attempts += 1
+
+            retry_tokens = []
+            for token, result in zip(notification.tokens, results):
+                if result == TRANSIENT:
+                    retry_tokens.append(token)
+                elif result == INVALID_TOKEN:
+                    invalid_tokens.append(token)
+
+            if retry_tokens and notification.attempts < self.max_attempts and not self.inline:
+                # Exponential backoff, only for the devices that failed; the event stays pending
+                delay = self.base_backoff * (2 ** (notification.attempts - 1))
+                with self._lock:
+                    self._seq += 1
+                    heapq.heappush(
+                        self._retries,
+                        (time.time() + delay, self._seq, notification.retry_for(retry_tokens)),
+                    )
+                continue
+            if retry_tokens:
+                log.warning(
+                    "Push dropped for %d device(s) after %d attempt(s)",
+                    len(retry_tokens),
+                    notification.attempts,
+                )
+            finished += 1
+
+        if invalid_tokens and self.on_invalid_tokens:
+            try:
+                self.on_invalid_tokens(invalid_tokens)
+            except Exception as e:
+                log.warning("Token pruning failed: %s", e)
+
+        if not self.inline:
+            self._done(finished)
+
+    def _done(self, count):
+        with self._idle:
+            self._pending -= count
+            if self._pending <= 0:
+                self._pending = 0
+                self._idle.notify_all()
+
+
+notification_queue = NotificationQueue(
+    _build_transport(),
+    inline=bool(os.getenv("VERCEL")) or os.getenv("NOTIFICATIONS_INLINE") == "1",
+)
+
+
+def init_app(app):
+    """Wire token pruning to the app's database."""
+
+    def prune(tokens):
+        from models import db, DeviceToken, User
+
+        with app.app_context():
+            db.session.query(DeviceToken).filter(DeviceToken.token.in_(tokens)).delete(
+                synchronize_session=False
+            )
+            db.session.query(User).filter(User.fcm_token.in_(tokens)).update(
+                {User.fcm_token: None}, synchronize_session=False
+            )
+            db.session.commit()
+        log.info("Pruned %d invalid FCM token(s)", len(tokens))
+
+    notification_queue.on_invalid_tokens = prune
+
+
+def notify_user(user_id, title, body, data=None):
+    """Queue a push to every active device of a user. Never raises."""
+    try:
+        from models import DeviceToken
+
+        tokens = DeviceToken.active_tokens(user_id)
+        for i in range(0, len(tokens), MAX_MULTICAST_TOKENS):
+            notification_queue.enqueue(
+                Notification(tokens[i : i + MAX_MULTICAST_TOKENS], title, body, data)
+            )
+    except Exception as e:
+        # Don't fail the request if notification fails
+        log.warning("FCM enqueue failed: %s", e)
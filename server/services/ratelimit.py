@@ -0,0 +1,384 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import jsonify, request
+
+from services import metrics
+
+log = logging.getLogger(__name__)
+
+# --- Rate Limiting ---
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, bursts up to `capacity`.
+    Thread-safe; used to pace outbound calls (e.g. OpenAI requests per minute).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, count, burst=None):
+        return cls(count / 60.0, capacity=burst if burst is not None else 1)
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available. Returns (ok, seconds until enough tokens)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True, 0.0
+            return False, (tokens - self._tokens) / self.rate if self.rate else float("inf")
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are available (or timeout). Returns True on success."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ok, wait_for = self.try_acquire(tokens)
+            if ok:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+
+# --- Admission Control ---
+# Paid AI endpoints are guarded before any model call is made:
+#   1. token buckets per client, one keyed on the user and one on the IP
+#      (IP buckets are RATE_LIMIT_IP_FACTOR times larger: campus Wi-Fi NATs
+#      many students behind one address)
+#   2. a cap on concurrent requests per upstream provider, so one burst
+#      can't queue hundreds of calls against the shared OpenAI/Gemini quota
+# Over a limit the request is answered right away with 429 + Retry-After.
+#
+#   RATE_LIMIT_BACKEND=memory   per process
+#                      sqlite   shared by every worker on the host (RATE_LIMIT_SQLITE_PATH)
+#                      none     disabled
+#     unset: sqlite when WEB_CONCURRENCY > 1 (per-process buckets and slots
+#     would let each worker admit the full limit), else memory
+#   RATE_LIMIT_UPLOAD=10/minute, RATE_LIMIT_ANALYZE, RATE_LIMIT_VISION, RATE_LIMIT_DRAFT
+#     (period: second/sec/s, minute/min/m, hour/hr/h, day/d)
+#   OPENAI_MAX_CONCURRENCY=16, GEMINI_MAX_CONCURRENCY=8
+
+POLICIES = {
+    "upload": os.getenv("RATE_LIMIT_UPLOAD", "10/minute"),
+    "analyze": os.getenv("RATE_LIMIT_ANALYZE", "5/minute"),
+    "vision": os.getenv("RATE_LIMIT_VISION", "10/minute"),
+    "draft": os.getenv("RATE_LIMIT_DRAFT", "20/minute"),
+}
+IP_FACTOR = float(os.getenv("RATE_LIMIT_IP_FACTOR", "5"))
+TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY") == "1"  # Use X-Forwarded-For
+
+PROVIDER_CONCURRENCY = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+}
+PROVIDER_RETRY_AFTER = 2  # seconds; slots free up as fast as a model call
+SLOT_TTL = 300  # a slot held by a crashed worker is reclaimed after this
+
+_PERIODS = {
+    "second": 1, "sec": 1, "s": 1,
+    "minute": 60, "min": 60, "m": 60,
+    "hour": 3600, "hr": 3600, "h": 3600,
+    "day": 86400, "d": 86400,
+}
+
+
+def parse_rate(spec):
+    """'10/minute' -> (tokens per second, burst capacity). Raises ValueError if malformed."""
+    count, _, period = spec.partition("/")
+    period = period.strip().lower() or "minute"
+    if period not in _PERIODS and period.endswith("s"):
+        period = period[:-1]  # minutes, secs, hrs
+    if period not in _PERIODS:
+        raise ValueError(f"unknown period {period!r} in {spec!r} (use e.g. '10/minute')")
+    try:
+        count = float(count)
+    except ValueError:
+        raise ValueError(f"bad count in {spec!r} (use e.g. '10/minute')") from None
+    if count <= 0:
+        raise ValueError(f"count must be positive in {spec!r}")
+    return count / _PERIODS[period], count
+
+
+def _policy_rates():
+    rates = {}
+    for name, spec in POLICIES.items():
+        try:
+            rates[name] = parse_rate(spec)
+        except ValueError as e:
+            raise ValueError(f"RATE_LIMIT_{name.upper()}: {e}") from None
+    return rates
+
+
+class Throttled(Exception):
+    """Request refused by admission control."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def response(self):
+        """(payload, status, headers) for a fast 429."""
+        headers = {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+        return {"error": f"{self} Please try again shortly."}, 429, headers
+
+
+class MemoryLimiter:
+    """Buckets and provider slots in this process. Thread-safe."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._slots = {}  # key -> slots in use
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity, cost=1):
+        """Returns (ok, seconds until enough tokens)."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            ok = tokens >= cost
+            if ok:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return ok, 0.0 if ok else (cost - tokens) / rate
+
+    def enter(self, key, limit, ttl):
+        """Take a slot. Returns a lease id, or None if all `limit` slots are busy."""
+        with self._lock:
+            if self._slots.get(key, 0) >= limit:
+                return None
+            self._slots[key] = self._slots.get(key, 0) + 1
+            return key
+
+    def leave(self, key, lease):
+        with self._lock:
+            self._slots[key] = max(0, self._slots.get(key, 0) - 1)
+
+
+class SQLiteLimiter:
+    """
+    Same state in a SQLite file, so all worker processes on the host share
+    the buckets and the provider caps (local stand-in for Redis).
+    A bucket row is dropped once it has refilled (`full_at`): a missing row
+    reads as a full bucket, so one row per client seen doesn't pile up.
+    """
+
+    PURGE_EVERY = 500  # takes between sweeps of refilled buckets
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL, updated REAL, full_at REAL)"
+        )
+        try:
+            conn.execute("ALTER TABLE buckets ADD COLUMN full_at REAL")  # Older files
+        except sqlite3.OperationalError:
+            pass  # Already there
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS slots (lease TEXT PRIMARY KEY, key TEXT, expires_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_slots_key ON slots (key)")
+        os.register_at_fork(after_in_child=self._forget_connections)
+
+    def _forget_connections(self):
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def take(self, key, rate, capacity, cost=1):
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            ok = tokens >= cost
+            if ok:
+                tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+        self._takes += 1
+        if self._takes % self.PURGE_EVERY == 0:
+            self.purge_full()
+        return ok, 0.0 if ok else (cost - tokens) / rate
+
+    def purge_full(self):
+        """Delete buckets that have refilled since their last use (rows from older files too)."""
+        now = time.time()
+        self._conn().execute(
+            "DELETE FROM buckets WHERE full_at < ? OR (full_at IS NULL AND updated < ?)",
+            (now, now - 86400),
+        )
+
+    def enter(self, key, limit, ttl):
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM slots WHERE key = ? AND expires_at < ?", (key, now))
+            (used,) = conn.execute("SELECT COUNT(*) FROM slots WHERE key = ?", (key,)).fetchone()
+            if used >= limit:
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO slots (lease, key, expires_at) VALUES (?, ?, ?)",
+                (lease, key, now + ttl),
+            )
+        return lease
+
+    def leave(self, key, lease):
+        self._conn().execute("DELETE FROM slots WHERE lease = ?", (lease,))
+
+
+class NullLimiter:
+    """Admission control disabled (RATE_LIMIT_BACKEND=none)."""
+
+    def take(self, key, rate, capacity, cost=1):
+        return True, 0.0
+
+    def enter(self, key, limit, ttl):
+        return key
+
+    def leave(self, key, lease):
+        pass
+
+
+def _build_limiter():
+    default = "sqlite" if int(os.getenv("WEB_CONCURRENCY") or "1") > 1 else "memory"
+    backend = (os.getenv("RATE_LIMIT_BACKEND") or default).lower()
+    if backend == "none":
+        return NullLimiter()
+    if backend == "sqlite":
+        path = os.getenv("RATE_LIMIT_SQLITE_PATH") or os.path.join(
+            "/tmp", "campusfind_ratelimit.db"
+        )
+        return SQLiteLimiter(path)
+    return MemoryLimiter()
+
+
+limiter = _build_limiter()
+_POLICY_RATES = _policy_rates()
+
+
+def client_ip(headers, remote_addr):
+    if TRUST_PROXY:
+        forwarded = headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return remote_addr
+
+
+def admit(policy, user_id=None, ip=None):
+    """Take a token from the client's user and IP buckets, or raise Throttled."""
+    rate, capacity = _POLICY_RATES[policy]
+    for scope, ident, factor in (("ip", ip, IP_FACTOR), ("user", user_id, 1.0)):
+        if ident is None:
+            continue
+        ok, wait = limiter.take(f"{policy}:{scope}:{ident}", rate * factor, capacity * factor)
+        if not ok:
+            metrics.inc("rate_limited_total", policy=policy, scope=scope)
+            raise Throttled("Too many requests.", wait)
+
+
+@contextmanager
+def provider_slots(*providers):
+    """Hold one concurrency slot per upstream provider, or raise Throttled."""
+    leases = []
+    try:
+        for provider in providers:
+            key = f"provider:{provider}"
+            lease = limiter.enter(key, PROVIDER_CONCURRENCY[provider], SLOT_TTL)
+            if lease is None:
+                metrics.inc("rate_limited_total", policy=provider, scope="provider")
+                raise Throttled("AI is busy.", PROVIDER_RETRY_AFTER)
+            leases.append((key, lease))
+        yield
+    finally:
+        for key, lease in leases:
+            try:
+                limiter.leave(key, lease)
+            except Exception as e:
+                log.warning("Releasing %s slot failed: %s", key, e)
+
+
+def rate_limited(policy, providers=(), when=None):
+    """
+    Admission control for a Flask view: the policy's per-user/IP buckets,
+    then a slot on each provider for the duration of the request.
+    `when` (optional) limits it to requests that will call a model.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if when is not None and not when():
+                return f(*args, **kwargs)
+            from routes.auth import token_user_id
+
+            try:
+                admit(
+                    policy,
+                    user_id=token_user_id(request.headers.get("Authorization")),
+                    ip=client_ip(request.headers, request.remote_addr),
+                )
+                with provider_slots(*providers):
+                    return f(*args, **kwargs)
+            except Throttled as e:
+                payload, status, headers = e.response()
+                return jsonify(payload), status, headers
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,152 @@
+import json
+import os
+from functools import lru_cache
+
+from flask import current_app
+from models import Item, User
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, stdlib json works fine
+    orjson = None
+
+# --- Item Serialization ---
+# One place that turns item rows into API payloads. Routes query plain row
+# tuples (only the columns they need) instead of full ORM instances, which
+# skips identity-map bookkeeping and keeps wide columns out of feed scans.
+
+
+def dumps(payload):
+    """Encode to JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def json_response(payload, status=200):
+    return current_app.response_class(
+        dumps(payload), status=status, mimetype="application/json"
+    )
+
+
+def image_src(image_data, image_url):
+    """Cloudinary/DB image first, then the legacy local upload path."""
+    if image_data:
+        return image_data
+    if image_url:
+        return f"/uploads/{os.path.basename(image_url)}"
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _parse_features(item_id, raw):
+    # Keyed on (item id, stored text): an edit changes the text, i.e. the version
+    try:
+        return tuple(json.loads(raw))
+    except (TypeError, ValueError):
+        return ()
+
+
+def features_of(item_id, raw):
+    # Native JSON columns hand back lists; raw JSON text only shows up for
+    # rows read before the column migration (see migrations.py)
+    if not raw:
+        return []
+    if isinstance(raw, (list, tuple)):
+        return raw
+    return _parse_features(item_id, raw)
+
+
+def _format_date(value):
+    # Same output as strftime("%Y-%m-%d %H:%M"), without the format parsing
+    return value.isoformat(sep=" ", timespec="minutes") if value else None
+
+
+# field name -> (columns it needs, getter over a result row)
+ITEM_FIELDS = {
+    "id": ((Item.id,), lambda r: r.id),
+    "type": ((Item.type,), lambda r: r.type),
+    "description": ((Item.description,), lambda r: r.description),
+    "location": ((Item.location,), lambda r: r.location),
+    "date_lost": ((Item.date_lost,), lambda r: _format_date(r.date_lost)),
+    "image_url": (
+        (Item.image_data, Item.image_url),
+        lambda r: image_src(r.image_data, r.image_url),
+    ),
+    "category": ((Item.category,), lambda r: r.category),
+    "color": ((Item.color,), lambda r: r.color),
+    "brand": ((Item.brand,), lambda r: r.brand),
+    "distinctive_features": (
+        (Item.distinctive_features,),
+        lambda r: features_of(r.id, r.distinctive_features),
+    ),
+    "status": ((Item.status,), lambda r: r.status),
+    "user_id": ((Item.user_id,), lambda r: r.user_id),
+    "reporter": (
+        (
+            User.name.label("reporter_name"),
+            User.email.label("reporter_email"),
+            User.phone.label("reporter_phone"),
+            User.profile_photo.label("reporter_photo"),
+            Item.contact_info,
+        ),
+        lambda r: {
+            "name": r.reporter_name,
+            "email": r.reporter_email,
+            "phone": r.reporter_phone,
+            "profile_photo": r.reporter_photo,
+            "contact_info": r.contact_info,
+        },
+    ),
+}
+
+FEED_FIELDS = (
+    "id",
+    "type",
+    "description",
+    "location",
+    "date_lost",
+    "image_url",
+    "category",
+    "color",
+    "brand",
+    "distinctive_features",
+    "status",
+)
+DETAIL_FIELDS = FEED_FIELDS + ("user_id", "reporter")
+
+
+def select_fields(fields_arg, allowed):
+    """
+    Parse a sparse fieldset (?fields=id,description,image_url).
+    Unknown names are ignored; 'id' is always included.
+    """
+    if not fields_arg:
+        return allowed
+    wanted = {f.strip() for f in fields_arg.split(",") if f.strip()}
+    selected = tuple(f for f in allowed if f in wanted)
+    if "id" not in selected:
+        selected = ("id",) + selected
+    return selected
+
+
+def item_columns(fields):
+    """Columns to SELECT for the given fields (deduplicated, id always first)."""
+    columns = [Item.id]
+    seen = {id(Item.id)}
+    for field in fields:
+        for column in ITEM_FIELDS[field][0]:
+            # Identity check: the column objects above are module-level singletons
+            if id(column) not in seen:
+                seen.add(id(column))
+                columns.append(column)
+    return columns
+
+
+def serialize_rows(rows, fields):
+    getters = [(field, ITEM_FIELDS[field][1]) for field in fields]
+    return [{field: get(row) for field, get in getters} for row in rows]
+
+
+def serialize_row(row, fields):
+    return serialize_rows((row,), fields)[0]
@@ -0,0 +1,41 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import cloudinary
+import cloudinary.uploader
+
+# --- Image Storage ---
+# Compressed uploads go to Cloudinary. IMAGE_STORAGE=fake skips the network
+# and returns a Cloudinary-style URL (FAKE_UPLOAD_LATENCY_MS simulates the
+# round trip), so load tests and offline development never touch the CDN.
+
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "cloudinary").lower()
+FAKE_UPLOAD_LATENCY_MS = int(os.getenv("FAKE_UPLOAD_LATENCY_MS", "0"))
+FAKE_CLOUD_NAME = "campusfind-local"
+
+
+def fake_image_url(content, folder="campusfind"):
+    digest = hashlib.sha1(content).hexdigest()[:20]
+    return f"https://res.cloudinary.com/{FAKE_CLOUD_NAME}/image/upload/{folder}/{digest}.jpg"
+
+
+def upload_image(content, folder="campusfind"):
+    """Store image bytes, return the public (secure) URL."""
+    if IMAGE_STORAGE == "fake":
+        if FAKE_UPLOAD_LATENCY_MS:
+            time.sleep(FAKE_UPLOAD_LATENCY_MS / 1000.0)
+        return fake_image_url(content, folder)
+
+    result = cloudinary.uploader.upload(content, folder=folder, resource_type="image")
+    return result.get("secure_url")
+
+
+async def upload_image_async(content, folder="campusfind"):
+    """upload_image without blocking the event loop (the Cloudinary SDK is sync-only)."""
+    if IMAGE_STORAGE == "fake":
+        if FAKE_UPLOAD_LATENCY_MS:
+            await asyncio.sleep(FAKE_UPLOAD_LATENCY_MS / 1000.0)
+        return fake_image_url(content, folder)
+    return await asyncio.to_thread(upload_image, content, folder)
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows dev box: chunks of one upload are serialized per process only
+    fcntl = None
+
+from services import metrics
+from services.cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+# --- Chunked Uploads ---
+# Resumable alternative to one big multipart POST for photos on slow links:
+#   start   -> session id (metadata + empty spool file)
+#   append  -> chunk written at the exact current offset (else 409 with the
+#              offset to resume from); a running SHA-256 is kept per session
+#   finish  -> whole file, checked against the declared size/hash, for the
+#              regular create-item pipeline
+# Sessions live in UPLOAD_SPOOL_DIR so every worker on the host can take the
+# next chunk (the one holding the running hash is fastest; another rebuilds it
+# from the spool once). Several hosts need sticky sessions or a shared volume.
+
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or os.path.join(
+    tempfile.gettempdir(), "campusfind-uploads"
+)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(512 * 1024)))  # suggested to clients
+MAX_CHUNK_BYTES = 4 * UPLOAD_CHUNK_BYTES
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))  # abandoned sessions are swept after this
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+_hashers = LRUCache(max_entries=1024)  # upload_id -> (offset, running sha256)
+
+
+class UploadError(Exception):
+    """A chunked-upload request that can't be applied. `extra` goes into the JSON body."""
+
+    def __init__(self, message, status, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+    def response(self):
+        """(payload, status, headers)"""
+        return {"error": str(self), **self.extra}, self.status, {}
+
+
+def _paths(upload_id):
+    if not _SESSION_ID.match(upload_id or ""):
+        raise UploadError("Upload not found", 404)
+    base = os.path.join(UPLOAD_SPOOL_DIR, upload_id)
+    return base + ".json", base + ".part"
+
+
+def _load(upload_id, user_id):
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise UploadError("Upload not found", 404)
+    if meta["user_id"] != user_id:
+        raise UploadError("Upload not found", 404)
+    return meta, part_path
+
+
+class _Locked:
+    """The spool file opened for append under an exclusive lock (across workers)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        try:
+            self.file = open(self.path, "r+b")
+        except FileNotFoundError:
+            raise UploadError("Upload not found", 404)
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self.file
+
+    def __exit__(self, *exc):
+        self.file.close()  # Releases the lock
+
+
+def _hash_spool(f, length):
+    hasher = hashlib.sha256()
+    f.seek(0)
+    remaining = length
+    while remaining:
+        block = f.read(min(remaining, 1024 * 1024))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher
+
+
+def _running_hash(upload_id, f, offset):
+    """The session's SHA-256 state at `offset`, rebuilt from the spool if this worker lacks it."""
+    cached = _hashers.get(upload_id)
+    if cached and cached[0] == offset:
+        return cached[1]
+    metrics.inc("upload_hash_rebuilds_total")
+    return _hash_spool(f, offset)
+
+
+def sweep(now=None):
+    """Delete sessions untouched for UPLOAD_SESSION_TTL."""
+    now = now or time.time()
+    try:
+        names = os.listdir(UPLOAD_SPOOL_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(UPLOAD_SPOOL_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > UPLOAD_SESSION_TTL:
+                os.remove(path)
+        except OSError:
+            pass  # Raced with another worker's sweep or finish
+
+
+def session_payload(upload_id, meta, offset):
+    return {
+        "upload_id": upload_id,
+        "offset": offset,
+        "size": meta["size"],
+        "chunk_size": UPLOAD_CHUNK_BYTES,
+        "complete": offset == meta["size"],
+    }
+
+
+def start(user_id, filename, content_type, size, sha256=None):
+    """Open a session for a file of `size` bytes. Returns its status payload."""
+    if not filename:
+        raise UploadError("filename is required", 400)
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size must be the file size in bytes", 400)
+    if size <= 0:
+        raise UploadError("size must be the file size in bytes", 400)
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadError(f"File too large (max {MAX_UPLOAD_BYTES} bytes)", 413)
+    if sha256 is not None:
+        sha256 = str(sha256).lower()
+        if not _SHA256.match(sha256):
+            raise UploadError("sha256 must be a hex SHA-256 digest", 400)
+
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    sweep()
+
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    meta = {
+        "user_id": user_id,
+        "filename": filename,
+        "content_type": content_type or "application/octet-stream",
+        "size": size,
+        "sha256": sha256,
+        "created_at": time.time(),
+    }
+    open(part_path, "wb").close()
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    metrics.inc("upload_sessions_total", event="started")
+    return session_payload(upload_id, meta, 0)
+
+
+def status(upload_id, user_id):
+    meta, part_path = _load(upload_id, user_id)
+    try:
+        offset = os.path.getsize(part_path)
+    except OSError:
+        raise UploadError("Upload not found", 404)
+    return session_payload(upload_id, meta, offset)
+
+
+def append(upload_id, user_id, offset, data, chunk_sha256=None):
+    """
+    Write `data` at `offset`, which must be the bytes received so far (a
+    retried chunk that already landed gets 409 with the offset to continue
+    from). `chunk_sha256`, if sent, is checked before anything is written.
+    """
+    meta, part_path = _load(upload_id, user_id)
+    meta_path = _paths(upload_id)[0]
+    if not data:
+        raise UploadError("Empty chunk", 400)
+    if chunk_sha256 and hashlib.sha256(data).hexdigest() != chunk_sha256.lower():
+        raise UploadError("Chunk checksum mismatch, resend it", 400, offset=offset)
+
+    with _Locked(part_path) as f:
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise UploadError("Offset does not match the bytes received", 409, offset=current)
+        if current + len(data) > meta["size"]:
+            raise UploadError("Chunk goes past the declared size", 400, offset=current)
+
+        hasher = _running_hash(upload_id, f, current)
+        f.seek(current)
+        f.write(data)
+        f.flush()
+        hasher.update(data)
+        _hashers.set(upload_id, (current + len(data), hasher), ttl=UPLOAD_SESSION_TTL)
+    os.utime(meta_path)  # Active sessions are never swept
+
+    metrics.observe("upload_chunk_bytes", len(data))
+    return session_payload(upload_id, meta, current + len(data))
+
+
+def finish(upload_id, user_id):
+    """
+    (content, meta) of a fully received upload, verified against the declared
+    SHA-256. The session stays until discard(), so a finalize that fails
+    downstream can be retried without re-sending the file.
+    """
+    meta, part_path = _load(upload_id, user_id)
+    with _Locked(part_path) as f:
+        received = os.fstat(f.fileno()).st_size
+        if received != meta["size"]:
+            raise UploadError("Upload incomplete", 409, offset=received)
+        digest = _running_hash(upload_id, f, received).hexdigest()
+        if meta["sha256"] and digest != meta["sha256"]:
+            discard(upload_id, user_id)
+            raise UploadError("File checksum mismatch, upload it again", 422)
+        f.seek(0)
+        content = f.read()
+    meta["sha256"] = digest
+    return content, meta
+
+
+def discard(upload_id, user_id):
+    """Delete a session and its spool file."""
+    meta_path, part_path = _paths(upload_id)
+    _load(upload_id, user_id)
+    _hashers.delete(upload_id)
+    for path in (meta_path, part_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
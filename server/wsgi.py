@@ -0,0 +1,9 @@
+"""
+Production WSGI entry point:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings (workers, threads, preload, recycling, timeouts) live in
+gunicorn.conf.py. For the async AI endpoints see asgi.py.
+"""
+from app import app  # noqa: F401